@@ -1,3 +1,4 @@
+import math
 from typing import Annotated
 
 from fastapi import (
@@ -9,16 +10,50 @@ from fastapi import (
     Header,
 )
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
+from starlette.concurrency import run_in_threadpool
 
+from core.auth_cache import member_cache
+from core.rate_limit import rate_limiter
+from core.state import call_store
+from core.log import bind_member
 from core.db_models import Team, Member
-from core.get_db import get_db
+from core.get_db import get_db, DatabaseHelper
+from data import hash_token
+
+
+def get_database() -> DatabaseHelper:
+    return get_db
+
 
 SessionGetter = Annotated[
     Session,
     Depends(get_db.session_getter),
 ]
 
+AsyncSessionGetter = Annotated[
+    AsyncSession,
+    Depends(get_db.async_session_getter),
+]
+
+# For routes that never write, served by the read replica when configured
+ReadSessionGetter = Annotated[
+    Session,
+    Depends(get_db.read_session_getter),
+]
+
+AsyncReadSessionGetter = Annotated[
+    AsyncSession,
+    Depends(get_db.async_read_session_getter),
+]
+
+# For work that outlives the request scope (streams, background refreshes)
+DatabaseGetter = Annotated[
+    DatabaseHelper,
+    Depends(get_database),
+]
+
 import logging
 from core.config import settings
 
@@ -81,7 +116,13 @@ def get_member_by_cookie(
             detail="Missing token cookie",
         )
 
-    stmt = select(Member).where(Member.token == users_token)
+    token = hash_token(users_token)
+    cached, versions = member_cache.get(token)
+    if cached is not None:
+        bind_member(cached.id)
+        return session.merge(cached, load=False)
+
+    stmt = select(Member).where(Member.token == token)
     member = session.execute(stmt).scalar_one_or_none()
 
     if member is None:
@@ -90,6 +131,41 @@ def get_member_by_cookie(
             detail="Invalid token",
         )
 
+    member_cache.put(member, versions)
+    bind_member(member.id)
+    return member
+
+
+async def get_member_by_cookie_async(
+    users_token: Annotated[
+        str | None,
+        Cookie(alias="users-token"),
+    ],
+    session: AsyncSessionGetter,
+) -> Member:
+    if users_token is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Missing token cookie",
+        )
+
+    token = hash_token(users_token)
+    cached, versions = await call_store(member_cache.store, member_cache.get, token)
+    if cached is not None:
+        bind_member(cached.id)
+        return await session.merge(cached, load=False)
+
+    stmt = select(Member).where(Member.token == token)
+    member = (await session.execute(stmt)).scalar_one_or_none()
+
+    if member is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid token",
+        )
+
+    member_cache.put(member, versions)
+    bind_member(member.id)
     return member
 
 
@@ -106,3 +182,26 @@ def if_team_name_is_free(
             status_code=400,
             detail="Team already exists",
         )
+
+
+def rate_limit(name: str):
+    """
+    Route dependency answering 429 to a client over the rate limit `name`.
+
+    Pass it in the route's dependencies=[...], they are resolved before
+    the parameters, so a shed request never opens a session.
+    """
+
+    async def check_rate_limit(request: Request) -> None:
+        if rate_limiter.enabled and rate_limiter.store.shared:
+            retry_after = await run_in_threadpool(rate_limiter.hit, name, request)
+        else:
+            retry_after = rate_limiter.hit(name, request)
+        if retry_after is not None:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many requests",
+                headers={"Retry-After": str(math.ceil(retry_after))},
+            )
+
+    return check_rate_limit
@@ -0,0 +1,29 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from core.metrics import metrics
+
+router = APIRouter(
+    tags=["Metrics"],
+)
+
+
+@router.get(
+    "/metrics",
+    response_class=PlainTextResponse,
+    include_in_schema=False,
+)
+def get_metrics():
+    """
+    Request and database metrics of this worker for Prometheus.
+
+    Returns:
+        PlainTextResponse: Metrics in the Prometheus text format 0.0.4
+
+    Note:
+        Counters are kept per worker process
+    """
+    return PlainTextResponse(
+        metrics.render(),
+        media_type="text/plain; version=0.0.4; charset=utf-8",
+    )
@@ -4,6 +4,8 @@ from .member import router as member_router
 from .team import router as team_router
 from .admin import router as admin_router
 from .voting import router as voting_router
+from .voting_async import router as voting_async_router
+from .voting_queue import router as voting_queue_router
 
 router = APIRouter(
     prefix=settings.api.v1.prefix,
@@ -14,4 +16,9 @@ router.include_router(team_router)
 
 router.include_router(admin_router)
 
-router.include_router(voting_router)
+if settings.vote_queue.enabled:
+    router.include_router(voting_queue_router)
+elif settings.db.async_mode:
+    router.include_router(voting_async_router)
+else:
+    router.include_router(voting_router)
@@ -1,10 +1,47 @@
-from fastapi import APIRouter, Depends, status, HTTPException
-from typing import Annotated
+import csv
+import io
+import json
+from itertools import batched
+from anyio import to_thread
+from fastapi import (
+    APIRouter,
+    Depends,
+    status,
+    HTTPException,
+    Request,
+    Response,
+    Query,
+)
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from typing import Annotated, Any, Iterable, Iterator, Literal
+
+from pydantic import ValidationError
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, aliased
 
-from core.schemas import MemberInAdmin, MemberOut, MemberUpdateAdmin
-from api.dependencies import SessionGetter, verify_api_key, get_member_by_id
-from core.db_models import Member
-from sqlalchemy import select
+from core.schemas import (
+    MemberInAdmin,
+    MemberOut,
+    MemberUpdateAdmin,
+    MemberBulkResult,
+    MemberBulkOut,
+)
+from api.dependencies import (
+    SessionGetter,
+    DatabaseGetter,
+    verify_api_key,
+    get_member_by_id,
+)
+from core.db_models import Member, Team
+from core.get_db import DatabaseHelper
+from core.auth_cache import member_cache
+from core.rate_limit import rate_limiter
+from core.live_results import results_broadcaster
+from core.response_cache import response_cache, MEMBERS, VOTES
+from core.tally import remove_member
+from sqlalchemy import select, insert, or_, func
+from data import hash_token
 
 
 import logging
@@ -12,6 +49,23 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+# rows per INSERT executemany and per uniqueness lookup
+BULK_CHUNK_SIZE = 1000
+# page size of GET /admin/members
+MEMBERS_PAGE_SIZE = 100
+MEMBERS_PAGE_MAX = 1000
+# rows fetched from the cursor and sent per chunk by the export
+EXPORT_BATCH_SIZE = 1000
+EXPORT_COLUMNS = (
+    "id",
+    "name",
+    "username",
+    "has_joined_team",
+    "team",
+    "has_voted",
+    "vote",
+)
+
 router = APIRouter(
     tags=["Admin-Users"],
     prefix="/admin",
@@ -39,42 +93,289 @@ def verify_admin_access():
     return {"message": "Admin access verified", "authenticated": True}
 
 
+@router.get(
+    "/auth-cache",
+    status_code=status.HTTP_200_OK,
+)
+def get_auth_cache_stats():
+    """
+    Get statistics of the token-to-member authentication cache.
+
+    Returns:
+        dict: enabled flag, size, maxsize, ttl, hits and misses
+
+    Security:
+        Requires admin API key authentication
+
+    Admin Use:
+        Check the hit ratio during vote-time bursts
+    """
+    return member_cache.stats()
+
+
+@router.get(
+    "/response-cache",
+    status_code=status.HTTP_200_OK,
+)
+def get_response_cache_stats():
+    """
+    Get statistics of the cache of public read endpoints.
+
+    Returns:
+        dict: size, hits and misses
+
+    Security:
+        Requires admin API key authentication
+
+    Admin Use:
+        Check how often /teams and /voting/count are rendered during voting
+    """
+    return response_cache.stats()
+
+
+@router.get(
+    "/rate-limit",
+    status_code=status.HTTP_200_OK,
+)
+def get_rate_limit_stats():
+    """
+    Get the rate limit rules and their allowed and rejected requests.
+
+    Returns:
+        dict: enabled flag, shared flag and per rule its rate, burst, key,
+              allowed and rejected counts of this worker
+
+    Security:
+        Requires admin API key authentication
+
+    Admin Use:
+        Check whether the limits shed real users during a voting burst
+    """
+    return rate_limiter.stats()
+
+
+@router.get(
+    "/db-pool",
+    status_code=status.HTTP_200_OK,
+)
+async def get_db_pool_stats(database: DatabaseGetter):
+    """
+    Get the live state of the connection pool and of the threadpool.
+
+    Returns:
+        dict: pool (size, checked_out, idle, overflow, capacity, timeout),
+              read_pool (same fields, None without a read replica)
+              and threadpool (threads, busy, waiting) of this worker
+
+    Security:
+        Requires admin API key authentication
+
+    Admin Use:
+        Size CONFIG__DB__POOL_SIZE and CONFIG__RUNTIME__THREADPOOL_SIZE,
+        waiting threads with every connection checked out mean the pool
+        is the bottleneck
+    """
+    # the limiter belongs to the event loop, read it from an async route
+    limiter = to_thread.current_default_thread_limiter()
+    replica = database.read_replica
+    return {
+        "pool": database.pool_stats(),
+        "read_pool": replica.pool_stats() if replica else None,
+        "threadpool": {
+            "threads": limiter.total_tokens,
+            "busy": limiter.borrowed_tokens,
+            "waiting": limiter.statistics().tasks_waiting,
+        },
+    }
+
+
 # Secured endpoint, we dont want the other to see who they voted for
 @router.get(
     "/members",
     status_code=status.HTTP_200_OK,
     response_model=list[MemberOut],
 )
-def get_members(session: SessionGetter):
+def get_members(
+    response: Response,
+    session: SessionGetter,
+    limit: Annotated[
+        int,
+        Query(ge=1, le=MEMBERS_PAGE_MAX),
+    ] = MEMBERS_PAGE_SIZE,
+    after_id: Annotated[
+        int | None,
+        Query(ge=0),
+    ] = None,
+    has_voted: bool | None = None,
+    team_id: int | None = None,
+    username: Annotated[
+        str | None,
+        Query(min_length=1),
+    ] = None,
+):
     """
-    Get all registered members in the system.
+    Get a page of registered members, ordered by ID.
     
     Args:
+        response: Response carrying the pagination headers
         session: Database session
+        limit: Maximum number of members in the page
+        after_id: Cursor, ID of the last member of the previous page
+        has_voted: Only members that have (or have not) voted
+        team_id: Only members of this team
+        username: Only members whose username starts with this prefix
     
     Returns:
-        list[MemberOut]: Complete list of all members with their details
+        list[MemberOut]: Members of the page with their details
+    
+    Headers:
+        X-Total-Count: Number of members matching the filters
+        X-Next-Cursor: after_id of the next page, absent on the last page
     
     Security:
         Requires admin API key authentication
         Secured endpoint to protect member voting privacy
     
     Raises:
-        HTTPException(404): If no members exist in the system
+        HTTPException(404): If the first page is empty
     
     Admin Use:
         Monitor registration status and member activity
+    
+    Note:
+        Keyset pagination on the primary key, every page costs the same
+        regardless of how deep it is
     """
-    stmt = select(Member)
+    filters = []
+    if has_voted is not None:
+        filters.append(Member.has_voted == has_voted)
+    if team_id is not None:
+        filters.append(Member.team_id == team_id)
+    if username is not None:
+        filters.append(Member.username.startswith(username, autoescape=True))
+
+    stmt = select(Member).where(*filters)
+    if after_id is not None:
+        stmt = stmt.where(Member.id > after_id)
+    # one extra row tells whether there is a next page
+    stmt = stmt.order_by(Member.id).limit(limit + 1)
     members = session.execute(stmt).scalars().all()
-    if not members:
+    if not members and after_id is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="No members found",
         )
+
+    total = session.execute(
+        select(func.count()).select_from(Member).where(*filters),
+    ).scalar_one()
+    response.headers["X-Total-Count"] = str(total)
+    if len(members) > limit:
+        members = members[:limit]
+        response.headers["X-Next-Cursor"] = str(members[-1].id)
     return members
 
 
+def iter_member_rows(database: DatabaseHelper) -> Iterator[tuple]:
+    """
+    Iterate over every member as a tuple of EXPORT_COLUMNS.
+
+    Args:
+        database: Database to read from, the session lives as long
+            as the iteration
+
+    Note:
+        Plain column tuples are fetched EXPORT_BATCH_SIZE at a time from
+        a server-side cursor, no ORM object is built
+    """
+    team = aliased(Team)
+    vote = aliased(Team)
+    stmt = (
+        select(
+            Member.id,
+            Member.name,
+            Member.username,
+            Member.has_joined_team,
+            team.name,
+            Member.has_voted,
+            vote.name,
+        )
+        .outerjoin(team, Member.team_id == team.id)
+        .outerjoin(vote, Member.vote_id == vote.id)
+        .order_by(Member.id)
+        .execution_options(yield_per=EXPORT_BATCH_SIZE)
+    )
+    with database.session_factory() as session:
+        yield from session.execute(stmt).tuples()
+
+
+def encode_ndjson(rows: Iterable[tuple]) -> Iterator[str]:
+    for batch in batched(rows, EXPORT_BATCH_SIZE):
+        yield "".join(
+            json.dumps(dict(zip(EXPORT_COLUMNS, row))) + "\n" for row in batch
+        )
+
+
+def encode_csv(rows: Iterable[tuple]) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+    for batch in batched(rows, EXPORT_BATCH_SIZE):
+        writer.writerows(batch)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    # header of an empty export
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+@router.get(
+    "/members/export",
+    status_code=status.HTTP_200_OK,
+)
+def export_members(
+    database: DatabaseGetter,
+    export_format: Annotated[
+        Literal["ndjson", "csv"],
+        Query(alias="format"),
+    ] = "ndjson",
+):
+    """
+    Export every member with their team and vote.
+    
+    Args:
+        database: Database helper, the export opens its own session
+        export_format: "ndjson" (one JSON object per line) or "csv"
+    
+    Returns:
+        StreamingResponse: id, name, username, has_joined_team, team,
+        has_voted and vote (team names) of every member, ordered by ID
+    
+    Security:
+        Requires admin API key authentication
+    
+    Admin Use:
+        Post-event audit of the registrations and votes
+    
+    Note:
+        Rows are streamed while they are read, memory use does not depend
+        on the number of members
+    """
+    rows = iter_member_rows(database)
+    if export_format == "csv":
+        return StreamingResponse(
+            encode_csv(rows),
+            media_type="text/csv",
+            headers={"Content-Disposition": 'attachment; filename="members.csv"'},
+        )
+    return StreamingResponse(
+        encode_ndjson(rows),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": 'attachment; filename="members.ndjson"'},
+    )
+
+
 @router.get(
     "/member/{member_id}",
     status_code=status.HTTP_200_OK,
@@ -151,7 +452,7 @@ def create_user(
         username=member.username,
         has_voted=False,
         has_joined_team=member.has_joined_team,
-        token=member.token,
+        token=hash_token(member.token),
         team_id=member.team_id,
     )
     stmt = select(Member).where(
@@ -165,13 +466,232 @@ def create_user(
         )
     session.add(member_db)
     session.commit()
-    logger.warning(
+    response_cache.invalidate(MEMBERS)
+    logger.info(
         "Administrator has created a new user %s",
         member_db.username,
+        extra={
+            "event": "admin.member.created",
+            "audit": True,
+            "target_id": member_db.id,
+        },
     )
     return member_db
 
 
+def chunked(items: list, size: int = BULK_CHUNK_SIZE):
+    for start in range(0, len(items), size):
+        yield items[start : start + size]
+
+
+async def read_bulk_payload(request: Request) -> list[Any]:
+    """
+    Read the raw rows of a bulk request.
+
+    Args:
+        request: Request with a JSON array body, or NDJSON when the
+            content type is application/x-ndjson
+
+    Returns:
+        list: Decoded rows, or the error message for undecodable NDJSON lines
+
+    Raises:
+        HTTPException(400): If a JSON body is malformed or not an array
+    """
+    if "ndjson" not in request.headers.get("content-type", ""):
+        try:
+            rows = json.loads(await request.body())
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Malformed JSON body",
+            )
+        if not isinstance(rows, list):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Expected a JSON array of members",
+            )
+        return rows
+
+    rows: list[Any] = []
+    buffer = b""
+
+    def decode(line: bytes) -> None:
+        if not line.strip():
+            return
+        try:
+            rows.append(json.loads(line))
+        except ValueError:
+            rows.append(None)
+
+    async for chunk in request.stream():
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            decode(line)
+    decode(buffer)
+    return rows
+
+
+def insert_members_bulk(
+    session: Session,
+    rows: list[Any],
+) -> MemberBulkOut:
+    """
+    Validate and insert many members in a single transaction.
+
+    Args:
+        session: Database session for transactions
+        rows: Decoded request rows, in request order
+
+    Returns:
+        MemberBulkOut: Per-row outcome in request order
+
+    Note:
+        Uniqueness is checked with set-based lookups and the inserts are
+        sent as executemany batches of BULK_CHUNK_SIZE rows
+    """
+    results: list[MemberBulkResult] = []
+    accepted: list[tuple[MemberBulkResult, MemberInAdmin]] = []
+    usernames: set[str] = set()
+    tokens: set[str] = set()
+
+    for index, row in enumerate(rows):
+        result = MemberBulkResult(
+            index=index,
+            username=row.get("username") if isinstance(row, dict) else None,
+            status="rejected",
+        )
+        results.append(result)
+        try:
+            member = MemberInAdmin.model_validate(row)
+        except ValidationError as exc:
+            if row is None:
+                result.detail = "Malformed row"
+            else:
+                error = exc.errors()[0]
+                location = ".".join(str(part) for part in error["loc"])
+                result.detail = f"{location}: {error['msg']}".lstrip(": ")
+            continue
+        if member.name is None:
+            result.detail = "Name is required"
+        elif member.has_joined_team and member.team_id is None:
+            result.detail = (
+                "Logical error. A member has joined team, but no relationship found"
+            )
+        elif member.username in usernames:
+            result.detail = "Duplicate username in request"
+        elif member.token in tokens:
+            result.detail = "Duplicate token in request"
+        else:
+            usernames.add(member.username)
+            tokens.add(member.token)
+            accepted.append((result, member))
+
+    taken_usernames: set[str] = set()
+    taken_tokens: set[bytes] = set()
+    for chunk in chunked(accepted):
+        stmt = select(Member.username, Member.token).where(
+            or_(
+                Member.username.in_([member.username for _, member in chunk]),
+                Member.token.in_([hash_token(member.token) for _, member in chunk]),
+            ),
+        )
+        for username, token in session.execute(stmt):
+            taken_usernames.add(username)
+            taken_tokens.add(token)
+
+    to_insert: list[tuple[MemberBulkResult, MemberInAdmin]] = []
+    for result, member in accepted:
+        if member.username in taken_usernames:
+            result.detail = "A member with that username already exists"
+        elif hash_token(member.token) in taken_tokens:
+            result.detail = "A member with that token already exists"
+        else:
+            to_insert.append((result, member))
+
+    stmt = insert(Member).returning(Member.id, sort_by_parameter_order=True)
+    try:
+        for chunk in chunked(to_insert):
+            ids = session.scalars(
+                stmt,
+                [
+                    {
+                        "name": member.name,
+                        "username": member.username,
+                        "has_voted": False,
+                        "has_joined_team": member.has_joined_team,
+                        "token": hash_token(member.token),
+                        "team_id": member.team_id,
+                    }
+                    for _, member in chunk
+                ],
+            ).all()
+            for (result, _), member_id in zip(chunk, ids):
+                result.status, result.id = "created", member_id
+        session.commit()
+    except IntegrityError:
+        session.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Members were created concurrently, nothing was inserted",
+        )
+    response_cache.invalidate(MEMBERS)
+
+    return MemberBulkOut(
+        created=len(to_insert),
+        rejected=len(results) - len(to_insert),
+        results=results,
+    )
+
+
+@router.post(
+    "/members/bulk",
+    response_model=MemberBulkOut,
+    status_code=status.HTTP_200_OK,
+)
+async def create_users_bulk(
+    request: Request,
+    session: SessionGetter,
+):
+    """
+    Create many members in one request through admin panel.
+
+    Args:
+        request: JSON array of MemberInAdmin, or one MemberInAdmin per line
+            with Content-Type: application/x-ndjson
+        session: Database session
+
+    Returns:
+        MemberBulkOut: Created/rejected counters and a result per row,
+        in request order
+
+    Security:
+        Requires admin API key authentication
+
+    Business Rules:
+        - Same rules as POST /admin/member, checked per row
+        - Usernames and tokens must also be unique within the request
+        - Rejected rows do not prevent the valid ones from being created
+
+    Raises:
+        HTTPException(400): If the body is not a JSON array or NDJSON
+        HTTPException(409): If a conflicting member was created concurrently
+
+    Admin Use:
+        Provision all members before an event
+    """
+    rows = await read_bulk_payload(request)
+    outcome = await run_in_threadpool(insert_members_bulk, session, rows)
+    logger.info(
+        "Administrator has bulk created %s users, %s rejected",
+        outcome.created,
+        outcome.rejected,
+        extra={"event": "admin.members.bulk_created", "audit": True},
+    )
+    return outcome
+
+
 # FIX
 @router.patch(
     "/member/{member_id}",
@@ -208,15 +728,21 @@ def update_user(
     Side Effects:
         Logs admin update action for audit trail
     """
+    token = member.token
     for field, value in member_in.model_dump(
         exclude_unset=True,
     ).items():
+        if field == "token" and value is not None:
+            value = hash_token(value)
         setattr(member, field, value)
     session.add(member)
     session.commit()
-    logger.warning(
+    member_cache.invalidate(token)
+    response_cache.invalidate(MEMBERS)
+    logger.info(
         "Administrator has updated user %s",
         member.username,
+        extra={"event": "admin.member.updated", "audit": True, "target_id": member.id},
     )
     return member
 
@@ -248,11 +774,21 @@ def delete_user(
         Remove spam accounts or handle data privacy requests
     
     Side Effects:
-        Logs admin deletion action for audit trail
+        - Withdraws the member's vote from the stored tally
+        - Logs admin deletion action for audit trail
     """
-    session.delete(member)
+    if not remove_member(session, member.id):
+        session.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Member not found",
+        )
     session.commit()
-    logger.warning(
+    member_cache.invalidate(member.token)
+    response_cache.invalidate(MEMBERS, VOTES)
+    results_broadcaster.notify()
+    logger.info(
         "Administrator has deleted user %s",
         member.username,
+        extra={"event": "admin.member.deleted", "audit": True, "target_id": member.id},
     )
@@ -1,3 +1,4 @@
+from datetime import datetime, timedelta, timezone
 from typing import Annotated
 
 from fastapi import (
@@ -7,7 +8,9 @@ from fastapi import (
     HTTPException,
     Response,
     Request,
+    Query,
 )
+from sqlalchemy import delete, insert, update
 from sqlalchemy.orm import Session
 
 from api.dependencies import (
@@ -15,18 +18,22 @@ from api.dependencies import (
     get_member_by_cookie,
     SessionGetter,
     verify_api_key,
+    rate_limit,
 )
 
-from core.db_models import Member, Team
+from core.config import settings
+from core.db_models import Member, Team, RegistrationToken
+from core.auth_cache import member_cache
 from core.schemas import MemberIn, MemberOut, MemberUpdate
-from data import generate_token
+from core.live_results import results_broadcaster
+from core.response_cache import response_cache, MEMBERS, VOTES
+from core.tally import remove_member
+from data import generate_token, hash_token
 
 import logging
 
 logger = logging.getLogger(__name__)
 
-TOKENS: dict[str, str] = {}
-
 
 router = APIRouter()
 
@@ -42,7 +49,7 @@ def insert_member(
     Args:
         session: Database session for transactions
         member: Member data containing name and username
-        token: Unique token for member authentication
+        token: Unique token for member authentication, stored hashed
     
     Note:
         Sets has_voted=False and has_joined_team=False by default
@@ -52,21 +59,88 @@ def insert_member(
         username=member.username,
         has_voted=False,
         has_joined_team=False,
-        token=token,
+        token=hash_token(token),
     )
     session.add(db_model)
     session.commit()
 
 
+def utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def store_tokens(
+    session: Session,
+    count: int,
+) -> list[str]:
+    """
+    Persist new registration tokens and purge the expired ones.
+    
+    Args:
+        session: Database session for transactions
+        count: Number of tokens to generate
+    
+    Returns:
+        list[str]: Generated tokens
+    """
+    now = utcnow()
+    expires_at = now + timedelta(seconds=settings.tokens.ttl)
+    tokens = [generate_token() for _ in range(count)]
+    session.execute(
+        delete(RegistrationToken).where(RegistrationToken.expires_at <= now),
+    )
+    session.execute(
+        insert(RegistrationToken),
+        [
+            {
+                "token": token,
+                "created_at": now,
+                "expires_at": expires_at,
+            }
+            for token in tokens
+        ],
+    )
+    session.commit()
+    return tokens
+
+
+def consume_token(
+    session: Session,
+    token: str,
+) -> bool:
+    """
+    Remove a registration token within the caller's transaction.
+    
+    Args:
+        session: Database session, committed by the caller
+        token: Registration token to consume
+    
+    Returns:
+        bool: True if the token existed and had not expired
+    
+    Note:
+        A single conditional DELETE, so concurrent workers cannot
+        register twice with the same token
+    """
+    stmt = delete(RegistrationToken).where(
+        RegistrationToken.token == token,
+        RegistrationToken.expires_at > utcnow(),
+    )
+    return session.execute(stmt).rowcount == 1
+
+
 @router.get(
     "/token",
     dependencies=[Depends(verify_api_key)],
     status_code=status.HTTP_200_OK,
 )
-def get_token() -> str:
+def get_token(session: SessionGetter) -> str:
     """
     Generate a new registration token for member signup.
     
+    Args:
+        session: Database session
+    
     Returns:
         str: Unique token that can be used for member registration
     
@@ -74,16 +148,53 @@ def get_token() -> str:
         Requires admin API key authentication
     
     Note:
-        Token is stored in memory and consumed upon successful registration
+        Token is stored in the database and consumed upon successful registration
+    """
+    return store_tokens(session, count=1)[0]
+
+
+@router.post(
+    "/tokens",
+    dependencies=[Depends(verify_api_key)],
+    status_code=status.HTTP_201_CREATED,
+)
+def get_tokens(
+    session: SessionGetter,
+    count: Annotated[
+        int,
+        Query(ge=1, le=settings.tokens.max_batch),
+    ] = 1,
+) -> list[str]:
+    """
+    Generate many registration tokens in one call.
+    
+    Args:
+        session: Database session
+        count: Number of tokens to generate (1 to tokens.max_batch)
+    
+    Returns:
+        list[str]: Unique tokens that can be used for member registration
+    
+    Security:
+        Requires admin API key authentication
+    
+    Note:
+        Tokens are stored with a single batch insert and expire
+        after tokens.ttl seconds
     """
-    token = generate_token()
-    TOKENS[token] = token
-    return token
+    tokens = store_tokens(session, count=count)
+    logger.info(
+        "Administrator has minted %s registration tokens",
+        count,
+        extra={"event": "tokens.minted", "audit": True, "count": count},
+    )
+    return tokens
 
 
 @router.post(
     "/register/{token}",
     status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(rate_limit("registration"))],
     response_model=MemberIn,
 )
 def create_member(
@@ -109,25 +220,28 @@ def create_member(
     
     Side Effects:
         - Sets 'users-token' cookie for authentication
-        - Removes token from available tokens pool
+        - Removes token from available tokens pool in the same
+          transaction as the member insert
+        - Invalidates the cached responses counting members
         - Logs member registration
     """
-    if TOKENS.get(token, None) is None:
+    if not consume_token(session, token):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid token",
         )
     insert_member(session, member, token=token)
-    TOKENS.pop(token)
+    response_cache.invalidate(MEMBERS)
     response.set_cookie(
         key="users-token",
         value=token,
         httponly=True,
         max_age=60 * 60 * 24 * 1,  # 1 day
     )
-    logger.warning(
+    logger.info(
         "New member registered %s",
         member.username,
+        extra={"event": "member.registered", "audit": True},
     )
     return member
 
@@ -197,6 +311,8 @@ def update_member(
         setattr(member, field, value)
     session.add(member)
     session.commit()
+    member_cache.invalidate(member.token)
+    response_cache.invalidate(MEMBERS)
     return member
 
 
@@ -225,13 +341,22 @@ def delete_member(
         This operation is irreversible and removes all member data
         including team membership and voting records
     """
-    session.delete(member)
+    if not remove_member(session, member.id):
+        session.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Member not found",
+        )
     session.commit()
+    member_cache.invalidate(member.token)
+    response_cache.invalidate(MEMBERS, VOTES)
+    results_broadcaster.notify()
 
 
 @router.get(
     "/users/reset/{token}",
     status_code=status.HTTP_200_OK,
+    dependencies=[Depends(rate_limit("reset"))],
 )
 def reset_cookie(
     token: str,
@@ -298,20 +423,29 @@ def join_team(
         - Sets has_joined_team flag to True
         - Logs team join action
     """
-    if member.has_joined_team:
+    stmt = (
+        update(Member)
+        .where(
+            Member.id == member.id,
+            Member.has_joined_team.is_(False),
+        )
+        .values(team_id=team.id, has_joined_team=True)
+        .execution_options(synchronize_session=False)
+    )
+    if session.execute(stmt).rowcount != 1:
+        session.rollback()
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="You cannot join a team twice",
         )
-    team_name, member_username = team.name, member.username
-    team.members.append(member)
-    member.has_joined_team = True
-    session.add(team)
     session.commit()
-    logger.warning(
+    member_cache.invalidate(member.token)
+    response_cache.invalidate(MEMBERS)
+    logger.info(
         "A member %s joined %s",
-        member_username,
-        team_name,
+        member.username,
+        team.name,
+        extra={"event": "member.joined", "team_id": team.id},
     )
 
 
@@ -348,16 +482,26 @@ def leave_team(
         - Sets has_joined_team flag to False
         - Logs team leave action
     """
-    if not member.has_joined_team:
+    stmt = (
+        update(Member)
+        .where(
+            Member.id == member.id,
+            Member.has_joined_team.is_(True),
+        )
+        .values(team_id=None, has_joined_team=False)
+        .execution_options(synchronize_session=False)
+    )
+    if session.execute(stmt).rowcount != 1:
+        session.rollback()
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="You have not joined a team yet",
         )
-    member.team = None
-    member.has_joined_team = False
-    session.add(member)
     session.commit()
-    logger.warning(
+    member_cache.invalidate(member.token)
+    response_cache.invalidate(MEMBERS)
+    logger.info(
         "A member %s left the group",
         member.username,
+        extra={"event": "member.left"},
     )
@@ -1,23 +1,27 @@
-from typing import Annotated
+from typing import Annotated, Sequence
 
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Request
 from core.schemas import (
     TeamIn,
     TeamUpdate,
     TeamOut,
     TeamMembers,
-    MemberOutTeam,
 )
 from api.dependencies import (
     get_team_by_id,
     SessionGetter,
+    ReadSessionGetter,
     verify_api_key,
     if_team_name_is_free,
 )
-from sqlalchemy import select
+from pydantic import TypeAdapter
+from sqlalchemy import select, update, delete
 from starlette import status
 
 from core.db_models import Team, Member
+from core.auth_cache import member_cache
+from core.live_results import results_broadcaster
+from core.response_cache import response_cache, TEAMS, MEMBERS, VOTES
 
 import logging
 
@@ -27,16 +31,21 @@ router = APIRouter(
 
 logger = logging.getLogger(__name__)
 
+# Encoders of the cached public responses
+TEAM_LIST = TypeAdapter(list[TeamOut])
+TEAM_MEMBERS = TypeAdapter(TeamMembers)
+
 
 @router.get(
     "/teams",
     response_model=list[TeamOut],
 )
-def list_teams(session: SessionGetter):
+def list_teams(request: Request, session: ReadSessionGetter):
     """
     Get all teams in the system.
     
     Args:
+        request: Incoming request, may carry If-None-Match
         session: Database session
     
     Returns:
@@ -52,15 +61,28 @@ def list_teams(session: SessionGetter):
         - Display available teams for voting
         - Show team selection for joining
         - Public team directory
+    
+    Caching:
+        Served from the response cache with an ETag, 304 if unchanged
     """
-    stmt = select(Team).order_by(Team.name)
-    result = session.execute(stmt).scalars().all()
-    if not result:
-        raise HTTPException(
-            status_code=404,
-            detail="No teams found",
-        )
-    return result
+
+    def render() -> Sequence[Team]:
+        stmt = select(Team).order_by(Team.name)
+        result = session.execute(stmt).scalars().all()
+        if not result:
+            raise HTTPException(
+                status_code=404,
+                detail="No teams found",
+            )
+        return result
+
+    return response_cache.respond(
+        request,
+        (TEAMS,),
+        TEAM_LIST,
+        render,
+        ttl=session.info.get("cache_ttl"),
+    )
 
 
 @router.get(
@@ -69,16 +91,17 @@ def list_teams(session: SessionGetter):
     status_code=status.HTTP_200_OK,
 )
 def list_team_users(
-    team: Annotated[
-        Team,
-        Depends(get_team_by_id),
-    ],
+    team_id: int,
+    request: Request,
+    session: ReadSessionGetter,
 ):
     """
     Get all members of a specific team.
     
     Args:
-        team: Team object (validated to exist by dependency)
+        team_id: ID of the team
+        request: Incoming request, may carry If-None-Match
+        session: Database session
     
     Returns:
         TeamMembers: Team information with list of member names
@@ -95,25 +118,33 @@ def list_team_users(
     Use Cases:
         - Display team roster
         - Show team composition for voting decisions
+    
+    Caching:
+        Served from the response cache with an ETag, 304 if unchanged
     """
-    members: list[Member] = team.members
-    if not members:
-        raise HTTPException(
-            status_code=404,
-            detail="Empty team",
-        )
-    members_list = [
-        MemberOutTeam(
-            name=member.name,
-        )
-        for member in members
-    ]
-    response = TeamMembers(
-        name=team.name,
-        avatar=team.avatar,
-        members=members_list,
+
+    def render() -> dict:
+        team = get_team_by_id(session, team_id)
+        stmt = select(Member.name).where(Member.team_id == team.id).order_by(Member.id)
+        names = session.execute(stmt).scalars().all()
+        if not names:
+            raise HTTPException(
+                status_code=404,
+                detail="Empty team",
+            )
+        return {
+            "name": team.name,
+            "avatar": team.avatar,
+            "members": [{"name": name} for name in names],
+        }
+
+    return response_cache.respond(
+        request,
+        (TEAMS, MEMBERS),
+        TEAM_MEMBERS,
+        render,
+        ttl=session.info.get("cache_ttl"),
     )
-    return response
 
 
 @router.post(
@@ -162,9 +193,11 @@ def create_team(
     )
     session.add(team_db)
     session.commit()
+    response_cache.invalidate(TEAMS)
     logger.info(
         "Created new team %s",
         team.name,
+        extra={"event": "team.created", "audit": True, "team_id": team_db.id},
     )
     return team
 
@@ -218,6 +251,8 @@ def update_team(
     ).items():
         setattr(team, field, value)
     session.commit()
+    response_cache.invalidate(TEAMS)
+    results_broadcaster.notify()
     return team
 
 
@@ -254,8 +289,25 @@ def delete_team(
     
     Side Effects:
         - Orphans team members (they become teamless)
-        - Removes all votes cast for this team
+        - Removes all votes cast for this team, the stored tally
+          is deleted together with the team row
         - May cause referential integrity issues if not handled properly
     """
-    session.delete(team)
+    # members are detached with two UPDATEs, no collection is loaded
+    session.execute(
+        update(Member)
+        .where(Member.team_id == team.id)
+        .values(team_id=None)
+        .execution_options(synchronize_session=False),
+    )
+    session.execute(
+        update(Member)
+        .where(Member.vote_id == team.id)
+        .values(vote_id=None)
+        .execution_options(synchronize_session=False),
+    )
+    session.execute(delete(Team).where(Team.id == team.id))
     session.commit()
+    member_cache.clear()
+    response_cache.invalidate(TEAMS, MEMBERS, VOTES)
+    results_broadcaster.notify()
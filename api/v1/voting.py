@@ -1,27 +1,146 @@
+import asyncio
+from contextlib import suppress
+
 from fastapi import (
     APIRouter,
     HTTPException,
     Depends,
+    Request,
     status,
+    WebSocket,
+    WebSocketDisconnect,
 )
 from typing import Annotated
 from api.dependencies import (
     get_member_by_cookie,
-    get_team_by_id,
     SessionGetter,
+    rate_limit,
+    ReadSessionGetter,
+    DatabaseGetter,
 )
-from core.db_models import Member, Team
-from sqlalchemy import select, func
+from pydantic import TypeAdapter
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from core.auth_cache import member_cache
+from core.db_models import Member
+from core.schemas import TeamVotes, VotingResults
+from core.live_results import results_broadcaster
+from core.response_cache import response_cache, TEAMS, MEMBERS, VOTES
+from core.tally import add_vote, remove_vote, mark_voted, get_tally, get_results
 
 router = APIRouter(
     prefix="/voting",
     tags=["Voting"],
 )
 
+# Encoder of the cached vote count
+TEAM_VOTES = TypeAdapter(list[TeamVotes])
+# Encoder of the cached standings
+VOTING_RESULTS = TypeAdapter(VotingResults)
+# Scopes the standings depend on, turnout counts the members
+RESULTS_SCOPES = (TEAMS, MEMBERS, VOTES)
+
+
+def vote_rejected(member: Member, team_id: int) -> HTTPException:
+    if member.team_id == team_id:
+        return HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="You cannot vote for your own team.",
+        )
+    return HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail="You have already voted",
+    )
+
+
+def cast_vote(
+    session: Session,
+    member: Member,
+    team_id: int,
+) -> None:
+    """
+    Record a member's vote for a team and commit it.
+
+    Args:
+        session: Database session (the sync side of an AsyncSession works too)
+        member: Voting member
+        team_id: Team receiving the vote
+
+    Raises:
+        HTTPException(400): If trying to vote for own team or already voted
+        HTTPException(404): If team doesn't exist
+
+    Note:
+        The rules are checked by the conditional UPDATE itself, so
+        concurrent votes of the same member cannot both succeed
+    """
+    if not add_vote(session, team_id):
+        session.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Team not found",
+        )
+    if not mark_voted(session, member.id, team_id):
+        session.rollback()
+        raise vote_rejected(member, team_id)
+    session.commit()
+
+
+def withdraw_vote(
+    session: Session,
+    member: Member,
+) -> None:
+    """
+    Remove a member's vote and commit it.
+
+    Args:
+        session: Database session (the sync side of an AsyncSession works too)
+        member: Member withdrawing the vote
+
+    Raises:
+        HTTPException(400): If member has not voted yet
+    """
+    # the vote must still be the one the tally is corrected for
+    stmt = (
+        update(Member)
+        .where(
+            Member.id == member.id,
+            Member.has_voted.is_(True),
+            Member.vote_id.is_not_distinct_from(member.vote_id),
+        )
+        .values(vote_id=None, has_voted=False)
+        .execution_options(synchronize_session=False)
+    )
+    if not member.has_voted or session.execute(stmt).rowcount != 1:
+        session.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="You have not voted",
+        )
+    if member.vote_id is not None:
+        remove_vote(session, member.vote_id)
+    session.commit()
+
+
+def vote_committed(member: Member) -> None:
+    """
+    Publish a committed vote change of `member` to the caches and live
+    subscribers.
+
+    Note:
+        Blocking with a shared state store, async routes go through
+        core.state.call_store
+    """
+    member_cache.invalidate(member.token)
+    response_cache.invalidate(VOTES)
+    results_broadcaster.notify()
+
 
 @router.post(
     "/{team_id}",
     status_code=status.HTTP_200_OK,
+    dependencies=[Depends(rate_limit("vote"))],
 )
 def vote_for_team(
     team_id: int,
@@ -29,10 +148,6 @@ def vote_for_team(
         Member,
         Depends(get_member_by_cookie),
     ],
-    team: Annotated[
-        Team,
-        Depends(get_team_by_id),
-    ],
     session: SessionGetter,
 ):
     """
@@ -41,7 +156,6 @@ def vote_for_team(
     Args:
         team_id: ID of the team to vote for
         member: Current member from cookie authentication
-        team: Target team (validated to exist)
         session: Database session
     
     Security:
@@ -59,21 +173,10 @@ def vote_for_team(
     Side Effects:
         - Creates voting relationship between member and team
         - Sets member's has_voted flag to True
+        - Increments the team's stored vote tally
     """
-    if member.team_id == team_id:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="You cannot vote for your own team.",
-        )
-    if member.has_voted:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="You have already voted",
-        )
-    team.voters.append(member)
-    member.has_voted = True
-    session.add_all([team, member])
-    session.commit()
+    cast_vote(session, member, team_id)
+    vote_committed(member)
 
 
 @router.post(
@@ -108,27 +211,23 @@ def rollback_vote(
         - Removes voting relationship
         - Sets member's has_voted flag to False
         - Allows member to vote for a different team
+        - Decrements the previous team's stored vote tally
     """
-    if not member.has_voted:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="You have not voted",
-        )
-    member.voted_for = None
-    member.has_voted = False
-    session.add(member)
-    session.commit()
+    withdraw_vote(session, member)
+    vote_committed(member)
 
 
 @router.get(
     "/count",
+    response_model=list[TeamVotes],
     status_code=status.HTTP_200_OK,
 )
-def get_teams_votes(session: SessionGetter):
+def get_teams_votes(request: Request, session: ReadSessionGetter):
     """
     Get voting statistics for all teams.
     
     Args:
+        request: Incoming request, may carry If-None-Match
         session: Database session
     
     Returns:
@@ -141,18 +240,92 @@ def get_teams_votes(session: SessionGetter):
     Note:
         Only shows teams that have received at least one vote
         Results are ordered by team name alphabetically
+        Reads the stored tally, no join over members is performed
+        Served from the response cache with an ETag, 304 if unchanged
     """
-    stmt = (
-        select(Team.name, func.count(Member.id).label("votes"))
-        .join(Team.voters)
-        .group_by(Team.name)
-        .order_by(Team.name)
+    return response_cache.respond(
+        request,
+        (TEAMS, VOTES),
+        TEAM_VOTES,
+        lambda: get_tally(session),
+        ttl=session.info.get("cache_ttl"),
     )
-    res = session.execute(stmt)
-    return [
-        {
-            "name": name,
-            "stats": {"votes": votes},
-        }
-        for name, votes in res
-    ]
+
+
+@router.get(
+    "/results",
+    response_model=VotingResults,
+    status_code=status.HTTP_200_OK,
+)
+def get_voting_results(request: Request, session: ReadSessionGetter):
+    """
+    Get the standings of every team and the turnout.
+
+    Args:
+        request: Incoming request, may carry If-None-Match
+        session: Database session
+
+    Returns:
+        dict: Ranked teams and totals in format:
+              {'teams': [{'id': 1, 'name': 'Team Name', 'avatar': None,
+                          'votes': 5, 'share': 62.5, 'rank': 1}],
+               'votes': 8, 'voted': 8, 'registered': 10, 'turnout': 80.0}
+
+    Public Endpoint:
+        No authentication required - voting results are public
+
+    Note:
+        Teams without votes are included, ordered by votes then name
+        Teams with as many votes share a rank
+        One query over the stored tally, served from the response cache
+        with an ETag, 304 if unchanged
+    """
+    return response_cache.respond(
+        request,
+        RESULTS_SCOPES,
+        VOTING_RESULTS,
+        lambda: get_results(session),
+        ttl=session.info.get("cache_ttl"),
+    )
+
+
+@router.websocket("/live")
+async def stream_teams_votes(
+    websocket: WebSocket,
+    database: DatabaseGetter,
+):
+    """
+    Push voting statistics to the client whenever they change.
+
+    Args:
+        websocket: Client connection
+        database: Database used to render the results
+
+    Messages:
+        Text frames with the same JSON as GET /voting/count, the
+        current results are sent right after the connection opens
+
+    Public Endpoint:
+        No authentication required - voting results are public
+
+    Note:
+        Results are rendered once per change (or coalescing window)
+        and shared between all subscribers instead of being polled
+    """
+    await websocket.accept()
+
+    async def forward() -> None:
+        async for payload in results_broadcaster.subscribe(database):
+            await websocket.send_text(payload)
+
+    sender = asyncio.create_task(forward())
+    try:
+        # incoming frames are ignored, the loop only waits for disconnect
+        while True:
+            await websocket.receive_text()
+    except WebSocketDisconnect:
+        pass
+    finally:
+        sender.cancel()
+        with suppress(asyncio.CancelledError, WebSocketDisconnect, RuntimeError):
+            await sender
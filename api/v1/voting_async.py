@@ -0,0 +1,135 @@
+from fastapi import (
+    APIRouter,
+    Depends,
+    Request,
+    status,
+)
+from typing import Annotated
+from api.dependencies import (
+    get_member_by_cookie_async,
+    AsyncSessionGetter,
+    rate_limit,
+    AsyncReadSessionGetter,
+)
+from core.db_models import Member
+from core.schemas import TeamVotes, VotingResults
+from core.response_cache import response_cache, TEAMS, VOTES
+from core.state import call_store
+from core.tally import get_tally, get_results
+from .voting import (
+    TEAM_VOTES,
+    VOTING_RESULTS,
+    RESULTS_SCOPES,
+    cast_vote,
+    withdraw_vote,
+    vote_committed,
+    stream_teams_votes,
+)
+
+# Async twin of api.v1.voting, mounted instead of it when
+# settings.db.async_mode is on. The business rules are shared through
+# AsyncSession.run_sync, so database I/O never occupies a worker thread.
+# Calls into a shared state store block, they go through call_store.
+router = APIRouter(
+    prefix="/voting",
+    tags=["Voting"],
+)
+
+
+@router.post(
+    "/{team_id}",
+    status_code=status.HTTP_200_OK,
+    dependencies=[Depends(rate_limit("vote"))],
+)
+async def vote_for_team(
+    team_id: int,
+    member: Annotated[
+        Member,
+        Depends(get_member_by_cookie_async),
+    ],
+    session: AsyncSessionGetter,
+):
+    """
+    Cast a vote for a specific team (async mode).
+
+    See api.v1.voting.vote_for_team for the business rules.
+    """
+    await session.run_sync(cast_vote, member, team_id)
+    await call_store(response_cache.store, vote_committed, member)
+
+
+@router.post(
+    "/rollback/",
+    status_code=status.HTTP_204_NO_CONTENT,
+)
+async def rollback_vote(
+    member: Annotated[
+        Member,
+        Depends(get_member_by_cookie_async),
+    ],
+    session: AsyncSessionGetter,
+):
+    """
+    Remove member's current vote (async mode).
+
+    See api.v1.voting.rollback_vote for the business rules.
+    """
+    await session.run_sync(withdraw_vote, member)
+    await call_store(response_cache.store, vote_committed, member)
+
+
+@router.get(
+    "/count",
+    response_model=list[TeamVotes],
+    status_code=status.HTTP_200_OK,
+)
+async def get_teams_votes(request: Request, session: AsyncReadSessionGetter):
+    """
+    Get voting statistics for all teams (async mode).
+
+    See api.v1.voting.get_teams_votes for the response format.
+
+    Note:
+        A fresh cached response is served without touching the database
+    """
+    scopes = (TEAMS, VOTES)
+    versions = await call_store(response_cache.store, response_cache.versions, scopes)
+    return await session.run_sync(
+        lambda sync_session: response_cache.respond(
+            request,
+            scopes,
+            TEAM_VOTES,
+            lambda: get_tally(sync_session),
+            ttl=sync_session.info.get("cache_ttl"),
+            versions=versions,
+        ),
+    )
+
+
+@router.get(
+    "/results",
+    response_model=VotingResults,
+    status_code=status.HTTP_200_OK,
+)
+async def get_voting_results(request: Request, session: AsyncReadSessionGetter):
+    """
+    Get the standings of every team and the turnout (async mode).
+
+    See api.v1.voting.get_voting_results for the response format.
+    """
+    versions = await call_store(
+        response_cache.store, response_cache.versions, RESULTS_SCOPES
+    )
+    return await session.run_sync(
+        lambda sync_session: response_cache.respond(
+            request,
+            RESULTS_SCOPES,
+            VOTING_RESULTS,
+            lambda: get_results(sync_session),
+            ttl=sync_session.info.get("cache_ttl"),
+            versions=versions,
+        ),
+    )
+
+
+router.add_api_websocket_route("/live", stream_teams_votes)
@@ -0,0 +1,100 @@
+from fastapi import (
+    APIRouter,
+    Depends,
+    HTTPException,
+    status,
+)
+from typing import Annotated
+from starlette.concurrency import run_in_threadpool
+from api.dependencies import (
+    get_member_by_cookie,
+    SessionGetter,
+    DatabaseGetter,
+    rate_limit,
+)
+from core.db_models import Member
+from core.schemas import TeamVotes, VotingResults
+from core.vote_queue import vote_queue
+from .voting import (
+    vote_rejected,
+    rollback_vote,
+    get_teams_votes,
+    get_voting_results,
+    stream_teams_votes,
+)
+
+# Twin of api.v1.voting mounted when settings.vote_queue.enabled is on.
+# Votes are written by core.vote_queue in batched transactions, the other
+# voting routes are shared with api.v1.voting.
+router = APIRouter(
+    prefix="/voting",
+    tags=["Voting"],
+)
+
+
+@router.post(
+    "/{team_id}",
+    status_code=status.HTTP_200_OK,
+    dependencies=[Depends(rate_limit("vote"))],
+)
+async def vote_for_team(
+    team_id: int,
+    member: Annotated[
+        Member,
+        Depends(get_member_by_cookie),
+    ],
+    session: SessionGetter,
+    database: DatabaseGetter,
+):
+    """
+    Cast a vote for a specific team (vote queue mode).
+
+    See api.v1.voting.vote_for_team for the business rules.
+
+    Note:
+        The member loaded from the cookie rejects known repeated votes
+        before they are queued, the response is sent after the batch
+        holding the vote is committed
+        The session of the cookie lookup is closed before queueing,
+        its connection would otherwise be held while the flusher waits
+        for one from the same pool
+    """
+    await run_in_threadpool(session.close)
+    if member.has_voted or member.team_id == team_id:
+        raise vote_rejected(member, team_id)
+    outcome = await vote_queue.submit(
+        database,
+        member_id=member.id,
+        token=member.token,
+        team_id=team_id,
+    )
+    if outcome == "team_not_found":
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Team not found",
+        )
+    if outcome == "rejected":
+        raise vote_rejected(member, team_id)
+
+
+router.add_api_route(
+    "/rollback/",
+    rollback_vote,
+    methods=["POST"],
+    status_code=status.HTTP_204_NO_CONTENT,
+)
+router.add_api_route(
+    "/count",
+    get_teams_votes,
+    methods=["GET"],
+    response_model=list[TeamVotes],
+    status_code=status.HTTP_200_OK,
+)
+router.add_api_route(
+    "/results",
+    get_voting_results,
+    methods=["GET"],
+    response_model=VotingResults,
+    status_code=status.HTTP_200_OK,
+)
+router.add_api_websocket_route("/live", stream_teams_votes)
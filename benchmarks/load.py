@@ -0,0 +1,466 @@
+"""
+Load test of the voting API with throughput and latency per endpoint.
+
+Every scenario gets a freshly seeded SQLite file with the production
+profile, then a request mix is driven with --concurrency clients against
+main.app, either in-process through httpx.ASGITransport or through a
+uvicorn server on localhost. Results are written as JSON so runs of two
+commits can be compared.
+
+Scenarios:
+    register  registration burst, new members post /v1/register/{token}
+    vote      voting burst, every seeded member votes once
+    results   results polling, GET /v1/voting/count
+    admin     admin listing, GET /v1/admin/members pages
+    mixed     voting burst with results polling alongside
+
+Usage:
+    python -m benchmarks.load --teams 20 --members 2000 --concurrency 50
+    python -m benchmarks.load --mode uvicorn --scenarios vote results
+    python -m benchmarks.load --compare benchmarks/results/old.json benchmarks/results/new.json
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter, defaultdict
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import AsyncIterator
+
+import httpx
+from sqlalchemy import insert
+
+from api.v1.member import store_tokens
+from core.config import SQLiteProfile, settings
+from core.db_models import Member, Team
+from core.get_db import DatabaseHelper
+from data import hash_token
+
+SCENARIOS = ("register", "vote", "results", "admin", "mixed")
+RESULTS_DIR = Path(__file__).parent / "results"
+
+
+@dataclass
+class Call:
+    # endpoint label, the route template
+    label: str
+    method: str
+    url: str
+    headers: dict = field(default_factory=dict)
+    json: dict | None = None
+
+
+@dataclass
+class Seed:
+    url: str
+    teams: int
+    members: list[str]
+    registration_tokens: list[str]
+
+
+def seed(path: Path, teams: int, members: int, prefix: str) -> Seed:
+    """
+    Create a database with `teams` teams, `members` members who have not
+    voted and `members` unused registration tokens.
+    """
+    profile = SQLiteProfile()
+    url = f"sqlite:///{path}"
+    database = DatabaseHelper(url=url, sqlite_pragmas=profile.pragmas())
+    database.create_database()
+    tokens = [f"{prefix}-{i}" for i in range(members)]
+    with database.session_factory() as session:
+        session.execute(
+            insert(Team),
+            [
+                {"name": f"team{i}", "avatar": f"https://example.com/{i}.png"}
+                for i in range(teams)
+            ],
+        )
+        session.execute(
+            insert(Member),
+            [
+                {
+                    "name": f"member{i}",
+                    "username": f"{prefix}_{i}",
+                    "token": hash_token(token),
+                    "has_voted": False,
+                    "has_joined_team": False,
+                }
+                for i, token in enumerate(tokens)
+            ],
+        )
+        session.commit()
+        registration_tokens = store_tokens(session, count=members)
+    database.dispose()
+    return Seed(url, teams, tokens, registration_tokens)
+
+
+def member_headers(token: str) -> dict:
+    return {"cookie": f"users-token={token}"}
+
+
+def vote_calls(data: Seed, rng: random.Random) -> list[Call]:
+    return [
+        Call(
+            "POST /v1/voting/{team_id}",
+            "POST",
+            f"/v1/voting/{rng.randint(1, data.teams)}",
+            headers=member_headers(token),
+        )
+        for token in data.members
+    ]
+
+
+def results_calls(count: int) -> list[Call]:
+    return [
+        Call("GET /v1/voting/count", "GET", "/v1/voting/count") for _ in range(count)
+    ]
+
+
+def build_calls(scenario: str, data: Seed, args: argparse.Namespace) -> list[Call]:
+    rng = random.Random(args.seed)
+    if scenario == "register":
+        return [
+            Call(
+                "POST /v1/register/{token}",
+                "POST",
+                f"/v1/register/{token}",
+                json={"name": f"new{i}", "username": f"new_{i}"},
+            )
+            for i, token in enumerate(data.registration_tokens)
+        ]
+    if scenario == "vote":
+        return vote_calls(data, rng)
+    if scenario == "results":
+        return results_calls(len(data.members))
+    if scenario == "admin":
+        page_size = 100
+        pages = max(1, len(data.members) // page_size)
+        return [
+            Call(
+                "GET /v1/admin/members",
+                "GET",
+                f"/v1/admin/members?limit={page_size}&after_id={page * page_size}",
+                headers={"x-api-key": settings.admin.apikey},
+            )
+            for _ in range(args.admin_rounds)
+            for page in range(pages)
+        ]
+    if scenario == "mixed":
+        calls = vote_calls(data, rng) + results_calls(
+            len(data.members) * args.reads_per_vote
+        )
+        rng.shuffle(calls)
+        return calls
+    raise ValueError(f"Unknown scenario {scenario}")
+
+
+async def drive(
+    client: httpx.AsyncClient,
+    calls: list[Call],
+    concurrency: int,
+) -> tuple[dict[str, list[float]], dict[str, Counter], float]:
+    """
+    Send `calls` from `concurrency` clients, each one waiting for its
+    response before sending the next call.
+
+    Returns:
+        tuple: latencies and status codes per endpoint, elapsed seconds
+    """
+    latencies: dict[str, list[float]] = defaultdict(list)
+    statuses: dict[str, Counter] = defaultdict(Counter)
+    pending = iter(calls)
+
+    async def worker() -> None:
+        for call in pending:
+            started = time.perf_counter()
+            try:
+                response = await client.request(
+                    call.method,
+                    call.url,
+                    headers=call.headers,
+                    json=call.json,
+                )
+                status_code = response.status_code
+            except httpx.HTTPError:
+                status_code = 0
+            latencies[call.label].append(time.perf_counter() - started)
+            statuses[call.label][status_code] += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, statuses, time.perf_counter() - started
+
+
+def percentiles(samples: list[float]) -> dict[str, float]:
+    if len(samples) == 1:
+        cuts = samples * 99
+    else:
+        cuts = statistics.quantiles(samples, n=100, method="inclusive")
+    return {f"p{p}_ms": round(cuts[p - 1] * 1000, 2) for p in (50, 95, 99)}
+
+
+def summarize(
+    latencies: dict[str, list[float]],
+    statuses: dict[str, Counter],
+    elapsed: float,
+) -> dict:
+    endpoints = {}
+    for label, samples in sorted(latencies.items()):
+        endpoints[label] = {
+            "requests": len(samples),
+            # 0 is a connection error
+            "errors": sum(
+                count
+                for status_code, count in statuses[label].items()
+                if not 200 <= status_code < 400
+            ),
+            "statuses": {
+                str(code): count for code, count in sorted(statuses[label].items())
+            },
+            "rps": round(len(samples) / elapsed, 1),
+            **percentiles(samples),
+        }
+    requests = sum(len(samples) for samples in latencies.values())
+    return {
+        "seconds": round(elapsed, 3),
+        "requests": requests,
+        "rps": round(requests / elapsed, 1),
+        "endpoints": endpoints,
+    }
+
+
+@asynccontextmanager
+async def in_process_client(
+    data: Seed, concurrency: int
+) -> AsyncIterator[httpx.AsyncClient]:
+    from api.dependencies import get_database
+    from core.get_db import create_read_replica, get_db
+    from core.response_cache import response_cache, MEMBERS, TEAMS, VOTES
+    from main import app
+
+    profile = SQLiteProfile()
+    database = DatabaseHelper(
+        url=data.url,
+        pool_size=profile.pool_size,
+        max_overflow=profile.max_overflow,
+        sqlite_pragmas=profile.pragmas(),
+        # CONFIG__DB__READ_REPLICA__ENABLED, as in uvicorn mode
+        read_replica=create_read_replica(
+            settings.db.model_copy(update={"url": data.url})
+        ),
+    )
+    app.dependency_overrides[get_db.session_getter] = database.session_getter
+    app.dependency_overrides[get_db.read_session_getter] = database.read_session_getter
+    app.dependency_overrides[get_database] = lambda: database
+    # cached responses of the previous scenario's database
+    response_cache.invalidate(TEAMS, MEMBERS, VOTES)
+    transport = httpx.ASGITransport(app=app)
+    try:
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://load"
+        ) as client:
+            yield client
+    finally:
+        app.dependency_overrides.clear()
+        database.dispose()
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@asynccontextmanager
+async def uvicorn_client(
+    data: Seed, concurrency: int
+) -> AsyncIterator[httpx.AsyncClient]:
+    port = free_port()
+    env = {
+        **os.environ,
+        "CONFIG__DB__URL": data.url,
+        "CONFIG__DB__ECHO": "false",
+        "CONFIG__RUNTIME__PORT": str(port),
+    }
+    with tempfile.TemporaryFile() as log:
+        server = subprocess.Popen(
+            [
+                sys.executable,
+                "-m",
+                "uvicorn",
+                "main:app",
+                "--host",
+                "127.0.0.1",
+                "--port",
+                str(port),
+                "--log-level",
+                "warning",
+                "--no-access-log",
+            ],
+            env=env,
+            stdout=log,
+            stderr=log,
+        )
+        base_url = f"http://127.0.0.1:{port}"
+        limits = httpx.Limits(
+            max_connections=concurrency, max_keepalive_connections=concurrency
+        )
+        try:
+            async with httpx.AsyncClient(
+                base_url=base_url, limits=limits, timeout=30
+            ) as client:
+                for _ in range(100):
+                    try:
+                        await client.get("/v1/voting/count")
+                        break
+                    except httpx.TransportError:
+                        if server.poll() is not None:
+                            break
+                        await asyncio.sleep(0.1)
+                else:
+                    raise RuntimeError("uvicorn did not start")
+                if server.poll() is not None:
+                    log.seek(0)
+                    raise RuntimeError(f"uvicorn exited:\n{log.read().decode()}")
+                yield client
+        finally:
+            server.terminate()
+            server.wait(timeout=10)
+
+
+async def run_scenario(
+    scenario: str, directory: Path, args: argparse.Namespace
+) -> dict:
+    data = seed(
+        directory / f"{scenario}.sqlite3",
+        teams=args.teams,
+        members=args.members,
+        prefix=f"load-{scenario}",
+    )
+    calls = build_calls(scenario, data, args)
+    client_factory = in_process_client if args.mode == "in-process" else uvicorn_client
+    async with client_factory(data, args.concurrency) as client:
+        latencies, statuses, elapsed = await drive(client, calls, args.concurrency)
+    return summarize(latencies, statuses, elapsed)
+
+
+def git_commit() -> dict:
+    def git(*command: str) -> str:
+        return subprocess.run(
+            ["git", *command],
+            capture_output=True,
+            text=True,
+            cwd=Path(__file__).parent,
+        ).stdout.strip()
+
+    return {
+        "commit": git("rev-parse", "--short", "HEAD"),
+        "dirty": bool(git("status", "--porcelain", "--untracked-files=no")),
+    }
+
+
+def compare(base_path: Path, new_path: Path) -> None:
+    base = json.loads(base_path.read_text())
+    new = json.loads(new_path.read_text())
+    print(f"{base['commit']} -> {new['commit']}")
+    for scenario, result in new["scenarios"].items():
+        if scenario not in base["scenarios"]:
+            continue
+        for label, stats in result["endpoints"].items():
+            before = base["scenarios"][scenario]["endpoints"].get(label)
+            if before is None:
+                continue
+            changes = ", ".join(
+                f"{key} {before[key]} -> {stats[key]} ({(stats[key] - before[key]) / before[key]:+.0%})"
+                for key in ("rps", "p50_ms", "p95_ms", "p99_ms")
+                if before[key]
+            )
+            print(f"{scenario:8} {label:28} {changes}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--mode", choices=("in-process", "uvicorn"), default="in-process"
+    )
+    parser.add_argument(
+        "--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS)
+    )
+    parser.add_argument("--teams", type=int, default=20)
+    parser.add_argument("--members", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--reads-per-vote", type=int, default=3)
+    parser.add_argument("--admin-rounds", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path, default=RESULTS_DIR)
+    parser.add_argument("--compare", nargs=2, type=Path, metavar=("BASE", "NEW"))
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+    logging.disable(logging.WARNING)
+
+    scenarios = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for scenario in args.scenarios:
+            result = asyncio.run(run_scenario(scenario, Path(directory), args))
+            scenarios[scenario] = result
+            print(scenario, {"rps": result["rps"], "seconds": result["seconds"]})
+            for label, stats in result["endpoints"].items():
+                print(
+                    f"  {label:28}",
+                    {
+                        key: stats[key]
+                        for key in (
+                            "requests",
+                            "errors",
+                            "rps",
+                            "p50_ms",
+                            "p95_ms",
+                            "p99_ms",
+                        )
+                    },
+                )
+
+    created = datetime.now(timezone.utc)
+    report = {
+        **git_commit(),
+        "created": created.isoformat(timespec="seconds"),
+        "mode": args.mode,
+        "python": platform.python_version(),
+        "params": {
+            key: getattr(args, key)
+            for key in (
+                "teams",
+                "members",
+                "concurrency",
+                "reads_per_vote",
+                "admin_rounds",
+                "seed",
+            )
+        },
+        "scenarios": scenarios,
+    }
+    args.output.mkdir(parents=True, exist_ok=True)
+    path = args.output / f"{created:%Y%m%dT%H%M%S}-{report['commit']}-{args.mode}.json"
+    path.write_text(json.dumps(report, indent=2))
+    print("results written to", path)
+
+
+if __name__ == "__main__":
+    main()
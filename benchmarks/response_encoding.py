@@ -0,0 +1,88 @@
+"""
+Cost of encoding the /teams response: FastAPI's response_model path
+against TypeAdapter.dump_json and a hit of core.response_cache.
+
+The response_model path is what FastAPI runs for a route returning ORM
+objects with response_model=list[TeamOut]: validation of the content,
+jsonable_encoder, then json.dumps in JSONResponse.
+
+Usage:
+    python -m benchmarks.response_encoding --teams 50 --number 2000
+"""
+
+import argparse
+import timeit
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+from starlette.requests import Request
+
+from api.v1.team import TEAM_LIST
+from core.db_models import Team
+from core.response_cache import ResponseCache, TEAMS
+from core.schemas import TeamOut
+from core.state import InMemoryStore
+
+
+def make_teams(count: int) -> list[Team]:
+    return [
+        Team(id=i, name=f"team{i}", avatar=f"https://example.com/team{i}.png")
+        for i in range(count)
+    ]
+
+
+def run_coroutine(coroutine):
+    # serialize_response does not await anything with is_coroutine=True
+    try:
+        coroutine.send(None)
+    except StopIteration as stop:
+        return stop.value
+    raise RuntimeError("coroutine suspended")
+
+
+def make_request() -> Request:
+    return Request(
+        {
+            "type": "http",
+            "method": "GET",
+            "path": "/v1/teams",
+            "query_string": b"",
+            "headers": [],
+        },
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--teams", type=int, default=50)
+    parser.add_argument("--number", type=int, default=2000)
+    args = parser.parse_args()
+
+    teams = make_teams(args.teams)
+    field = create_model_field("Response", list[TeamOut], mode="serialization")
+    cache = ResponseCache(store=InMemoryStore())
+    request = make_request()
+
+    def response_model() -> bytes:
+        content = run_coroutine(serialize_response(field=field, response_content=teams))
+        return JSONResponse(content).body
+
+    def type_adapter() -> bytes:
+        return ResponseCache.encode(TEAM_LIST, teams)
+
+    def cached() -> bytes:
+        return cache.respond(request, (TEAMS,), TEAM_LIST, lambda: teams).body
+
+    assert response_model() == type_adapter() == cached()
+    for name, run in (
+        ("response_model", response_model),
+        ("type_adapter", type_adapter),
+        ("cached", cached),
+    ):
+        seconds = min(timeit.repeat(run, number=args.number, repeat=3))
+        print(name, {"us/call": round(seconds / args.number * 1e6, 1)})
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""
+Latency of the member queries before and after migration 2 (indexes on
+members.team_id and vote_id, tokens stored as 32-byte digests).
+
+Both databases hold the same members. The "before" one has no index on
+the foreign keys and keeps the 64-char hex tokens, the "after" one is the
+current schema and its auth lookups include hashing the cookie.
+
+Usage:
+    python -m benchmarks.schema_indexes --members 100000 --number 200
+"""
+
+import argparse
+import logging
+import random
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable
+
+from sqlalchemy import String, func, insert, select, text, type_coerce, update
+from sqlalchemy.orm import Session
+
+from core.config import SQLiteProfile
+from core.db_models import Member, Team
+from core.get_db import DatabaseHelper
+from data import generate_token, hash_token
+
+TEAMS = 50
+
+
+def seed(path: Path, members: int, tokens: list[str], legacy: bool) -> DatabaseHelper:
+    database = DatabaseHelper(
+        url=f"sqlite:///{path}",
+        sqlite_pragmas=SQLiteProfile().pragmas(),
+    )
+    database.create_database()
+    rng = random.Random(0)
+    with database.session_factory() as session:
+        if legacy:
+            session.execute(text("DROP INDEX ix_members_team_id"))
+            session.execute(text("DROP INDEX ix_members_vote_id"))
+        session.execute(insert(Team), [{"name": f"team{i}"} for i in range(TEAMS)])
+        session.execute(
+            insert(Member),
+            [
+                {
+                    "name": f"member{i}",
+                    "username": f"member{i}",
+                    "token": token.encode() if legacy else hash_token(token),
+                    "has_voted": True,
+                    "has_joined_team": True,
+                    "team_id": rng.randint(1, TEAMS),
+                    "vote_id": rng.randint(1, TEAMS),
+                }
+                for i, token in enumerate(tokens)
+            ],
+        )
+        session.commit()
+        if legacy:
+            # the hex strings were bound as blobs, store them as text
+            session.execute(
+                text("UPDATE members SET token = CAST(token AS TEXT)"),
+            )
+            session.commit()
+        session.execute(text("ANALYZE"))
+    return database
+
+
+def queries(legacy: bool) -> dict[str, Callable[[Session, int, str], object]]:
+    def roster(session: Session, team_id: int, token: str):
+        stmt = select(Member.name).where(Member.team_id == team_id).order_by(Member.id)
+        return session.scalars(stmt).all()
+
+    def count(session: Session, team_id: int, token: str):
+        return session.scalar(
+            select(func.count(Member.id)).where(Member.vote_id == team_id)
+        )
+
+    def tally(session: Session, team_id: int, token: str):
+        # the read side of core.tally.reconcile_tally
+        votes = (
+            select(func.count(Member.id))
+            .where(Member.vote_id == Team.id)
+            .scalar_subquery()
+        )
+        return session.execute(select(Team.id, votes)).all()
+
+    def detach(session: Session, team_id: int, token: str):
+        # the member UPDATEs of a team delete, rolled back
+        for column in (Member.team_id, Member.vote_id):
+            session.execute(
+                update(Member)
+                .where(column == team_id)
+                .values({column.key: None})
+                .execution_options(synchronize_session=False),
+            )
+        session.rollback()
+
+    def auth(session: Session, team_id: int, token: str):
+        key = type_coerce(token, String) if legacy else hash_token(token)
+        # hex tokens cannot be loaded through LargeBinary, select the id
+        return session.scalars(select(Member.id).where(Member.token == key)).one()
+
+    return {
+        "roster": roster,
+        "count": count,
+        "tally": tally,
+        "detach": detach,
+        "auth": auth,
+    }
+
+
+def run(database: DatabaseHelper, tokens: list[str], number: int, legacy: bool) -> dict:
+    rng = random.Random(1)
+    result = {}
+    with database.session_factory() as session:
+        for name, query in queries(legacy).items():
+            params = [
+                (rng.randint(1, TEAMS), rng.choice(tokens)) for _ in range(number)
+            ]
+            started = time.perf_counter()
+            for team_id, token in params:
+                query(session, team_id, token)
+            result[name] = round((time.perf_counter() - started) / number * 1e6, 1)
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--members", type=int, default=100_000)
+    parser.add_argument("--number", type=int, default=200)
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    tokens = [generate_token() for _ in range(args.members)]
+    print(f"{args.members} members, {TEAMS} teams, mean µs per query")
+    with tempfile.TemporaryDirectory() as directory:
+        for name, legacy in (("before", True), ("after", False)):
+            path = Path(directory) / f"{name}.sqlite3"
+            database = seed(path, args.members, tokens, legacy)
+            result = run(database, tokens, args.number, legacy)
+            database.dispose()
+            result["file MB"] = round(path.stat().st_size / 2**20, 1)
+            print(name, result)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+Concurrent vote throughput of a SQLite file with and without the
+production profile (settings.db.sqlite).
+
+Every member casts one vote through api.v1.voting.cast_vote from a
+thread pool sized like the AnyIO threadpool, while a share of the
+workers reads the tally, as the results page does.
+
+Usage:
+    python -m benchmarks.sqlite_profile --members 2000 --threads 40
+"""
+
+import argparse
+import logging
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from fastapi import HTTPException
+from sqlalchemy import insert
+from sqlalchemy.exc import OperationalError, TimeoutError
+
+from api.v1.voting import cast_vote
+from core.config import DatabaseConfig, SQLiteProfile
+from core.db_models import Member, Team
+from core.get_db import DatabaseHelper
+from core.tally import get_tally
+from data import hash_token
+
+TEAMS = 8
+
+
+def seed(database: DatabaseHelper, members: int) -> None:
+    database.create_database()
+    with database.session_factory() as session:
+        session.execute(insert(Team), [{"name": f"team{i}"} for i in range(TEAMS)])
+        session.execute(
+            insert(Member),
+            [
+                {
+                    "name": "voter",
+                    "username": f"voter{i}",
+                    "token": hash_token(f"token{i}"),
+                    "has_voted": False,
+                    "has_joined_team": False,
+                }
+                for i in range(members)
+            ],
+        )
+        session.commit()
+
+
+def vote(database: DatabaseHelper, member_id: int) -> None:
+    with database.session_factory() as session:
+        member = session.get(Member, member_id)
+        cast_vote(session, member, member_id % TEAMS + 1)
+
+
+def read_tally(database: DatabaseHelper) -> None:
+    with database.session_factory() as session:
+        get_tally(session)
+
+
+def run(
+    path: Path,
+    members: int,
+    threads: int,
+    reads_per_vote: int,
+    pool_size: int,
+    max_overflow: int,
+    pragmas: dict | None,
+) -> dict:
+    database = DatabaseHelper(
+        url=f"sqlite:///{path}",
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        sqlite_pragmas=pragmas,
+    )
+    seed(database, members)
+    errors = 0
+
+    def task(member_id: int) -> None:
+        nonlocal errors
+        try:
+            vote(database, member_id)
+            for _ in range(reads_per_vote):
+                read_tally(database)
+        # locked database, pool exhausted or a vote that was not recorded
+        except (OperationalError, TimeoutError, HTTPException):
+            errors += 1
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        list(executor.map(task, range(1, members + 1)))
+    elapsed = time.perf_counter() - started
+    database.dispose()
+    return {
+        "votes/s": round(members / elapsed),
+        "seconds": round(elapsed, 2),
+        "errors": errors,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--members", type=int, default=2000)
+    parser.add_argument("--threads", type=int, default=40)
+    parser.add_argument("--reads-per-vote", type=int, default=1)
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    default = DatabaseConfig(url="sqlite://")
+    profile = SQLiteProfile()
+    with tempfile.TemporaryDirectory() as directory:
+        for name, pool_size, max_overflow, pragmas in (
+            ("default", default.pool_size, default.max_overflow, None),
+            ("profile", profile.pool_size, profile.max_overflow, profile.pragmas()),
+        ):
+            result = run(
+                Path(directory) / f"{name}.sqlite3",
+                members=args.members,
+                threads=args.threads,
+                reads_per_vote=args.reads_per_vote,
+                pool_size=pool_size,
+                max_overflow=max_overflow,
+                pragmas=pragmas,
+            )
+            print(name, result)
+
+
+if __name__ == "__main__":
+    main()
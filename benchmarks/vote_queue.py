@@ -0,0 +1,117 @@
+"""
+Vote throughput with one commit per vote against the write-behind
+vote queue (settings.vote_queue), on a SQLite file with the production
+profile.
+
+Every member casts one vote: directly through api.v1.voting.cast_vote
+from a thread pool sized like the AnyIO threadpool, then through
+core.vote_queue with all votes in flight at once, as when voting opens.
+
+Usage:
+    python -m benchmarks.vote_queue --members 5000
+"""
+
+import argparse
+import asyncio
+import logging
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from benchmarks.sqlite_profile import TEAMS, seed, vote
+from core.config import SQLiteProfile, VoteQueueConfig
+from core.get_db import DatabaseHelper
+from core.vote_queue import VoteQueue
+from data import hash_token
+
+
+def create_database(path: Path, members: int, pragmas: dict) -> DatabaseHelper:
+    profile = SQLiteProfile()
+    database = DatabaseHelper(
+        url=f"sqlite:///{path}",
+        pool_size=profile.pool_size,
+        max_overflow=profile.max_overflow,
+        sqlite_pragmas=pragmas,
+    )
+    seed(database, members)
+    return database
+
+
+def run_direct(database: DatabaseHelper, members: int, threads: int) -> float:
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        list(
+            executor.map(
+                lambda member_id: vote(database, member_id), range(1, members + 1)
+            )
+        )
+    return time.perf_counter() - started
+
+
+def run_queue(database: DatabaseHelper, members: int) -> float:
+    config = VoteQueueConfig()
+    queue = VoteQueue(
+        flush_interval=config.flush_interval,
+        max_batch=config.max_batch,
+    )
+
+    async def vote_all() -> list[str]:
+        outcomes = await asyncio.gather(
+            *(
+                queue.submit(
+                    database,
+                    member_id,
+                    hash_token(f"token{member_id - 1}"),
+                    member_id % TEAMS + 1,
+                )
+                for member_id in range(1, members + 1)
+            ),
+        )
+        await queue.close()
+        return outcomes
+
+    started = time.perf_counter()
+    outcomes = asyncio.run(vote_all())
+    elapsed = time.perf_counter() - started
+    assert outcomes.count("accepted") == members
+    return elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--members", type=int, default=5000)
+    parser.add_argument("--threads", type=int, default=40)
+    parser.add_argument(
+        "--synchronous",
+        default=SQLiteProfile().synchronous,
+        help="FULL makes every commit an fsync, as with a rollback journal",
+    )
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+    pragmas = SQLiteProfile(synchronous=args.synchronous).pragmas()
+
+    with tempfile.TemporaryDirectory() as directory:
+        database = create_database(
+            Path(directory) / "direct.sqlite3", args.members, pragmas
+        )
+        elapsed = run_direct(database, args.members, args.threads)
+        database.dispose()
+        print(
+            "direct",
+            {"votes/s": round(args.members / elapsed), "seconds": round(elapsed, 2)},
+        )
+
+        database = create_database(
+            Path(directory) / "queue.sqlite3", args.members, pragmas
+        )
+        elapsed = run_queue(database, args.members)
+        database.dispose()
+        print(
+            "queue",
+            {"votes/s": round(args.members / elapsed), "seconds": round(elapsed, 2)},
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+import threading
+import time
+from collections import OrderedDict
+
+from sqlalchemy.orm import make_transient_to_detached
+
+from core.config import settings
+from core.db_models import Member
+from core.state import StateStore, state_store
+
+EPOCH_KEY = "member-cache:epoch"
+
+
+class MemberCache:
+    """
+    Bounded LRU/TTL cache of members keyed by their stored (hashed) token.
+
+    Stores the column values of a member, so an authenticated request can
+    attach the member to its session without querying members.token.
+
+    Every entry remembers the version stamps that were current in the
+    state store before the member was loaded. Invalidations replace the
+    stamps, so entries cached by any worker stop matching as soon as the
+    change is committed.
+    """
+
+    def __init__(
+        self,
+        store: StateStore,
+        maxsize: int = 10_000,
+        ttl: float = 60.0,
+        enabled: bool = True,
+    ) -> None:
+        self.store = store
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[bytes, tuple[float, tuple, dict]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(token: bytes) -> str:
+        return f"member-cache:token:{token.hex()}"
+
+    def get(self, token: bytes) -> tuple[Member | None, tuple]:
+        """
+        Look a token up.
+
+        Returns:
+            tuple: Detached member built from the cache (None on a miss)
+                and the version stamps to hand over to `put` after a miss
+
+        Note:
+            Attach the member with session.merge(member, load=False)
+        """
+        if not self.enabled:
+            return None, ()
+        versions = tuple(self.store.get_many([EPOCH_KEY, self._key(token)]))
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None or entry[0] < time.monotonic() or entry[1] != versions:
+                self._entries.pop(token, None)
+                self.misses += 1
+                return None, versions
+            self._entries.move_to_end(token)
+            self.hits += 1
+            values = entry[2]
+        member = Member(**values)
+        make_transient_to_detached(member)
+        return member, versions
+
+    def put(
+        self,
+        member: Member,
+        versions: tuple,
+    ) -> None:
+        """
+        Cache a member loaded from the database.
+
+        Args:
+            member: Member as loaded by the lookup
+            versions: Version stamps returned by `get` before the lookup
+        """
+        if not self.enabled:
+            return
+        values = {
+            attr.key: getattr(member, attr.key)
+            for attr in Member.__mapper__.column_attrs
+        }
+        with self._lock:
+            self._entries[member.token] = (
+                time.monotonic() + self.ttl,
+                versions,
+                values,
+            )
+            self._entries.move_to_end(member.token)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, token: bytes) -> None:
+        """
+        Drop the member authenticated by `token` in every worker.
+
+        Note:
+            Call after commit, with the token the member had before the change
+        """
+        # the stamp must outlive any entry cached before it was replaced
+        self.store.touch(self._key(token), ttl=self.ttl)
+        with self._lock:
+            self._entries.pop(token, None)
+
+    def clear(self) -> None:
+        self.store.touch(EPOCH_KEY)
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+member_cache = MemberCache(
+    store=state_store,
+    maxsize=settings.auth_cache.maxsize,
+    ttl=settings.auth_cache.ttl,
+    enabled=settings.auth_cache.enabled,
+)
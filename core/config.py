@@ -1,3 +1,5 @@
+from typing import Literal
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from pydantic import BaseModel
 
@@ -6,6 +8,16 @@ class RunSettings(BaseModel):
     host: str = "0.0.0.0"
     port: int = 8000
     reload: bool = True
+    # more than one worker requires a shared state backend
+    workers: int = 1
+    # threads of the sync routes, by default one per pooled connection so
+    # requests queue for a thread instead of holding one while waiting
+    # for a connection
+    threadpool_size: int | None = None
+    # addresses (or CIDR ranges) of the reverse proxies whose
+    # X-Forwarded-For is trusted, comma separated, the client address of a
+    # proxied request is the proxy's unless it is listed here
+    forwarded_allow_ips: str = "127.0.0.1"
 
 
 class AdminKey(BaseSettings):
@@ -21,12 +33,152 @@ class ApiPrefix(BaseModel):
     v1: ApiV1Prefix = ApiV1Prefix()
 
 
+class SQLiteProfile(BaseModel):
+    # applied to every new connection of a SQLite database
+    enabled: bool = True
+    journal_mode: str = "WAL"
+    synchronous: str = "NORMAL"
+    # milliseconds a writer waits for the lock before "database is locked"
+    busy_timeout: int = 5000
+    mmap_size: int = 256 * 1024 * 1024
+    # negative values are KiB
+    cache_size: int = -64 * 1024
+    # writers serialize on the file lock anyway, a small pool makes them
+    # queue for a connection instead of sleeping in the busy handler
+    pool_size: int = 4
+    max_overflow: int = 0
+
+    def pragmas(self) -> dict[str, str | int]:
+        return {
+            "journal_mode": self.journal_mode,
+            "synchronous": self.synchronous,
+            "busy_timeout": self.busy_timeout,
+            "mmap_size": self.mmap_size,
+            "cache_size": self.cache_size,
+        }
+
+
+class QueryDebugConfig(BaseModel):
+    # count the statements of every request session, for tests and staging
+    enabled: bool = False
+    max_queries: int = 20
+    # more identical statements in one session are flagged as a probable N+1
+    max_repeats: int = 3
+
+
+class ReadReplicaConfig(BaseModel):
+    # serve the public GET routes (teams, rosters, vote counts) from a
+    # second engine with its own pool
+    enabled: bool = False
+    # replica to read from, by default a second engine on CONFIG__DB__URL,
+    # read-only (PRAGMA query_only) for a SQLite file
+    url: str | None = None
+    pool_size: int = 20
+    max_overflow: int = 10
+    # seconds a response rendered from the replica at `url` stays cached,
+    # bounds how long a lagging replica's state outlives a write
+    cache_ttl: float = 1.0
+
+
 class DatabaseConfig(BaseModel):
     url: str
-    echo: bool = True
+    echo: bool = False
     echo_pool: bool = False
     pool_size: int = 20
     max_overflow: int = 10
+    # seconds to wait for a connection before failing the request
+    pool_timeout: float = 30.0
+    # seconds after which a connection is replaced, keep it below the
+    # idle timeout of the server or proxy (-1 never)
+    pool_recycle: int = -1
+    # test connections on checkout, for servers dropping idle connections
+    pool_pre_ping: bool = False
+    # reuse the most recent connection, idle ones above the load expire
+    pool_use_lifo: bool = False
+    # serve the voting routes through AsyncSession instead of the threadpool
+    async_mode: bool = False
+    sqlite: SQLiteProfile = SQLiteProfile()
+    read_replica: ReadReplicaConfig = ReadReplicaConfig()
+    # apply pending migrations on startup instead of only checking the
+    # version, for development with a single worker
+    migrate_on_startup: bool = False
+    query_debug: QueryDebugConfig = QueryDebugConfig()
+
+
+class LiveResultsConfig(BaseModel):
+    # seconds to coalesce vote changes before one recompute is fanned out
+    coalesce_window: float = 0.25
+
+
+class VoteQueueConfig(BaseModel):
+    # acknowledge votes after a batched commit instead of one commit each
+    enabled: bool = False
+    # seconds to wait for more votes after the first one of a batch
+    flush_interval: float = 0.01
+    max_batch: int = 500
+
+
+class AuthCacheConfig(BaseModel):
+    enabled: bool = True
+    maxsize: int = 10_000
+    # seconds, also bounds staleness between workers
+    ttl: float = 60.0
+
+
+class RegistrationTokenConfig(BaseModel):
+    # seconds a minted token stays valid
+    ttl: int = 60 * 60 * 24
+    max_batch: int = 1000
+
+
+class MetricsConfig(BaseModel):
+    # request and query metrics served at /metrics, without authentication,
+    # keep it off the public proxy
+    enabled: bool = True
+    # add a Server-Timing header with app, db and pool time to every response
+    server_timing: bool = False
+
+
+class LoggingConfig(BaseModel):
+    level: str = "INFO"
+    # "json" for one structured record per line, "text" for humans
+    format: Literal["json", "text"] = "json"
+    # records waiting for the writer thread, further records are dropped
+    queue_size: int = 10_000
+    # log every request with its route, status and latency
+    access_log: bool = True
+    # keep one record in N per event (or logger name), warnings always kept
+    sample: dict[str, int] = {"http.access": 10}
+
+
+class StateConfig(BaseModel):
+    # "memory" is per process, "sqlite" is shared by all workers on the host
+    backend: Literal["memory", "sqlite"] = "memory"
+    path: str = "state.sqlite3"
+
+
+class RateLimitRule(BaseModel):
+    # tokens added per second, the sustained rate of one client
+    rate: float = 1.0
+    # bucket size, requests one client can send at once
+    burst: int = 5
+    # clients are told apart by their users-token cookie or by address
+    key: Literal["cookie", "ip"] = "ip"
+    # cookie rules also charge a bucket per address, the cookie is not
+    # verified yet and rotating it must not get a fresh bucket each time
+    ip_rate: float = 10.0
+    ip_burst: int = 50
+
+
+class RateLimitConfig(BaseModel):
+    # answer 429 to clients over their rate, before any database work
+    enabled: bool = False
+    # "local" buckets are per worker, "shared" ones are kept in the state
+    # store and cost one write to it per limited request
+    backend: Literal["local", "shared"] = "local"
+    vote: RateLimitRule = RateLimitRule(rate=1.0, burst=5, key="cookie")
+    registration: RateLimitRule = RateLimitRule(rate=0.2, burst=5)
+    reset: RateLimitRule = RateLimitRule(rate=0.2, burst=5)
 
 
 class Settings(BaseSettings):
@@ -41,6 +193,14 @@ class Settings(BaseSettings):
     runtime: RunSettings = RunSettings()
     admin: AdminKey
     db: DatabaseConfig
+    live: LiveResultsConfig = LiveResultsConfig()
+    vote_queue: VoteQueueConfig = VoteQueueConfig()
+    auth_cache: AuthCacheConfig = AuthCacheConfig()
+    tokens: RegistrationTokenConfig = RegistrationTokenConfig()
+    state: StateConfig = StateConfig()
+    metrics: MetricsConfig = MetricsConfig()
+    log: LoggingConfig = LoggingConfig()
+    rate_limit: RateLimitConfig = RateLimitConfig()
 
 
 settings = Settings()  # type: ignore
@@ -2,8 +2,10 @@ __all__ = (
     "Base",
     "Member",
     "Team",
+    "RegistrationToken",
 )
 
 from .base import Base
 from .member import Member
 from .team import Team
+from .registration_token import RegistrationToken
@@ -1,6 +1,6 @@
 from typing import TYPE_CHECKING, Optional
 
-from sqlalchemy import ForeignKey
+from sqlalchemy import BINARY, ForeignKey, LargeBinary
 from sqlalchemy.orm import mapped_column, Mapped, relationship
 from core.db_models.base import Base
 
@@ -16,19 +16,28 @@ class Member(Base):
     username: Mapped[str] = mapped_column(unique=True, index=True)
     has_joined_team: Mapped[bool]
     has_voted: Mapped[bool]
-    token: Mapped[str] = mapped_column(unique=True)
+    # SHA-256 of the users-token cookie, see data.hash_token, MySQL cannot
+    # put a unique index on a BLOB
+    token: Mapped[bytes] = mapped_column(
+        LargeBinary(32).with_variant(BINARY(32), "mysql", "mariadb"),
+        unique=True,
+    )
 
     team_id: Mapped[int] = mapped_column(
         ForeignKey("teams.id"),
         nullable=True,
+        index=True,
     )
     team: Mapped[Optional["Team"]] = relationship(
         back_populates="members",
         foreign_keys="Member.team_id",
     )
+    # counts per team only read the index, its entries already end with the
+    # primary key, an explicit (vote_id, id) would duplicate it
     vote_id: Mapped[int] = mapped_column(
         ForeignKey("teams.id"),
         nullable=True,
+        index=True,
     )
     voted_for: Mapped[Optional["Team"]] = relationship(
         back_populates="voters",
@@ -0,0 +1,18 @@
+from datetime import datetime
+
+from sqlalchemy import String
+from sqlalchemy.orm import mapped_column, Mapped
+from core.db_models.base import Base
+
+
+class RegistrationToken(Base):
+    __tablename__ = "registration_tokens"
+
+    token: Mapped[str] = mapped_column(
+        String(64),
+        primary_key=True,
+    )
+    created_at: Mapped[datetime]
+    expires_at: Mapped[datetime] = mapped_column(
+        index=True,
+    )
@@ -19,11 +19,20 @@ class Team(Base):
     avatar: Mapped[str] = mapped_column(
         nullable=True,
     )
+    # Denormalized tally of members.vote_id, kept in step by core.tally
+    votes_count: Mapped[int] = mapped_column(
+        default=0,
+        server_default="0",
+    )
+    # Collections are never loaded implicitly, write paths use targeted
+    # UPDATEs on members and reads query the columns they need
     members: Mapped[list["Member"]] = relationship(
         back_populates="team",
         foreign_keys="Member.team_id",
+        lazy="raise",
     )
     voters: Mapped[list["Member"]] = relationship(
         back_populates="voted_for",
         foreign_keys="Member.vote_id",
+        lazy="raise",
     )
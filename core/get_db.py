@@ -1,13 +1,53 @@
+from anyio import CapacityLimiter, to_thread
 from sqlalchemy.orm import sessionmaker, Session
-from sqlalchemy import Engine, create_engine, Pool, StaticPool
+from sqlalchemy import (
+    Engine,
+    create_engine,
+    event,
+    Pool,
+    QueuePool,
+    StaticPool,
+    make_url,
+)
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
 from core.db_models.base import Base
-from typing import Generator, Type
-from core.config import settings
+from contextlib import asynccontextmanager
+from typing import AsyncGenerator, Generator, Type
+from core.config import settings, DatabaseConfig, QueryDebugConfig
+from core.query_debug import track_session, check_queries
+from core.metrics import pool_stats
+from core.migrations import migrate, check_version, drop_version_table
 from core.db_models import Member, Team  # type: ignore
 import logging
 
 logger = logging.getLogger(__name__)
 
+# async drivers picked when the configured url names a sync backend
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+    "mysql": "mysql+aiomysql",
+}
+
+
+def get_async_url(url: str) -> str:
+    sa_url = make_url(url)
+    if sa_url.get_dialect().is_async:
+        return url
+    drivername = ASYNC_DRIVERS.get(sa_url.get_backend_name())
+    if drivername is None:
+        raise ValueError(
+            f"No async driver known for {sa_url.get_backend_name()}",
+        )
+    return sa_url.set(drivername=drivername).render_as_string(
+        hide_password=False,
+    )
+
 
 class DatabaseHelper:
     def __init__(
@@ -17,17 +57,40 @@ class DatabaseHelper:
         echo_pool: bool = False,
         pool_size: int = 5,
         max_overflow: int = 10,
+        pool_timeout: float = 30.0,
+        pool_recycle: int = -1,
+        pool_pre_ping: bool = False,
+        pool_use_lifo: bool = False,
         poolclass: Type[Pool] | None = None,
         connect_args: dict | None = None,
+        async_mode: bool = False,
+        sqlite_pragmas: dict[str, str | int] | None = None,
+        query_debug: QueryDebugConfig | None = None,
+        read_replica: "DatabaseHelper | None" = None,
+        cache_ttl: float | None = None,
     ) -> None:
         if connect_args is None:
             connect_args = {}
+        self.pool_size = pool_size
+        self.max_overflow = max_overflow
+        self.pool_timeout = pool_timeout
+        # engine of the read-only routes, the primary one when None
+        self.read_replica = read_replica
+        # statements of request sessions are checked against a budget
+        self.query_debug = query_debug if query_debug and query_debug.enabled else None
+        self.sqlite_pragmas = {}
+        if make_url(url).get_backend_name() == "sqlite" and sqlite_pragmas:
+            self.sqlite_pragmas = sqlite_pragmas
+            # pooled connections move between threadpool workers
+            connect_args = {"check_same_thread": False, **connect_args}
         engine_params = {
             "url": url,
             "echo": echo,
             "poolclass": poolclass,
             "connect_args": connect_args,
             "echo_pool": echo_pool,
+            "pool_recycle": pool_recycle,
+            "pool_pre_ping": pool_pre_ping,
         }
 
         if poolclass != StaticPool:
@@ -35,44 +98,262 @@ class DatabaseHelper:
                 {
                     "pool_size": pool_size,
                     "max_overflow": max_overflow,
+                    "pool_timeout": pool_timeout,
+                    "pool_use_lifo": pool_use_lifo,
                 },
             )
 
         self.engine: Engine = create_engine(
             **engine_params,
         )  # type: ignore
+        if self.sqlite_pragmas:
+            event.listen(self.engine, "connect", self.apply_sqlite_pragmas)
 
+        # responses rendered from a lagging replica are cached for a
+        # bounded time, read by the routes from session.info
         self.session_factory: sessionmaker[Session] = sessionmaker(
             bind=self.engine,
             autoflush=False,
             autocommit=False,
             expire_on_commit=False,
+            info={"cache_ttl": cache_ttl},
         )
 
+        # The sync engine stays available for schema management and
+        # the routes that have no async version
+        self.async_mode = async_mode
+        self.async_engine: AsyncEngine | None = None
+        self.async_session_factory: async_sessionmaker[AsyncSession] | None = None
+        if async_mode:
+            self.async_engine = create_async_engine(
+                **{
+                    **engine_params,
+                    "url": get_async_url(url),
+                },
+            )
+            if self.sqlite_pragmas:
+                event.listen(
+                    self.async_engine.sync_engine,
+                    "connect",
+                    self.apply_sqlite_pragmas,
+                )
+            self.async_session_factory = async_sessionmaker(
+                bind=self.async_engine,
+                autoflush=False,
+                expire_on_commit=False,
+                info={"cache_ttl": cache_ttl},
+            )
+
+    def apply_sqlite_pragmas(self, dbapi_connection, connection_record) -> None:
+        cursor = dbapi_connection.cursor()
+        for name, value in self.sqlite_pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+    @property
+    def pool_capacity(self) -> int | None:
+        """
+        Connections the sync engines can open at once, None if unbounded.
+
+        Note:
+            Includes the pool of the read replica
+        """
+        if not isinstance(self.engine.pool, QueuePool) or self.max_overflow < 0:
+            return None
+        capacity = self.pool_size + self.max_overflow
+        if self.read_replica is not None:
+            read_capacity = self.read_replica.pool_capacity
+            if read_capacity is None:
+                return None
+            capacity += read_capacity
+        return capacity
+
+    def pool_stats(self) -> dict:
+        """
+        Live state of the sync engine's pool, empty for unpooled engines.
+        """
+        stats = pool_stats(self.engine.pool)
+        if stats:
+            stats["capacity"] = self.pool_size + self.max_overflow
+            stats["timeout"] = self.pool_timeout
+        return stats
+
     def dispose(self) -> None:
         self.engine.dispose()
+        if self.read_replica is not None:
+            self.read_replica.dispose()
+
+    async def async_dispose(self) -> None:
+        if self.async_engine is not None:
+            await self.async_engine.dispose()
+        if self.read_replica is not None:
+            await self.read_replica.async_dispose()
 
     def create_database(self) -> None:
-        Base.metadata.create_all(self.engine)
-        logger.warning(
-            "Database creation has finished",
+        """
+        Create the schema or bring it to the latest version.
+        """
+        version = migrate(self.engine)
+        logger.info(
+            "Database schema is at version %s",
+            version,
         )
 
+    def check_schema(self) -> int:
+        """
+        Verify the schema version without changing anything.
+
+        Raises:
+            SchemaVersionError: If migrations are pending
+        """
+        return check_version(self.engine)
+
     def dispose_database(self) -> None:
+        """
+        Drop every table, for scratch databases only.
+        """
         Base.metadata.drop_all(self.engine)
+        drop_version_table(self.engine)
         logger.warning(
             "Database deletion has been successful",
         )
 
     def session_getter(self) -> Generator[Session, None, None]:
         with self.session_factory() as session:
+            if self.query_debug is None:
+                yield session
+                return
+            log = track_session(session)
+            try:
+                yield session
+            finally:
+                check_queries(
+                    log,
+                    self.query_debug.max_queries,
+                    self.query_debug.max_repeats,
+                )
+
+    async def async_session_getter(self) -> AsyncGenerator[AsyncSession, None]:
+        if self.async_session_factory is None:
+            raise RuntimeError(
+                "Async sessions require DatabaseHelper(async_mode=True)",
+            )
+        async with self.async_session_factory() as session:
+            if self.query_debug is None:
+                yield session
+                return
+            log = track_session(session.sync_session)
+            try:
+                yield session
+            finally:
+                check_queries(
+                    log,
+                    self.query_debug.max_queries,
+                    self.query_debug.max_repeats,
+                )
+
+    def read_session_getter(self) -> Generator[Session, None, None]:
+        """
+        Sessions of the read replica, of the primary engine without one.
+
+        Note:
+            A lagging replica may not show a write of the same client yet,
+            only read-only routes use these sessions
+        """
+        yield from (self.read_replica or self).session_getter()
+
+    async def async_read_session_getter(self) -> AsyncGenerator[AsyncSession, None]:
+        database = self.read_replica or self
+        async with asynccontextmanager(database.async_session_getter)() as session:
             yield session
 
 
+def size_threadpool(
+    database: DatabaseHelper,
+    threadpool_size: int | None,
+) -> CapacityLimiter:
+    """
+    Size the AnyIO threadpool of the sync routes against the connection pool.
+
+    Args:
+        database: Database the sync routes are served from
+        threadpool_size: Threads to run, None for one per pooled connection
+
+    Note:
+        Call from the event loop, the limiter belongs to it
+    """
+    limiter = to_thread.current_default_thread_limiter()
+    capacity = database.pool_capacity
+    if threadpool_size or capacity:
+        limiter.total_tokens = threadpool_size or capacity
+    if capacity is not None and limiter.total_tokens > capacity:
+        logger.warning(
+            "%s threads share %s connections, the others wait up to %ss for one",
+            limiter.total_tokens,
+            capacity,
+            database.pool_timeout,
+        )
+    logger.info(
+        "Threadpool of %s threads for a pool of %s connections",
+        limiter.total_tokens,
+        capacity if capacity is not None else "unbounded",
+    )
+    return limiter
+
+
+def create_read_replica(config: DatabaseConfig) -> DatabaseHelper | None:
+    """
+    Engine of the read-only routes, None when the replica is disabled.
+
+    Without a replica URL, a second engine is opened on the primary
+    database. For a SQLite file its connections are query_only, WAL lets
+    them read while the primary engine writes. A replica at its own URL
+    may lag, responses rendered from it expire after `cache_ttl`.
+    """
+    replica = config.read_replica
+    if not replica.enabled:
+        return None
+    url = replica.url or config.url
+    pragmas: dict[str, str | int] = {}
+    if make_url(url).get_backend_name() == "sqlite":
+        if config.sqlite.enabled:
+            pragmas.update(config.sqlite.pragmas())
+        if replica.url is None:
+            pragmas["query_only"] = "ON"
+    return DatabaseHelper(
+        url=url,
+        echo=config.echo,
+        echo_pool=config.echo_pool,
+        pool_size=replica.pool_size,
+        max_overflow=replica.max_overflow,
+        pool_timeout=config.pool_timeout,
+        pool_recycle=config.pool_recycle,
+        pool_pre_ping=config.pool_pre_ping,
+        pool_use_lifo=config.pool_use_lifo,
+        async_mode=config.async_mode,
+        sqlite_pragmas=pragmas,
+        query_debug=config.query_debug,
+        cache_ttl=replica.cache_ttl if replica.url else None,
+    )
+
+
+sqlite_profile = settings.db.sqlite.enabled and (
+    make_url(settings.db.url).get_backend_name() == "sqlite"
+)
 get_db = DatabaseHelper(
     url=settings.db.url,
     echo=settings.db.echo,
-    pool_size=settings.db.pool_size,
-    max_overflow=settings.db.max_overflow,
+    pool_size=settings.db.sqlite.pool_size if sqlite_profile else settings.db.pool_size,
+    max_overflow=(
+        settings.db.sqlite.max_overflow if sqlite_profile else settings.db.max_overflow
+    ),
     echo_pool=settings.db.echo_pool,
+    pool_timeout=settings.db.pool_timeout,
+    pool_recycle=settings.db.pool_recycle,
+    pool_pre_ping=settings.db.pool_pre_ping,
+    pool_use_lifo=settings.db.pool_use_lifo,
+    async_mode=settings.db.async_mode,
+    sqlite_pragmas=settings.db.sqlite.pragmas() if sqlite_profile else None,
+    query_debug=settings.db.query_debug,
+    read_replica=create_read_replica(settings.db),
 )
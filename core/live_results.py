@@ -0,0 +1,156 @@
+import asyncio
+import json
+from typing import AsyncIterator
+
+from starlette.concurrency import run_in_threadpool
+
+from core.config import settings
+from core.get_db import DatabaseHelper
+from core.state import StateStore, state_store
+from core.tally import get_tally
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class ResultsBroadcaster:
+    """
+    Fan-out of the voting results to live subscribers.
+
+    The tally is rendered once per change (changes arriving within
+    `coalesce_window` seconds are merged) and the same serialized
+    payload is handed to every subscriber, so connected clients
+    do not add database load of their own.
+
+    With a shared state store, changes are also stamped there and every
+    worker with subscribers polls the stamp once per coalescing window,
+    so votes cast on another worker are pushed as well.
+    """
+
+    VERSION_KEY = "live-results:version"
+
+    def __init__(
+        self,
+        store: StateStore,
+        coalesce_window: float = 0.25,
+    ) -> None:
+        self.store = store
+        self.coalesce_window = coalesce_window
+        self.subscribers = 0
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._changed: asyncio.Condition | None = None
+        self._render_lock: asyncio.Lock | None = None
+        self._refresh_task: asyncio.Task | None = None
+        self._watch_task: asyncio.Task | None = None
+        self._seen_stamp: str | None = None
+        self._database: DatabaseHelper | None = None
+        self._payload: str | None = None
+        self._version = 0
+        self._dirty = False
+
+    @staticmethod
+    def render(database: DatabaseHelper) -> str:
+        with database.session_factory() as session:
+            return json.dumps(get_tally(session))
+
+    def notify(self) -> None:
+        """
+        Signal that the results have changed.
+
+        Note:
+            Thread-safe, called by the mutating routes after commit
+        """
+        if self.store.shared:
+            # local subscribers are woken below, the watcher can skip it
+            self._seen_stamp = self.store.touch(self.VERSION_KEY)
+        loop = self._loop
+        if loop is None:
+            return
+        try:
+            loop.call_soon_threadsafe(self._schedule)
+        except RuntimeError:
+            # event loop of the last subscribers is gone
+            self._loop = None
+
+    def _schedule(self) -> None:
+        if not self.subscribers:
+            self._payload = None
+            return
+        self._dirty = True
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.create_task(self._refresh())
+
+    async def _refresh(self) -> None:
+        while self._dirty:
+            await asyncio.sleep(self.coalesce_window)
+            self._dirty = False
+            try:
+                payload = await run_in_threadpool(self.render, self._database)
+            except Exception:
+                logger.exception("Failed to render live voting results")
+                continue
+            await self._publish(payload)
+
+    async def _watch(self) -> None:
+        self._seen_stamp = await run_in_threadpool(self.store.get, self.VERSION_KEY)
+        while self.subscribers:
+            await asyncio.sleep(self.coalesce_window)
+            stamp = await run_in_threadpool(self.store.get, self.VERSION_KEY)
+            if stamp != self._seen_stamp:
+                self._seen_stamp = stamp
+                self._schedule()
+
+    async def _publish(self, payload: str) -> None:
+        async with self._changed:
+            self._payload = payload
+            self._version += 1
+            self._changed.notify_all()
+
+    def _bind(self, database: DatabaseHelper) -> None:
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._loop = loop
+            self._changed = asyncio.Condition()
+            self._render_lock = asyncio.Lock()
+            self._refresh_task = None
+            self._watch_task = None
+            self._payload = None
+            self.subscribers = 0
+        self._database = database
+        if self.store.shared and (self._watch_task is None or self._watch_task.done()):
+            self._watch_task = asyncio.create_task(self._watch())
+
+    async def subscribe(self, database: DatabaseHelper) -> AsyncIterator[str]:
+        """
+        Yield the current results, then every new version of them.
+
+        Args:
+            database: Database used to render the results
+        """
+        self._bind(database)
+        self.subscribers += 1
+        try:
+            async with self._render_lock:
+                if self._payload is None:
+                    await self._publish(
+                        await run_in_threadpool(self.render, database),
+                    )
+            version = self._version
+            yield self._payload
+            while True:
+                async with self._changed:
+                    await self._changed.wait_for(
+                        lambda: self._version > version,
+                    )
+                    version = self._version
+                    payload = self._payload
+                yield payload
+        finally:
+            self.subscribers -= 1
+
+
+results_broadcaster = ResultsBroadcaster(
+    store=state_store,
+    coalesce_window=settings.live.coalesce_window,
+)
@@ -0,0 +1,275 @@
+import copy
+import json
+import logging
+import queue
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar
+from dataclasses import dataclass
+from logging.handlers import QueueHandler, QueueListener
+from typing import TextIO
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from core.config import LoggingConfig
+
+TEXT_FORMAT = "[%(asctime)s,%(msecs)03d] - %(module)s - %(levelname)s: %(message)s."
+DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+# libraries installing their own blocking stream handlers, uvicorn's
+# logging config and SQLAlchemy echo
+FOREIGN_LOGGERS = ("uvicorn", "sqlalchemy")
+
+# attributes of every LogRecord, anything else was passed with extra=
+RECORD_ATTRIBUTES = frozenset(vars(logging.makeLogRecord({}))) | {
+    "message",
+    "asctime",
+    "taskName",
+}
+
+
+@dataclass
+class RequestContext:
+    method: str
+    scope: Scope
+    member_id: int | None = None
+
+    @property
+    def route(self) -> str | None:
+        # set by the router once the request is matched
+        return getattr(self.scope.get("route"), "path", None)
+
+
+# context of the request being served, shared with the threadpool workers
+# running its sync endpoint and dependencies
+current_context: ContextVar[RequestContext | None] = ContextVar(
+    "current_context",
+    default=None,
+)
+
+
+def bind_member(member_id: int) -> None:
+    """
+    Attach the authenticated member to the records of the current request.
+    """
+    context = current_context.get()
+    if context is not None:
+        context.member_id = member_id
+
+
+class RequestContextFilter(logging.Filter):
+    """
+    Add route, method and member_id of the current request to records.
+    """
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        context = current_context.get()
+        if context is None:
+            return True
+        fields = {
+            "route": context.route,
+            "method": context.method,
+            "member_id": context.member_id,
+        }
+        for name, value in fields.items():
+            if value is not None and not hasattr(record, name):
+                setattr(record, name, value)
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keep one record in N of high-volume events.
+
+    Rates are keyed by the `event` passed in extra=, or by logger name.
+    Warnings and above are never sampled out.
+    """
+
+    def __init__(self, rates: dict[str, int]) -> None:
+        super().__init__()
+        self.rates = rates
+        self._seen: Counter[str] = Counter()
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        key = getattr(record, "event", record.name)
+        rate = self.rates.get(key, 1)
+        if rate <= 1:
+            return True
+        with self._lock:
+            seen = self._seen[key]
+            self._seen[key] = seen + 1
+        record.sample_rate = rate
+        return seen % rate == 0
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """
+    Hand records to the writer thread without ever waiting on it.
+
+    When the bounded queue is full the record is dropped and counted,
+    a request thread never blocks on log I/O.
+    """
+
+    def __init__(self, log_queue: queue.Queue) -> None:
+        super().__init__(log_queue)
+        self.dropped = 0
+        self._exception_formatter = logging.Formatter()
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # merge the arguments here, they may be mutated once we return,
+        # but leave the formatting to the writer thread
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg, record.args = record.message, None
+        if record.exc_info:
+            record.exc_text = self._exception_formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    One JSON object per record with the fields passed in extra=.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        timestamp = self.formatTime(record, "%Y-%m-%dT%H:%M:%S")
+        payload = {
+            "ts": f"{timestamp}.{int(record.msecs):03d}",
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        payload.update(
+            (name, value)
+            for name, value in vars(record).items()
+            if name not in RECORD_ATTRIBUTES
+        )
+        if record.exc_text:
+            payload["exc"] = record.exc_text
+        return json.dumps(payload, default=str)
+
+
+class LogPipeline:
+    """
+    Root logging through a queue drained by a single writer thread.
+
+    Records are filtered and enqueued by the thread emitting them, the
+    formatting and the stream writes happen on the QueueListener thread.
+    """
+
+    def __init__(self) -> None:
+        self.handler: NonBlockingQueueHandler | None = None
+        self.listener: QueueListener | None = None
+
+    def start(self, config: LoggingConfig, stream: TextIO | None = None) -> None:
+        """
+        Route the root logger through the queue, replacing a running pipeline.
+
+        Args:
+            config: Level, format, queue size and sampling rates
+            stream: Written by the listener thread, stderr by default
+        """
+        self.stop()
+        log_queue: queue.Queue = queue.Queue(maxsize=config.queue_size)
+        writer = logging.StreamHandler(stream)
+        if config.format == "json":
+            writer.setFormatter(JsonFormatter())
+        else:
+            writer.setFormatter(logging.Formatter(TEXT_FORMAT, datefmt=DATE_FORMAT))
+
+        self.handler = NonBlockingQueueHandler(log_queue)
+        self.handler.addFilter(RequestContextFilter())
+        self.handler.addFilter(SamplingFilter(config.sample))
+        root = logging.getLogger()
+        root.addHandler(self.handler)
+        root.setLevel(config.level)
+        for name in list(logging.root.manager.loggerDict):
+            if name.partition(".")[0] not in FOREIGN_LOGGERS:
+                continue
+            foreign = logging.getLogger(name)
+            for handler in foreign.handlers[:]:
+                if isinstance(handler, logging.StreamHandler):
+                    foreign.removeHandler(handler)
+            foreign.propagate = True
+
+        self.listener = QueueListener(log_queue, writer, respect_handler_level=True)
+        self.listener.start()
+
+    def stop(self) -> None:
+        """
+        Write the queued records and detach the pipeline.
+        """
+        if self.listener is not None:
+            self.listener.stop()
+            self.listener = None
+        if self.handler is not None:
+            logging.getLogger().removeHandler(self.handler)
+            self.handler = None
+
+    def stats(self) -> dict:
+        return {
+            "running": self.listener is not None,
+            "dropped": self.handler.dropped if self.handler else 0,
+        }
+
+
+class AccessLogMiddleware:
+    """
+    ASGI middleware binding the request context and logging each request.
+
+    Access records carry route, method, status, member_id and latency_ms,
+    they are logged at INFO (event "http.access"), at ERROR for 5xx.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+        self.logger = logging.getLogger("access")
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        context = RequestContext(method=scope["method"], scope=scope)
+        token = current_context.set(context)
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            latency_ms = round((time.perf_counter() - started) * 1000, 2)
+            self.logger.log(
+                logging.ERROR if status_code >= 500 else logging.INFO,
+                "%s %s %s %sms",
+                scope["method"],
+                scope["path"],
+                status_code,
+                latency_ms,
+                extra={
+                    "event": "http.access",
+                    "route": context.route or "unmatched",
+                    "status": status_code,
+                    "latency_ms": latency_ms,
+                },
+            )
+            current_context.reset(token)
+
+
+log_pipeline = LogPipeline()
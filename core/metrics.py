@@ -0,0 +1,385 @@
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+from anyio import CapacityLimiter
+from sqlalchemy import Engine, Pool, QueuePool, event, exc
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+if TYPE_CHECKING:
+    from core.rate_limit import RateLimiter
+
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+# any other method is labelled "other", a client must not be able to add
+# series by sending made-up methods
+HTTP_METHODS = frozenset(
+    ("GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"),
+)
+
+
+@dataclass
+class RequestStats:
+    queries: int = 0
+    db_time: float = 0.0
+    pool_wait: float = 0.0
+
+    def server_timing(self, app_time: float) -> str:
+        return ", ".join(
+            (
+                f"app;dur={app_time * 1000:.2f}",
+                f'db;dur={self.db_time * 1000:.2f};desc="{self.queries} queries"',
+                f"pool;dur={self.pool_wait * 1000:.2f}",
+            ),
+        )
+
+
+# stats of the request being served, shared with the threadpool workers
+# running its sync endpoint and dependencies
+current_request: ContextVar[RequestStats | None] = ContextVar(
+    "current_request",
+    default=None,
+)
+
+
+class Histogram:
+    def __init__(self, buckets: tuple) -> None:
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+def pool_stats(pool: Pool) -> dict:
+    """
+    Connections of a QueuePool by state, empty for other pools.
+    """
+    if not isinstance(pool, QueuePool):
+        return {}
+    return {
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "idle": pool.checkedin(),
+        # negative while the pool has not opened pool_size connections yet
+        "overflow": max(pool.overflow(), 0),
+    }
+
+
+def format_labels(labels: dict) -> str:
+    if not labels:
+        return ""
+    pairs = ",".join(
+        '{}="{}"'.format(
+            name,
+            str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"),
+        )
+        for name, value in labels.items()
+    )
+    return f"{{{pairs}}}"
+
+
+class Metrics:
+    """
+    Per-process request and database metrics in Prometheus text format.
+
+    Requests are observed by MetricsMiddleware, queries and pool checkouts
+    by SQLAlchemy hooks installed with `instrument`. Queries run while a
+    request is served are also added to its RequestStats. The state of the
+    pools and of the threadpool is read when the metrics are rendered.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.requests: dict[tuple, int] = {}
+        self.latency: dict[tuple, Histogram] = {}
+        self.request_queries: dict[tuple, Histogram] = {}
+        self.request_db_time: dict[tuple, Histogram] = {}
+        self.pool_checkout = Histogram(LATENCY_BUCKETS)
+        self.queries = 0
+        self.db_time = 0.0
+        self.pool_timeouts = 0
+        self.engines: dict[str, Engine] = {}
+        self.threadpool: CapacityLimiter | None = None
+        self.rate_limiter: "RateLimiter | None" = None
+
+    def instrument(self, engine: Engine, name: str = "sync") -> None:
+        """
+        Time the queries and pool checkouts of `engine`.
+
+        Args:
+            engine: Engine to observe
+            name: Value of the `engine` label of its pool gauges
+        """
+        self.engines[name] = engine
+        if event.contains(engine, "after_cursor_execute", self._after_cursor_execute):
+            return
+        event.listen(engine, "before_cursor_execute", self._before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", self._after_cursor_execute)
+        # dispose() replaces the pool
+        event.listen(engine, "engine_disposed", lambda e: self._instrument_pool(e.pool))
+        self._instrument_pool(engine.pool)
+
+    def _instrument_pool(self, pool: Pool) -> None:
+        connect = pool.connect
+
+        def timed_connect():
+            started = time.perf_counter()
+            try:
+                return connect()
+            except exc.TimeoutError:
+                with self._lock:
+                    self.pool_timeouts += 1
+                raise
+            finally:
+                self.observe_checkout(time.perf_counter() - started)
+
+        pool.connect = timed_connect
+
+    def watch_threadpool(self, limiter: CapacityLimiter) -> None:
+        """
+        Report the threads of the sync routes, busy and waited for.
+        """
+        self.threadpool = limiter
+
+    def watch_rate_limiter(self, limiter: "RateLimiter") -> None:
+        """
+        Report the requests allowed and rejected by each rate limit rule.
+        """
+        self.rate_limiter = limiter
+
+    def _before_cursor_execute(
+        self, conn, cursor, statement, parameters, context, executemany
+    ):
+        conn.info.setdefault(self, []).append(time.perf_counter())
+
+    def _after_cursor_execute(
+        self, conn, cursor, statement, parameters, context, executemany
+    ):
+        elapsed = time.perf_counter() - conn.info[self].pop()
+        stats = current_request.get()
+        if stats is not None:
+            stats.queries += 1
+            stats.db_time += elapsed
+        with self._lock:
+            self.queries += 1
+            self.db_time += elapsed
+
+    def observe_checkout(self, elapsed: float) -> None:
+        stats = current_request.get()
+        if stats is not None:
+            stats.pool_wait += elapsed
+        with self._lock:
+            self.pool_checkout.observe(elapsed)
+
+    def observe_request(
+        self,
+        method: str,
+        route: str,
+        status_code: int,
+        elapsed: float,
+        stats: RequestStats,
+    ) -> None:
+        key = (method, route)
+        with self._lock:
+            status_key = (method, route, status_code)
+            self.requests[status_key] = self.requests.get(status_key, 0) + 1
+            if key not in self.latency:
+                self.latency[key] = Histogram(LATENCY_BUCKETS)
+                self.request_queries[key] = Histogram(QUERY_BUCKETS)
+                self.request_db_time[key] = Histogram(LATENCY_BUCKETS)
+            self.latency[key].observe(elapsed)
+            self.request_queries[key].observe(stats.queries)
+            self.request_db_time[key].observe(stats.db_time)
+
+    @staticmethod
+    def _histogram_lines(name: str, labels: dict, histogram: Histogram) -> list[str]:
+        lines = []
+        cumulative = 0
+        for bound, count in zip((*histogram.buckets, "+Inf"), histogram.counts):
+            cumulative += count
+            lines.append(
+                f"{name}_bucket{format_labels({**labels, 'le': bound})} {cumulative}"
+            )
+        lines.append(f"{name}_sum{format_labels(labels)} {histogram.sum}")
+        lines.append(f"{name}_count{format_labels(labels)} {histogram.count}")
+        return lines
+
+    def render(self) -> str:
+        """
+        Expose every metric in the Prometheus text format 0.0.4.
+        """
+        lines = []
+        with self._lock:
+            lines += [
+                "# HELP http_requests_total HTTP requests served",
+                "# TYPE http_requests_total counter",
+            ]
+            for (method, route, status_code), count in sorted(self.requests.items()):
+                labels = {"method": method, "route": route, "status": status_code}
+                lines.append(f"http_requests_total{format_labels(labels)} {count}")
+            for name, help_text, histograms in (
+                (
+                    "http_request_duration_seconds",
+                    "Time to serve a request",
+                    self.latency,
+                ),
+                (
+                    "http_request_db_queries",
+                    "SQL statements executed per request",
+                    self.request_queries,
+                ),
+                (
+                    "http_request_db_seconds",
+                    "Time spent in SQL statements per request",
+                    self.request_db_time,
+                ),
+            ):
+                lines += [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+                for (method, route), histogram in sorted(histograms.items()):
+                    labels = {"method": method, "route": route}
+                    lines += self._histogram_lines(name, labels, histogram)
+            lines += [
+                "# HELP db_pool_checkout_seconds Time to get a pooled connection",
+                "# TYPE db_pool_checkout_seconds histogram",
+                *self._histogram_lines(
+                    "db_pool_checkout_seconds", {}, self.pool_checkout
+                ),
+                "# HELP db_pool_timeouts_total Checkouts given up after pool_timeout",
+                "# TYPE db_pool_timeouts_total counter",
+                f"db_pool_timeouts_total {self.pool_timeouts}",
+                "# HELP db_queries_total SQL statements executed",
+                "# TYPE db_queries_total counter",
+                f"db_queries_total {self.queries}",
+                "# HELP db_query_seconds_total Time spent in SQL statements",
+                "# TYPE db_query_seconds_total counter",
+                f"db_query_seconds_total {self.db_time}",
+            ]
+        lines += self._pool_lines()
+        lines += self._threadpool_lines()
+        lines += self._rate_limit_lines()
+        return "\n".join(lines) + "\n"
+
+    def _pool_lines(self) -> list[str]:
+        connections, overflow = [], []
+        for name, engine in sorted(self.engines.items()):
+            # read engine.pool every time, dispose() replaces it
+            stats = pool_stats(engine.pool)
+            if not stats:
+                continue
+            for state in ("checked_out", "idle"):
+                labels = {"engine": name, "state": state}
+                connections.append(
+                    f"db_pool_connections{format_labels(labels)} {stats[state]}"
+                )
+            overflow.append(
+                f"db_pool_overflow{format_labels({'engine': name})} {stats['overflow']}"
+            )
+        if not connections:
+            return []
+        return [
+            "# HELP db_pool_connections Connections opened by the pool",
+            "# TYPE db_pool_connections gauge",
+            *connections,
+            "# HELP db_pool_overflow Connections opened above pool_size",
+            "# TYPE db_pool_overflow gauge",
+            *overflow,
+        ]
+
+    def _threadpool_lines(self) -> list[str]:
+        if self.threadpool is None:
+            return []
+        return [
+            "# HELP threadpool_threads Threads of the sync routes",
+            "# TYPE threadpool_threads gauge",
+            f"threadpool_threads {self.threadpool.total_tokens}",
+            "# HELP threadpool_busy_threads Threads running a sync route",
+            "# TYPE threadpool_busy_threads gauge",
+            f"threadpool_busy_threads {self.threadpool.borrowed_tokens}",
+            "# HELP threadpool_waiting_tasks Sync calls waiting for a thread",
+            "# TYPE threadpool_waiting_tasks gauge",
+            f"threadpool_waiting_tasks {self.threadpool.statistics().tasks_waiting}",
+        ]
+
+    def _rate_limit_lines(self) -> list[str]:
+        if self.rate_limiter is None or not self.rate_limiter.enabled:
+            return []
+        lines = [
+            "# HELP rate_limit_requests_total Requests checked against a rate limit",
+            "# TYPE rate_limit_requests_total counter",
+        ]
+        for name, rule in sorted(self.rate_limiter.stats()["rules"].items()):
+            for outcome in ("allowed", "rejected"):
+                labels = {"rule": name, "outcome": outcome}
+                lines.append(
+                    f"rate_limit_requests_total{format_labels(labels)} {rule[outcome]}"
+                )
+        return lines
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware observing the latency, queries and DB time of requests.
+
+    Requests are labelled with the route template (e.g. /v1/teams/{team_id}/users),
+    requests matching no route with "unmatched", non-standard methods with
+    "other". With `server_timing` every
+    response carries a Server-Timing header with the app, db and pool time.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        metrics: Metrics,
+        server_timing: bool = False,
+    ) -> None:
+        self.app = app
+        self.metrics = metrics
+        self.server_timing = server_timing
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = current_request.set(stats)
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if self.server_timing:
+                    headers = MutableHeaders(scope=message)
+                    headers.append(
+                        "Server-Timing",
+                        stats.server_timing(time.perf_counter() - started),
+                    )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            current_request.reset(token)
+            route = getattr(scope.get("route"), "path", "unmatched")
+            method = scope["method"]
+            self.metrics.observe_request(
+                method if method in HTTP_METHODS else "other",
+                route,
+                status_code,
+                time.perf_counter() - started,
+                stats,
+            )
+
+
+metrics = Metrics()
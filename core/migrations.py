@@ -0,0 +1,225 @@
+"""
+Versioned schema migrations.
+
+Every migration runs once, in its own transaction, and is recorded in the
+schema_version table. The server only checks the version on startup, run
+the pending migrations before starting (or rolling out) a new release:
+
+    python -m core.migrations           # apply pending migrations
+    python -m core.migrations --check   # exit 1 if the schema is behind
+"""
+
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Callable
+
+from sqlalchemy import (
+    Column,
+    Connection,
+    DateTime,
+    Engine,
+    Integer,
+    MetaData,
+    String,
+    Table,
+    func,
+    inspect,
+    insert,
+    select,
+    text,
+    update,
+)
+
+from core.db_models import Member, Team
+from core.db_models.base import Base
+from data import hash_token
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+# kept out of Base.metadata, create_all and drop_all never touch it
+version_metadata = MetaData()
+schema_version = Table(
+    "schema_version",
+    version_metadata,
+    Column("version", Integer, primary_key=True),
+    Column("description", String, nullable=False),
+    Column("applied_at", DateTime, nullable=False),
+)
+
+
+class SchemaVersionError(RuntimeError):
+    pass
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    description: str
+    upgrade: Callable[[Connection], None]
+
+
+def add_votes_count(connection: Connection) -> None:
+    # create_all never adds a column to an existing table, the baseline
+    # release created teams without the stored tally
+    columns = {column["name"] for column in inspect(connection).get_columns("teams")}
+    if "votes_count" in columns:
+        return
+    connection.execute(
+        text("ALTER TABLE teams ADD COLUMN votes_count INTEGER DEFAULT 0 NOT NULL"),
+    )
+    teams = Team.__table__
+    votes = (
+        select(func.count(Member.id))
+        .where(Member.vote_id == teams.c.id)
+        .scalar_subquery()
+    )
+    connection.execute(update(teams).values(votes_count=votes))
+
+
+def initial_schema(connection: Connection) -> None:
+    # databases created by create_all before versioning already have the
+    # tables, they are only stamped
+    Base.metadata.create_all(connection, checkfirst=True)
+
+
+def member_indexes_and_token_digests(connection: Connection) -> None:
+    # foreign keys filtered by rosters, counts and team deletes
+    for index in Member.__table__.indexes:
+        index.create(connection, checkfirst=True)
+
+    dialect = connection.dialect.name
+    if dialect == "sqlite":
+        # column affinity never converts blobs, the values are rewritten
+        # in place and the declared type of an old table stays VARCHAR
+        rows = connection.execute(
+            text("SELECT id, token FROM members WHERE typeof(token) = 'text'"),
+        ).all()
+        if rows:
+            connection.execute(
+                text("UPDATE members SET token = :token WHERE id = :id"),
+                [{"id": id_, "token": hash_token(token)} for id_, token in rows],
+            )
+        return
+
+    columns = {
+        column["name"]: column for column in inspect(connection).get_columns("members")
+    }
+    if columns["token"]["type"].python_type is bytes:
+        return
+    if dialect == "postgresql":
+        connection.execute(
+            text(
+                "ALTER TABLE members ALTER COLUMN token TYPE bytea "
+                "USING sha256(convert_to(token, 'UTF8'))",
+            ),
+        )
+    elif dialect in ("mysql", "mariadb"):
+        connection.execute(
+            text("ALTER TABLE members MODIFY token VARBINARY(255) NOT NULL")
+        )
+        connection.execute(text("UPDATE members SET token = UNHEX(SHA2(token, 256))"))
+        connection.execute(text("ALTER TABLE members MODIFY token BINARY(32) NOT NULL"))
+    else:
+        raise SchemaVersionError(f"Cannot convert members.token on {dialect}")
+
+
+# Append only, never edit an applied migration. The first one creates the
+# tables of the current models, later ones must tolerate running on a
+# database created that way (checkfirst, IF NOT EXISTS).
+MIGRATIONS: tuple[Migration, ...] = (
+    Migration(1, "Initial schema", initial_schema),
+    Migration(
+        2,
+        "Index members.team_id and vote_id, store token digests",
+        member_indexes_and_token_digests,
+    ),
+    # databases of the baseline release are stamped by migration 1 without
+    # the stored tally
+    Migration(3, "Add teams.votes_count where missing", add_votes_count),
+)
+
+LATEST_VERSION = MIGRATIONS[-1].version
+
+
+def current_version(connection: Connection) -> int:
+    """
+    Returns:
+        int: Version of the schema, 0 for a database never migrated
+    """
+    if not inspect(connection).has_table(schema_version.name):
+        return 0
+    return connection.scalar(select(func.max(schema_version.c.version))) or 0
+
+
+def migrate(engine: Engine) -> int:
+    """
+    Apply the pending migrations.
+
+    Returns:
+        int: Version of the schema after the migrations
+    """
+    with engine.begin() as connection:
+        version_metadata.create_all(connection, checkfirst=True)
+        version = current_version(connection)
+    for migration in MIGRATIONS:
+        if migration.version <= version:
+            continue
+        with engine.begin() as connection:
+            migration.upgrade(connection)
+            connection.execute(
+                insert(schema_version).values(
+                    version=migration.version,
+                    description=migration.description,
+                    applied_at=datetime.now(timezone.utc),
+                ),
+            )
+        version = migration.version
+        logger.info(
+            "Applied migration %s: %s",
+            migration.version,
+            migration.description,
+            extra={"event": "schema.migrated", "audit": True},
+        )
+    return version
+
+
+def check_version(engine: Engine) -> int:
+    """
+    Verify that the schema is at LATEST_VERSION, without changing it.
+
+    Raises:
+        SchemaVersionError: If migrations are pending or the database is
+        newer than this release
+    """
+    with engine.connect() as connection:
+        version = current_version(connection)
+    if version != LATEST_VERSION:
+        raise SchemaVersionError(
+            f"Database schema is at version {version}, this release expects "
+            f"{LATEST_VERSION}, run `python -m core.migrations`",
+        )
+    return version
+
+
+def drop_version_table(engine: Engine) -> None:
+    version_metadata.drop_all(engine, checkfirst=True)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from core.get_db import get_db
+
+    parser = argparse.ArgumentParser(description="Migrate the database schema")
+    parser.add_argument("--check", action="store_true", help="only verify the version")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    if args.check:
+        try:
+            print(f"Schema is up to date at version {check_version(get_db.engine)}")
+        except SchemaVersionError as error:
+            raise SystemExit(str(error))
+    else:
+        print(f"Schema is at version {migrate(get_db.engine)}")
@@ -0,0 +1,102 @@
+from collections import Counter
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Iterator
+
+from sqlalchemy import Connection, Engine, event
+from sqlalchemy.orm import Session
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class QueryLog:
+    """
+    SQL statements executed on a session or an engine, in order.
+
+    Statements are recorded as sent to the driver, with placeholders
+    instead of values, so the same query run for N rows has one shape.
+    """
+
+    statements: list[str] = field(default_factory=list)
+
+    def __len__(self) -> int:
+        return len(self.statements)
+
+    def record(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        self.statements.append(statement)
+
+    def repeated(self, min_count: int = 2) -> dict[str, int]:
+        """
+        Statement shapes executed at least `min_count` times.
+        """
+        return {
+            statement: count
+            for statement, count in Counter(self.statements).items()
+            if count >= min_count
+        }
+
+    def report(self) -> str:
+        lines = [f"{len(self)} statements:"]
+        lines += [f"  {statement}" for statement in self.statements]
+        return "\n".join(lines)
+
+
+@contextmanager
+def capture_queries(engine: Engine) -> Iterator[QueryLog]:
+    """
+    Record every statement executed on `engine` inside the block.
+
+    Note:
+        Counts the statements of all threads, meant for tests
+    """
+    log = QueryLog()
+    event.listen(engine, "before_cursor_execute", log.record)
+    try:
+        yield log
+    finally:
+        event.remove(engine, "before_cursor_execute", log.record)
+
+
+def track_session(session: Session) -> QueryLog:
+    """
+    Record the statements executed by `session`, flushes included.
+
+    Every connection the session begins a transaction on gets a listener,
+    connections are not reused after the session releases them.
+    """
+    log = QueryLog()
+
+    def after_begin(session: Session, transaction, connection: Connection) -> None:
+        if not event.contains(connection, "before_cursor_execute", log.record):
+            event.listen(connection, "before_cursor_execute", log.record)
+
+    event.listen(session, "after_begin", after_begin)
+    return log
+
+
+def check_queries(log: QueryLog, max_queries: int, max_repeats: int) -> bool:
+    """
+    Log a warning if a session ran too many statements or a probable N+1.
+
+    Returns:
+        bool: True if the session is within budget
+    """
+    repeated = log.repeated(min_count=max_repeats + 1)
+    if len(log) <= max_queries and not repeated:
+        return True
+    if repeated:
+        logger.warning(
+            "Probable N+1, statements repeated in one session: %s",
+            "; ".join(f"{count}x {statement}" for statement, count in repeated.items()),
+        )
+    if len(log) > max_queries:
+        logger.warning(
+            "Session ran %s statements, budget is %s\n%s",
+            len(log),
+            max_queries,
+            log.report(),
+        )
+    return False
@@ -0,0 +1,107 @@
+import threading
+from collections import Counter
+
+from fastapi import Request
+
+from core.config import RateLimitConfig, RateLimitRule, settings
+from core.state import InMemoryStore, StateStore, state_store
+from data import hash_token
+
+
+class RateLimiter:
+    """
+    Token buckets per client and rule, kept in a state store.
+
+    A client gets `burst` requests at once, then `rate` requests per
+    second. Clients are keyed by their address, cookie rules also keep a
+    bucket per digest of the users-token cookie.
+
+    Note:
+        Behind a reverse proxy, its address must be trusted with
+        settings.runtime.forwarded_allow_ips, otherwise every client has
+        the proxy's address and shares its buckets
+    """
+
+    def __init__(
+        self,
+        store: StateStore,
+        rules: dict[str, RateLimitRule],
+        enabled: bool = True,
+    ) -> None:
+        self.store = store
+        self.rules = rules
+        self.enabled = enabled
+        self.allowed: Counter[str] = Counter()
+        self.rejected: Counter[str] = Counter()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def buckets(
+        request: Request,
+        rule: RateLimitRule,
+    ) -> list[tuple[str, float, int]]:
+        """
+        Returns:
+            list: Key, rate and burst of every bucket the request is charged to
+        """
+        address = f"ip:{request.client.host if request.client else 'unknown'}"
+        if rule.key != "cookie":
+            return [(address, rule.rate, rule.burst)]
+        buckets = [(address, rule.ip_rate, rule.ip_burst)]
+        token = request.cookies.get("users-token")
+        if token:
+            buckets.append((f"token:{hash_token(token).hex()}", rule.rate, rule.burst))
+        return buckets
+
+    def hit(self, name: str, request: Request) -> float | None:
+        """
+        Count a request of the client against the rule `name`.
+
+        Returns:
+            float | None: None if the request may proceed, otherwise the
+                seconds until the client gets a token back
+
+        Note:
+            Blocks on a shared store, call it from the threadpool then
+        """
+        if not self.enabled:
+            return None
+        for key, rate, burst in self.buckets(request, self.rules[name]):
+            taken, tokens = self.store.take(f"rate-limit:{name}:{key}", rate, burst)
+            if not taken:
+                with self._lock:
+                    self.rejected[name] += 1
+                return (1 - tokens) / rate
+        with self._lock:
+            self.allowed[name] += 1
+        return None
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "shared": self.store.shared,
+                "rules": {
+                    name: {
+                        **rule.model_dump(),
+                        "allowed": self.allowed[name],
+                        "rejected": self.rejected[name],
+                    }
+                    for name, rule in self.rules.items()
+                },
+            }
+
+
+def create_rate_limiter(config: RateLimitConfig) -> RateLimiter:
+    return RateLimiter(
+        store=state_store if config.backend == "shared" else InMemoryStore(),
+        rules={
+            "vote": config.vote,
+            "registration": config.registration,
+            "reset": config.reset,
+        },
+        enabled=config.enabled,
+    )
+
+
+rate_limiter = create_rate_limiter(settings.rate_limit)
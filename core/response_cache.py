@@ -0,0 +1,160 @@
+import hashlib
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Iterable
+
+from fastapi import Request, Response, status
+from pydantic import TypeAdapter
+
+from core.state import StateStore, state_store
+
+# Data a cached response can depend on, every scope has its own version
+TEAMS = "teams"
+MEMBERS = "members"
+VOTES = "votes"
+
+
+@dataclass(frozen=True)
+class CachedResponse:
+    versions: tuple
+    etag: str
+    body: bytes
+    # monotonic deadline, None to keep the entry until a scope changes
+    expires: float | None = None
+
+
+class ResponseCache:
+    """
+    Cache of public JSON responses keyed by path.
+
+    Every entry remembers the versions of the scopes it depends on, the
+    mutating routes replace those versions in the state store, so entries
+    of every worker go stale as soon as the change is committed.
+
+    Bodies are kept as bytes encoded once by a pydantic TypeAdapter, and
+    returned as a raw Response, bypassing response_model validation and
+    jsonable_encoder on every hit.
+
+    Responses carry a strong ETag computed from the body, a request whose
+    If-None-Match matches a fresh entry is answered with 304 without
+    rendering anything.
+
+    A response rendered from a lagging read replica may predate the write
+    that bumped the versions, such entries are given a TTL.
+    """
+
+    def __init__(self, store: StateStore) -> None:
+        self.store = store
+        self.hits = 0
+        self.misses = 0
+        self._entries: dict[str, CachedResponse] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(scope: str) -> str:
+        return f"response-cache:{scope}"
+
+    @staticmethod
+    def encode(adapter: TypeAdapter, content: Any) -> bytes:
+        """
+        Validate `content` (ORM objects or dicts) and dump it to JSON bytes.
+        """
+        return adapter.dump_json(
+            adapter.validate_python(content, from_attributes=True),
+        )
+
+    @staticmethod
+    def not_modified(request: Request, etag: str) -> bool:
+        header = request.headers.get("if-none-match")
+        if header is None:
+            return False
+        tags = [tag.strip().removeprefix("W/") for tag in header.split(",")]
+        return etag in tags or "*" in tags
+
+    def invalidate(self, *scopes: str) -> None:
+        """
+        Mark every response depending on `scopes` as stale.
+
+        Note:
+            Call after commit
+        """
+        for scope in scopes:
+            self.store.touch(self._key(scope))
+
+    def versions(self, scopes: Iterable[str]) -> tuple:
+        """
+        Read the current versions of `scopes`, blocking with a shared store.
+        """
+        return tuple(self.store.get_many([self._key(scope) for scope in scopes]))
+
+    def respond(
+        self,
+        request: Request,
+        scopes: Iterable[str],
+        adapter: TypeAdapter,
+        render: Callable[[], Any],
+        ttl: float | None = None,
+        versions: tuple | None = None,
+    ) -> Response:
+        """
+        Serve the cached response of the request, rendering it if stale.
+
+        Args:
+            request: Incoming request, its path is the cache key
+            scopes: Scopes the response depends on
+            adapter: Type of the response content, encodes it to JSON
+            render: Builds the response content, called on a miss only
+            ttl: Seconds the rendered entry stays fresh, None for no limit
+            versions: Versions of `scopes` read beforehand (see `versions`),
+                by default read here
+
+        Returns:
+            Response: JSON body with ETag, or 304 Not Modified
+        """
+        # the cached routes take no query parameters, a query string must
+        # not add an entry per distinct value
+        key = request.url.path
+        # read before rendering, a change made meanwhile leaves the entry stale
+        if versions is None:
+            versions = self.versions(scopes)
+        entry = self._entries.get(key)
+        if (
+            entry is not None
+            and entry.versions == versions
+            and (entry.expires is None or entry.expires > time.monotonic())
+        ):
+            self.hits += 1
+        else:
+            self.misses += 1
+            body = self.encode(adapter, render())
+            entry = CachedResponse(
+                versions=versions,
+                etag=f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"',
+                body=body,
+                expires=time.monotonic() + ttl if ttl else None,
+            )
+            with self._lock:
+                self._entries[key] = entry
+
+        headers = {"ETag": entry.etag, "Cache-Control": "no-cache"}
+        if self.not_modified(request, entry.etag):
+            return Response(
+                status_code=status.HTTP_304_NOT_MODIFIED,
+                headers=headers,
+            )
+        return Response(
+            content=entry.body,
+            media_type="application/json",
+            headers=headers,
+        )
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+response_cache = ResponseCache(store=state_store)
@@ -2,6 +2,10 @@ __all__ = (
     "TeamIn",
     "TeamUpdate",
     "TeamOut",
+    "TeamStats",
+    "TeamVotes",
+    "TeamResult",
+    "VotingResults",
     "MemberList",
     "MemberInAdmin",
     "MemberIn",
@@ -10,10 +14,20 @@ __all__ = (
     "MemberUpdateAdmin",
     "MemberOutTeam",
     "TeamMembers",
+    "MemberBulkResult",
+    "MemberBulkOut",
 )
 
 
-from .team import TeamIn, TeamUpdate, TeamOut
+from .team import (
+    TeamIn,
+    TeamUpdate,
+    TeamOut,
+    TeamStats,
+    TeamVotes,
+    TeamResult,
+    VotingResults,
+)
 from .member import (
     MemberList,
     MemberInAdmin,
@@ -23,4 +37,6 @@ from .member import (
     MemberUpdateAdmin,
     MemberOutTeam,
     TeamMembers,
+    MemberBulkResult,
+    MemberBulkOut,
 )
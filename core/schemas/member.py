@@ -1,3 +1,5 @@
+from typing import Literal
+
 from pydantic import BaseModel, ConfigDict, Field
 
 
@@ -58,3 +60,17 @@ class TeamMembers(BaseModel):
 
 class MemberList(BaseModel):
     name: str
+
+
+class MemberBulkResult(BaseModel):
+    index: int
+    username: str | None
+    status: Literal["created", "rejected"]
+    id: int | None = None
+    detail: str | None = None
+
+
+class MemberBulkOut(BaseModel):
+    created: int
+    rejected: int
+    results: list[MemberBulkResult]
@@ -18,3 +18,29 @@ class TeamOut(TeamIn):
 class TeamUpdate(BaseModel):
     name: str | None = None
     avatar: str | None = None
+
+
+class TeamStats(BaseModel):
+    votes: int
+
+
+class TeamVotes(BaseModel):
+    name: str
+    stats: TeamStats
+
+
+class TeamResult(TeamOut):
+    votes: int
+    # percent of the votes cast
+    share: float
+    # teams with as many votes share a rank
+    rank: int
+
+
+class VotingResults(BaseModel):
+    teams: list[TeamResult]
+    votes: int
+    voted: int
+    registered: int
+    # percent of the registered members who have voted
+    turnout: float
@@ -0,0 +1,258 @@
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Iterable
+
+from starlette.concurrency import run_in_threadpool
+
+from core.config import settings, StateConfig
+
+# bucket takes between two sweeps of the full buckets
+PRUNE_EVERY = 1000
+
+
+class StateStore(ABC):
+    """
+    Key-value store for mutable state that must be shared by workers.
+
+    Values are strings, `ttl` is in seconds. Implementations must be
+    safe to call from the threadpool.
+    """
+
+    # whether other processes see the same data
+    shared: bool = False
+
+    @abstractmethod
+    def get_many(self, keys: Iterable[str]) -> list[str | None]: ...
+
+    @abstractmethod
+    def set(self, key: str, value: str, ttl: float | None = None) -> None: ...
+
+    @abstractmethod
+    def delete(self, key: str) -> None: ...
+
+    @abstractmethod
+    def incr(self, key: str, amount: int = 1, ttl: float | None = None) -> int:
+        """
+        Atomically add `amount` to an integer value (missing counts as 0).
+
+        Note:
+            `ttl` is applied when the key is created
+        """
+
+    @abstractmethod
+    def take(self, key: str, rate: float, burst: int) -> tuple[bool, float]:
+        """
+        Atomically take a token from the bucket `key`.
+
+        The bucket holds up to `burst` tokens and gains `rate` tokens per
+        second, a missing bucket is full.
+
+        Returns:
+            tuple: Whether a token was taken and the tokens left
+        """
+
+    def get(self, key: str) -> str | None:
+        return self.get_many([key])[0]
+
+    def touch(self, key: str, ttl: float | None = None) -> str:
+        """
+        Store a fresh, unique version stamp under `key` and return it.
+        """
+        stamp = str(time.time_ns())
+        self.set(key, stamp, ttl=ttl)
+        return stamp
+
+
+async def call_store(store: StateStore, func: Callable[..., Any], *args: Any) -> Any:
+    """
+    Call `func` from an async route, in the threadpool if it uses `store`
+    and the store is shared (its calls are blocking I/O then).
+    """
+    if store.shared:
+        return await run_in_threadpool(func, *args)
+    return func(*args)
+
+
+class InMemoryStore(StateStore):
+    """
+    Process-local store, only correct with a single worker.
+    """
+
+    def __init__(self) -> None:
+        self._data: dict[str, tuple[str, float | None]] = {}
+        # key: (tokens, updated_at, full_at)
+        self._buckets: dict[str, tuple[float, float, float]] = {}
+        self._takes = 0
+        self._lock = threading.Lock()
+
+    def _live(self, key: str, now: float) -> str | None:
+        item = self._data.get(key)
+        if item is None:
+            return None
+        value, expires_at = item
+        if expires_at is not None and expires_at <= now:
+            del self._data[key]
+            return None
+        return value
+
+    def get_many(self, keys: Iterable[str]) -> list[str | None]:
+        now = time.monotonic()
+        with self._lock:
+            return [self._live(key, now) for key in keys]
+
+    def set(self, key: str, value: str, ttl: float | None = None) -> None:
+        expires_at = None if ttl is None else time.monotonic() + ttl
+        with self._lock:
+            self._data[key] = (value, expires_at)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def incr(self, key: str, amount: int = 1, ttl: float | None = None) -> int:
+        now = time.monotonic()
+        with self._lock:
+            current = self._live(key, now)
+            if current is None:
+                value = amount
+                expires_at = None if ttl is None else now + ttl
+            else:
+                value = int(current) + amount
+                expires_at = self._data[key][1]
+            self._data[key] = (str(value), expires_at)
+            return value
+
+    def take(self, key: str, rate: float, burst: int) -> tuple[bool, float]:
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                tokens = float(burst)
+            else:
+                tokens = min(burst, bucket[0] + (now - bucket[1]) * rate)
+            taken = tokens >= 1
+            if taken:
+                tokens -= 1
+            self._buckets[key] = (tokens, now, now + (burst - tokens) / rate)
+            self._takes += 1
+            if self._takes % PRUNE_EVERY == 0:
+                # full buckets are the same as missing ones
+                for stale in [
+                    k for k, (_, _, full_at) in self._buckets.items() if full_at <= now
+                ]:
+                    del self._buckets[stale]
+        return taken, tokens
+
+
+class SQLiteStore(StateStore):
+    """
+    Store kept in a SQLite file, shared by every worker on the host.
+
+    Every thread gets its own connection, the file runs in WAL mode so
+    readers never wait for writers.
+    """
+
+    shared = True
+
+    def __init__(self, path: str, busy_timeout: float = 5.0) -> None:
+        self.path = path
+        self.busy_timeout = busy_timeout
+        self._local = threading.local()
+        with self._connect() as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS state ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL)"
+            )
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS buckets ("
+                "key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated_at REAL NOT NULL, "
+                "full_at REAL NOT NULL, taken INTEGER NOT NULL)"
+            )
+        self._takes = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(
+                self.path,
+                timeout=self.busy_timeout,
+                isolation_level=None,
+            )
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    def get_many(self, keys: Iterable[str]) -> list[str | None]:
+        keys = list(keys)
+        placeholders = ",".join("?" * len(keys))
+        rows = self._connect().execute(
+            f"SELECT key, value FROM state WHERE key IN ({placeholders}) "
+            "AND (expires_at IS NULL OR expires_at > ?)",
+            (*keys, time.time()),
+        )
+        values = dict(rows.fetchall())
+        return [values.get(key) for key in keys]
+
+    def set(self, key: str, value: str, ttl: float | None = None) -> None:
+        expires_at = None if ttl is None else time.time() + ttl
+        self._connect().execute(
+            "INSERT INTO state (key, value, expires_at) VALUES (?, ?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET "
+            "value = excluded.value, expires_at = excluded.expires_at",
+            (key, value, expires_at),
+        )
+
+    def delete(self, key: str) -> None:
+        self._connect().execute("DELETE FROM state WHERE key = ?", (key,))
+
+    def incr(self, key: str, amount: int = 1, ttl: float | None = None) -> int:
+        now = time.time()
+        expires_at = None if ttl is None else now + ttl
+        row = (
+            self._connect()
+            .execute(
+                "INSERT INTO state (key, value, expires_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET "
+                "value = CASE WHEN expires_at IS NOT NULL AND expires_at <= ? "
+                "THEN excluded.value ELSE CAST(value AS INTEGER) + ? END, "
+                "expires_at = CASE WHEN expires_at IS NOT NULL AND expires_at <= ? "
+                "THEN excluded.expires_at ELSE expires_at END "
+                "RETURNING value",
+                (key, str(amount), expires_at, now, amount, now),
+            )
+            .fetchone()
+        )
+        return int(row[0])
+
+    def take(self, key: str, rate: float, burst: int) -> tuple[bool, float]:
+        # every SET expression sees the row before the update
+        refill = "MIN(:burst, tokens + (:now - updated_at) * :rate)"
+        now = time.time()
+        connection = self._connect()
+        taken, tokens = connection.execute(
+            "INSERT INTO buckets (key, tokens, updated_at, full_at, taken) "
+            "VALUES (:key, :burst - 1, :now, :now + 1 / :rate, 1) "
+            "ON CONFLICT(key) DO UPDATE SET "
+            f"taken = {refill} >= 1, "
+            f"tokens = {refill} - ({refill} >= 1), "
+            f"full_at = :now + (:burst - {refill} + ({refill} >= 1)) / :rate, "
+            "updated_at = :now "
+            "RETURNING taken, tokens",
+            {"key": key, "burst": burst, "rate": rate, "now": now},
+        ).fetchone()
+        self._takes += 1
+        if self._takes % PRUNE_EVERY == 0:
+            connection.execute("DELETE FROM buckets WHERE full_at <= ?", (now,))
+        return bool(taken), tokens
+
+
+def create_store(config: StateConfig) -> StateStore:
+    if config.backend == "sqlite":
+        return SQLiteStore(config.path)
+    return InMemoryStore()
+
+
+state_store = create_store(settings.state)
@@ -0,0 +1,215 @@
+from sqlalchemy import delete, select, update, func, or_, case, true
+from sqlalchemy.orm import Session
+
+from core.db_models import Member, Team
+from core.response_cache import response_cache, VOTES
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def add_vote(
+    session: Session,
+    team_id: int,
+    amount: int = 1,
+) -> bool:
+    """
+    Adjust the stored tally of a team inside the caller's transaction.
+
+    Args:
+        session: Database session, committed by the caller
+        team_id: Team whose tally changes
+        amount: Number of votes to add (negative to remove)
+
+    Returns:
+        bool: False if the team does not exist
+    """
+    stmt = (
+        update(Team)
+        .where(Team.id == team_id)
+        .values(votes_count=Team.votes_count + amount)
+    )
+    return session.execute(stmt).rowcount == 1
+
+
+def remove_vote(
+    session: Session,
+    team_id: int,
+) -> bool:
+    return add_vote(session, team_id, amount=-1)
+
+
+def remove_member(
+    session: Session,
+    member_id: int,
+) -> bool:
+    """
+    Delete a member and withdraw their vote inside the caller's transaction.
+
+    Args:
+        session: Database session, committed by the caller
+        member_id: Member to delete
+
+    Returns:
+        bool: False if the member does not exist (anymore)
+
+    Note:
+        The tally is corrected for the vote the DELETE returns, not the
+        one loaded with the member, so a concurrent vote or rollback
+        cannot skew it
+    """
+    stmt = delete(Member).where(Member.id == member_id).returning(Member.vote_id)
+    deleted = session.execute(stmt).one_or_none()
+    if deleted is None:
+        return False
+    if deleted.vote_id is not None:
+        remove_vote(session, deleted.vote_id)
+    return True
+
+
+def mark_voted(
+    session: Session,
+    member_id: int,
+    team_id: int,
+) -> bool:
+    """
+    Record a member's vote inside the caller's transaction.
+
+    Args:
+        session: Database session, committed by the caller
+        member_id: Voting member
+        team_id: Team receiving the vote
+
+    Returns:
+        bool: False if the member has already voted or belongs to the team
+
+    Note:
+        A single conditional UPDATE, concurrent votes of the same
+        member cannot both succeed
+    """
+    stmt = (
+        update(Member)
+        .where(
+            Member.id == member_id,
+            Member.has_voted.is_(False),
+            or_(Member.team_id.is_(None), Member.team_id != team_id),
+        )
+        .values(vote_id=team_id, has_voted=True)
+        .execution_options(synchronize_session=False)
+    )
+    return session.execute(stmt).rowcount == 1
+
+
+def get_tally(session: Session) -> list[dict]:
+    """
+    Read the stored tally of every team that has at least one vote.
+
+    Returns:
+        list: Teams with their vote counts in format:
+              [{'name': 'Team Name', 'stats': {'votes': count}}]
+    """
+    stmt = (
+        select(Team.name, Team.votes_count)
+        .where(Team.votes_count > 0)
+        .order_by(Team.name)
+    )
+    return [
+        {
+            "name": name,
+            "stats": {"votes": votes},
+        }
+        for name, votes in session.execute(stmt)
+    ]
+
+
+def percent(part: int, whole: int) -> float:
+    return round(part * 100 / whole, 1) if whole else 0.0
+
+
+def get_results(session: Session) -> dict:
+    """
+    Read the standings of every team, voted for or not, and the turnout.
+
+    Returns:
+        dict: Teams ranked by votes with their share, in format:
+              {'teams': [{'id': 1, 'name': 'Team Name', 'avatar': None,
+                          'votes': count, 'share': percent, 'rank': rank}],
+               'votes': total, 'voted': members, 'registered': members,
+               'turnout': percent}
+
+    Note:
+        A single statement over the stored tally, rank and total are
+        window functions and the member counts are joined to every row
+    """
+    members = select(
+        func.count(Member.id).label("registered"),
+        func.count(case((Member.has_voted.is_(True), Member.id))).label("voted"),
+    ).subquery()
+    stmt = (
+        select(
+            members.c.registered,
+            members.c.voted,
+            Team.id,
+            Team.name,
+            Team.avatar,
+            Team.votes_count,
+            func.rank().over(order_by=Team.votes_count.desc()),
+            func.sum(Team.votes_count).over(),
+        )
+        # outer join, the member counts are read even without teams
+        .select_from(members)
+        .outerjoin(Team, true())
+        .order_by(Team.votes_count.desc(), Team.name)
+    )
+    rows = session.execute(stmt).all()
+    registered, voted = rows[0][:2]
+    total = int(rows[0][7] or 0)
+    return {
+        "teams": [
+            {
+                "id": team_id,
+                "name": name,
+                "avatar": avatar,
+                "votes": votes,
+                "share": percent(votes, total),
+                "rank": rank,
+            }
+            for _, _, team_id, name, avatar, votes, rank, _ in rows
+            if team_id is not None
+        ],
+        "votes": total,
+        "voted": voted,
+        "registered": registered,
+        "turnout": percent(voted, registered),
+    }
+
+
+def reconcile_tally(session: Session) -> None:
+    """
+    Rebuild every stored tally from members.vote_id.
+
+    Note:
+        Runs a single correlated UPDATE, use it after manual data fixes
+        or when the tally is suspected to have drifted
+    """
+    votes = (
+        select(func.count(Member.id)).where(Member.vote_id == Team.id).scalar_subquery()
+    )
+    session.execute(
+        update(Team).values(votes_count=votes),
+    )
+    session.commit()
+    response_cache.invalidate(VOTES)
+    logger.warning(
+        "Vote tally has been reconciled",
+        extra={"event": "tally.reconciled", "audit": True},
+    )
+
+
+if __name__ == "__main__":
+    from core.get_db import get_db
+
+    logging.basicConfig(level=logging.INFO)
+    with get_db.session_factory() as db_session:
+        reconcile_tally(db_session)
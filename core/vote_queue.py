@@ -0,0 +1,274 @@
+import asyncio
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Literal
+
+from sqlalchemy import select, update, bindparam, or_
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from core.auth_cache import member_cache
+from core.config import settings
+from core.db_models import Member, Team
+from core.get_db import DatabaseHelper
+from core.live_results import results_broadcaster
+from core.response_cache import response_cache, VOTES
+from core.tally import add_vote, remove_vote, mark_voted
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+VoteOutcome = Literal["accepted", "rejected", "team_not_found"]
+
+
+@dataclass
+class PendingVote:
+    member_id: int
+    token: bytes
+    team_id: int
+    future: asyncio.Future = field(repr=False)
+
+
+class VoteQueue:
+    """
+    Write-behind ingestion of votes.
+
+    Votes are appended to an asyncio queue and written by a single
+    flusher in batched transactions, one commit per `max_batch` votes or
+    `flush_interval` seconds. `submit` returns only after the commit
+    of the batch holding the vote, so an accepted vote is durable.
+    """
+
+    def __init__(
+        self,
+        flush_interval: float = 0.01,
+        max_batch: int = 500,
+    ) -> None:
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._queue: asyncio.Queue[PendingVote] | None = None
+        self._flusher: asyncio.Task | None = None
+        self._database: DatabaseHelper | None = None
+        # members with a vote waiting for the flush
+        self._pending: set[int] = set()
+
+    @staticmethod
+    def flush_each(
+        session: Session,
+        batch: list[PendingVote],
+    ) -> list[VoteOutcome]:
+        outcomes: list[VoteOutcome] = []
+        for vote in batch:
+            if not add_vote(session, vote.team_id):
+                outcomes.append("team_not_found")
+            elif not mark_voted(session, vote.member_id, vote.team_id):
+                # the batch goes on, only this increment is taken back
+                remove_vote(session, vote.team_id)
+                outcomes.append("rejected")
+            else:
+                outcomes.append("accepted")
+        return outcomes
+
+    @staticmethod
+    def flush_bulk(
+        session: Session,
+        batch: list[PendingVote],
+    ) -> list[VoteOutcome] | None:
+        """
+        Write a batch with one executemany UPDATE of the members.
+
+        Returns:
+            list: Outcome of every vote, None if the members changed between
+            the lookup and the UPDATE (nothing is written then)
+        """
+        teams = set(
+            session.scalars(
+                select(Team.id).where(Team.id.in_({vote.team_id for vote in batch})),
+            ),
+        )
+        members = {
+            member_id: (has_voted, team_id)
+            for member_id, has_voted, team_id in session.execute(
+                select(Member.id, Member.has_voted, Member.team_id).where(
+                    Member.id.in_([vote.member_id for vote in batch]),
+                ),
+            )
+        }
+        outcomes: list[VoteOutcome] = []
+        accepted: list[PendingVote] = []
+        for vote in batch:
+            has_voted, team_id = members.get(vote.member_id, (True, None))
+            if vote.team_id not in teams:
+                outcomes.append("team_not_found")
+            elif has_voted or team_id == vote.team_id:
+                outcomes.append("rejected")
+            else:
+                # a member voting twice in a batch is rejected the second time
+                members[vote.member_id] = (True, team_id)
+                outcomes.append("accepted")
+                accepted.append(vote)
+        if not accepted:
+            return outcomes
+
+        members_table = Member.__table__
+        stmt = (
+            update(members_table)
+            .where(
+                members_table.c.id == bindparam("b_member_id"),
+                members_table.c.has_voted.is_(False),
+                or_(
+                    members_table.c.team_id.is_(None),
+                    members_table.c.team_id != bindparam("b_team_id"),
+                ),
+            )
+            .values(vote_id=bindparam("b_team_id"), has_voted=True)
+        )
+        result = session.execute(
+            stmt,
+            [
+                {"b_member_id": vote.member_id, "b_team_id": vote.team_id}
+                for vote in accepted
+            ],
+        )
+        if result.rowcount != len(accepted):
+            session.rollback()
+            return None
+        for team_id, votes in Counter(vote.team_id for vote in accepted).items():
+            add_vote(session, team_id, votes)
+        return outcomes
+
+    @classmethod
+    def flush(
+        cls,
+        database: DatabaseHelper,
+        batch: list[PendingVote],
+    ) -> list[VoteOutcome]:
+        """
+        Write a batch of votes in a single transaction.
+
+        Returns:
+            list: Outcome of every vote, in batch order
+
+        Note:
+            Without a reliable executemany rowcount, or when a member
+            changed concurrently, the votes are written one by one
+        """
+        with database.session_factory() as session:
+            outcomes = None
+            if database.engine.dialect.supports_sane_multi_rowcount:
+                outcomes = cls.flush_bulk(session, batch)
+            if outcomes is None:
+                outcomes = cls.flush_each(session, batch)
+            session.commit()
+        return outcomes
+
+    @staticmethod
+    def committed(tokens: list[bytes]) -> None:
+        """
+        Evict the members of the accepted votes and publish the new tally.
+        """
+        for token in tokens:
+            member_cache.invalidate(token)
+        response_cache.invalidate(VOTES)
+        results_broadcaster.notify()
+
+    def _bind(self, database: DatabaseHelper) -> None:
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._flusher = None
+            self._pending.clear()
+        self._database = database
+        if self._flusher is None or self._flusher.done():
+            self._flusher = asyncio.create_task(self._run())
+
+    async def _next_batch(self) -> list[PendingVote]:
+        batch = [await self._queue.get()]
+        deadline = self._loop.time() + self.flush_interval
+        while len(batch) < self.max_batch:
+            timeout = deadline - self._loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except TimeoutError:
+                break
+        return batch
+
+    async def _run(self) -> None:
+        while True:
+            batch = await self._next_batch()
+            try:
+                outcomes = await run_in_threadpool(self.flush, self._database, batch)
+            except Exception as exc:
+                logger.exception("Failed to flush %s votes", len(batch))
+                outcomes = [exc] * len(batch)
+            accepted = [
+                vote.token
+                for vote, outcome in zip(batch, outcomes)
+                if outcome == "accepted"
+            ]
+            if accepted:
+                try:
+                    # a shared state store writes every stamp, keep the
+                    # event loop out of it
+                    await run_in_threadpool(self.committed, accepted)
+                except Exception:
+                    logger.exception("Failed to invalidate %s votes", len(accepted))
+            for vote, outcome in zip(batch, outcomes):
+                self._pending.discard(vote.member_id)
+                if not vote.future.done():
+                    if isinstance(outcome, Exception):
+                        vote.future.set_exception(outcome)
+                    else:
+                        vote.future.set_result(outcome)
+                self._queue.task_done()
+
+    async def submit(
+        self,
+        database: DatabaseHelper,
+        member_id: int,
+        token: bytes,
+        team_id: int,
+    ) -> VoteOutcome:
+        """
+        Queue a vote and wait until it is committed.
+
+        Args:
+            database: Database the votes are written to
+            member_id: Voting member
+            token: Stored token of the member, evicted from the cache on success
+            team_id: Team receiving the vote
+
+        Returns:
+            VoteOutcome: "rejected" if the member has already voted (or has
+            a vote in flight) or belongs to the team, "team_not_found" if
+            the team does not exist
+        """
+        self._bind(database)
+        if member_id in self._pending:
+            return "rejected"
+        self._pending.add(member_id)
+        future = self._loop.create_future()
+        await self._queue.put(PendingVote(member_id, token, team_id, future))
+        # the vote is written even if the client goes away
+        return await asyncio.shield(future)
+
+    async def close(self) -> None:
+        """
+        Wait for the queued votes to be flushed and stop the flusher.
+        """
+        if self._flusher is None or self._loop is not asyncio.get_running_loop():
+            return
+        await self._queue.join()
+        self._flusher.cancel()
+        self._flusher = None
+
+
+vote_queue = VoteQueue(
+    flush_interval=settings.vote_queue.flush_interval,
+    max_batch=settings.vote_queue.max_batch,
+)
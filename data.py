@@ -1,5 +1,13 @@
+import hashlib
 import secrets
 
 
 def generate_token() -> str:
     return secrets.token_hex(32)
+
+
+def hash_token(token: str) -> bytes:
+    """
+    Key a member token is stored and looked up by, 32 bytes for any token.
+    """
+    return hashlib.sha256(token.encode()).digest()
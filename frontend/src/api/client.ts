@@ -3,13 +3,15 @@ import {
   Member, 
   Team, 
   TeamWithMembers, 
-  VotingResult, 
+  VotingResults, 
   MemberRegistration, 
   MemberUpdate,
   TeamCreate,
   TeamUpdate,
   AdminMemberCreate,
-  AdminMemberUpdate 
+  AdminMemberUpdate,
+  MemberFilters,
+  MemberPage 
 } from '@/types'
 
 class VotingAPIClient {
@@ -86,8 +88,8 @@ class VotingAPIClient {
     await this.client.post('/voting/rollback/')
   }
 
-  async getVotingResults(): Promise<VotingResult[]> {
-    const response = await this.client.get('/voting/count')
+  async getVotingResults(): Promise<VotingResults> {
+    const response = await this.client.get('/voting/results')
     return response.data
   }
 
@@ -123,11 +125,25 @@ class VotingAPIClient {
   }
 
   // Admin Endpoints
-  async getMembers(apiKey: string): Promise<Member[]> {
+  async getMembers(
+    apiKey: string,
+    params: MemberFilters & { limit?: number; after_id?: number } = {}
+  ): Promise<MemberPage> {
     const response = await this.client.get('/admin/members', {
-      headers: { 'x-api-key': apiKey }
+      headers: { 'x-api-key': apiKey },
+      params,
+      // an empty first page is answered with 404
+      validateStatus: (status) => status < 400 || status === 404,
     })
-    return response.data
+    if (response.status === 404) {
+      return { members: [], total: 0, nextCursor: null }
+    }
+    const nextCursor = response.headers['x-next-cursor']
+    return {
+      members: response.data,
+      total: Number(response.headers['x-total-count'] ?? response.data.length),
+      nextCursor: nextCursor ? Number(nextCursor) : null,
+    }
   }
 
   async getMember(memberId: number, apiKey: string): Promise<Member> {
@@ -1,4 +1,4 @@
-import { useQuery, useMutation, useQueryClient } from '@tanstack/react-query'
+import { useQuery, useInfiniteQuery, useMutation, useQueryClient } from '@tanstack/react-query'
 import { apiClient } from '@/api/client'
 import { queryKeys } from '@/types'
 import { useToast } from '@/hooks/use-toast'
@@ -8,7 +8,8 @@ import type {
   TeamCreate, 
   TeamUpdate,
   AdminMemberCreate,
-  AdminMemberUpdate 
+  AdminMemberUpdate,
+  MemberFilters 
 } from '@/types'
 
 // Member/User Hooks
@@ -237,9 +238,22 @@ export const useGenerateToken = () => {
 }
 
 export const useAdminMembers = (apiKey: string | null) => {
-  return useQuery({
+  return useInfiniteQuery({
     queryKey: queryKeys.adminMembers,
-    queryFn: () => apiClient.getMembers(apiKey!),
+    queryFn: ({ pageParam }) =>
+      apiClient.getMembers(apiKey!, pageParam === null ? {} : { after_id: pageParam }),
+    initialPageParam: null as number | null,
+    getNextPageParam: (lastPage) => lastPage.nextCursor,
+    enabled: !!apiKey,
+    staleTime: 30 * 1000, // 30 seconds
+  })
+}
+
+export const useAdminMembersCount = (apiKey: string | null, filters: MemberFilters = {}) => {
+  return useQuery({
+    queryKey: queryKeys.adminMembersCount(filters),
+    // the total is sent with every page, a single row is enough
+    queryFn: async () => (await apiClient.getMembers(apiKey!, { ...filters, limit: 1 })).total,
     enabled: !!apiKey,
     staleTime: 30 * 1000, // 30 seconds
   })
@@ -10,6 +10,7 @@ import { useToast } from '@/hooks/use-toast'
 import { 
   useGenerateToken, 
   useAdminMembers, 
+  useAdminMembersCount,
   useCreateTeam,
   useDeleteTeam,
   useCreateAdminMember,
@@ -35,7 +36,13 @@ export default function AdminPage() {
 
   // Hooks
   const generateTokenMutation = useGenerateToken()
-  const { data: members } = useAdminMembers(isAuthenticated ? apiKey : null)
+  const membersQuery = useAdminMembers(isAuthenticated ? apiKey : null)
+  const members = membersQuery.data?.pages.flatMap((page) => page.members)
+  const { data: membersCount } = useAdminMembersCount(isAuthenticated ? apiKey : null)
+  const { data: votesCount } = useAdminMembersCount(
+    isAuthenticated ? apiKey : null,
+    { has_voted: true }
+  )
   const { data: teams } = useTeams()
   const createTeamMutation = useCreateTeam()
   const deleteTeamMutation = useDeleteTeam()
@@ -383,6 +390,16 @@ export default function AdminPage() {
                       </div>
                     </div>
                   ))}
+                  {membersQuery.hasNextPage && (
+                    <Button
+                      variant="outline"
+                      className="w-full"
+                      onClick={() => membersQuery.fetchNextPage()}
+                      disabled={membersQuery.isFetchingNextPage}
+                    >
+                      {membersQuery.isFetchingNextPage ? 'Loading...' : 'Load More'}
+                    </Button>
+                  )}
                 </div>
               </CardContent>
             </Card>
@@ -401,12 +418,12 @@ export default function AdminPage() {
                     <div className="text-gray-500">Total Teams</div>
                   </div>
                   <div className="text-center">
-                    <div className="text-3xl font-bold text-green-600">{members?.length || 0}</div>
+                    <div className="text-3xl font-bold text-green-600">{membersCount || 0}</div>
                     <div className="text-gray-500">Total Members</div>
                   </div>
                   <div className="text-center">
                     <div className="text-3xl font-bold text-purple-600">
-                      {members?.filter(m => m.has_voted).length || 0}
+                      {votesCount || 0}
                     </div>
                     <div className="text-gray-500">Votes Cast</div>
                   </div>
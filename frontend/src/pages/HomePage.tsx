@@ -2,14 +2,14 @@ import { motion } from 'framer-motion'
 import { Link } from 'react-router-dom'
 import { Button } from '@/components/ui/button'
 import { Card, CardContent, CardHeader, CardTitle } from '@/components/ui/card'
-import { useTeams, useVotingResults } from '@/hooks/api'
+import { useVotingResults } from '@/hooks/api'
 import { Vote, Users, BarChart, QrCode } from 'lucide-react'
 
 export default function HomePage() {
-  const { data: teams } = useTeams()
   const { data: votingResults } = useVotingResults(60000) // Refresh every minute
 
-  const totalVotes = votingResults?.reduce((sum, result) => sum + result.stats.votes, 0) || 0
+  const teams = votingResults?.teams
+  const totalVotes = votingResults?.votes || 0
 
   return (
     <div className="min-h-screen bg-gradient-to-br from-blue-50 to-indigo-100">
@@ -162,7 +162,7 @@ export default function HomePage() {
               <Card>
                 <CardContent className="p-8">
                   <div className="text-4xl font-bold text-purple-600 mb-2">
-                    {votingResults?.length || 0}
+                    {teams?.filter((team) => team.votes > 0).length || 0}
                   </div>
                   <div className="text-gray-600">Teams with Votes</div>
                 </CardContent>
@@ -1,13 +1,12 @@
 import { motion } from 'framer-motion'
 import { Card, CardContent, CardHeader, CardTitle } from '@/components/ui/card'
 import { Button } from '@/components/ui/button'
-import { useVotingResults, useTeams } from '@/hooks/api'
+import { useVotingResults } from '@/hooks/api'
 import { BarChart3, TrendingUp, Trophy, Download, RefreshCw } from 'lucide-react'
 import { useState, useEffect } from 'react'
 
 export default function ResultsPage() {
   const { data: votingResults, refetch, isRefetching } = useVotingResults(30000) // Auto-refresh every 30 seconds
-  const { data: teams } = useTeams()
   const [lastUpdated, setLastUpdated] = useState<Date>(new Date())
 
   useEffect(() => {
@@ -16,16 +15,17 @@ export default function ResultsPage() {
     }
   }, [votingResults])
 
-  const totalVotes = votingResults?.reduce((sum, result) => sum + result.stats.votes, 0) || 0
-  const sortedResults = votingResults?.sort((a, b) => b.stats.votes - a.stats.votes) || []
+  // every team, ranked by the server, teams without votes included
+  const teams = votingResults?.teams
+  const totalVotes = votingResults?.votes || 0
+  const sortedResults = teams?.filter((team) => team.votes > 0) || []
 
   const exportResults = () => {
     const csvContent = [
       'Rank,Team,Votes,Percentage',
-      ...sortedResults.map((result, index) => {
-        const percentage = totalVotes > 0 ? ((result.stats.votes / totalVotes) * 100).toFixed(1) : '0.0'
-        return `${index + 1},${result.name},${result.stats.votes},${percentage}%`
-      })
+      ...(teams || []).map((result) =>
+        `${result.rank},${result.name},${result.votes},${result.share.toFixed(1)}%`
+      )
     ].join('\n')
 
     const blob = new Blob([csvContent], { type: 'text/csv' })
@@ -124,9 +124,9 @@ export default function ResultsPage() {
           <Card>
             <CardContent className="p-6 text-center">
               <div className="text-3xl font-bold text-purple-600 mb-2">
-                {(teams?.length || 0) > 0 ? Math.round(((votingResults?.length || 0) / (teams?.length || 1)) * 100) : 0}%
+                {Math.round(votingResults?.turnout || 0)}%
               </div>
-              <div className="text-gray-600">Participation</div>
+              <div className="text-gray-600">Turnout</div>
             </CardContent>
           </Card>
           
@@ -163,12 +163,12 @@ export default function ResultsPage() {
               ) : (
                 <div className="space-y-4">
                   {sortedResults.map((result, index) => {
-                    const rank = index + 1
-                    const percentage = totalVotes > 0 ? ((result.stats.votes / totalVotes) * 100) : 0
+                    const rank = result.rank
+                    const percentage = result.share
                     
                     return (
                       <motion.div
-                        key={result.name}
+                        key={result.id}
                         initial={{ opacity: 0, x: -20 }}
                         animate={{ opacity: 1, x: 0 }}
                         transition={{ delay: index * 0.1 }}
@@ -183,7 +183,7 @@ export default function ResultsPage() {
                             <h3 className="font-semibold text-lg">{result.name}</h3>
                             <div className="text-right">
                               <div className="text-2xl font-bold text-blue-600">
-                                {result.stats.votes}
+                                {result.votes}
                               </div>
                               <div className="text-sm text-gray-500">
                                 {percentage.toFixed(1)}%
@@ -224,9 +224,8 @@ export default function ResultsPage() {
             
             <div className="grid grid-cols-1 md:grid-cols-2 lg:grid-cols-3 gap-6">
               {teams.map((team) => {
-                const teamResult = votingResults?.find(result => result.name === team.name)
-                const votes = teamResult?.stats.votes || 0
-                const rank = sortedResults.findIndex(result => result.name === team.name) + 1 || 'N/A'
+                const votes = team.votes
+                const rank = votes > 0 ? team.rank : 'N/A'
                 
                 return (
                   <motion.div
@@ -267,7 +266,7 @@ export default function ResultsPage() {
                           <div className="flex justify-between items-center">
                             <span className="text-gray-600">Vote Share</span>
                             <span className="font-semibold">
-                              {totalVotes > 0 ? ((votes / totalVotes) * 100).toFixed(1) : 0}%
+                              {team.share.toFixed(1)}%
                             </span>
                           </div>
                           
@@ -275,7 +274,7 @@ export default function ResultsPage() {
                             <div className="w-full bg-gray-200 rounded-full h-2">
                               <div
                                 className="bg-blue-500 h-2 rounded-full transition-all duration-1000"
-                                style={{ width: `${totalVotes > 0 ? (votes / totalVotes) * 100 : 0}%` }}
+                                style={{ width: `${team.share}%` }}
                               />
                             </div>
                           )}
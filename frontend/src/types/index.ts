@@ -28,6 +28,20 @@ export interface VotingResult {
   }
 }
 
+export interface TeamResult extends Team {
+  votes: number
+  share: number
+  rank: number
+}
+
+export interface VotingResults {
+  teams: TeamResult[]
+  votes: number
+  voted: number
+  registered: number
+  turnout: number
+}
+
 // API Request Types
 export interface MemberRegistration {
   name: string
@@ -62,6 +76,18 @@ export interface AdminMemberUpdate {
   token?: string
 }
 
+export interface MemberFilters {
+  has_voted?: boolean
+  team_id?: number
+  username?: string
+}
+
+export interface MemberPage {
+  members: Member[]
+  total: number
+  nextCursor: number | null
+}
+
 // Component Props Types
 export interface QRCodeProps {
   value: string
@@ -104,5 +130,6 @@ export const queryKeys = {
   teamMembers: (id: number) => ['teams', id, 'members'] as const,
   votingResults: ['voting', 'results'] as const,
   adminMembers: ['admin', 'members'] as const,
+  adminMembersCount: (filters: MemberFilters) => ['admin', 'members', 'count', filters] as const,
   adminMember: (id: number) => ['admin', 'member', id] as const,
 } as const
\ No newline at end of file
@@ -2,32 +2,40 @@ from fastapi import FastAPI
 import uvicorn
 from core.config import settings
 from api.v1 import router as api_v1
+from api.metrics import router as metrics_router
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
-from core.get_db import get_db
+from api.dependencies import get_database
+from core.get_db import get_db, size_threadpool
+from core.metrics import metrics, MetricsMiddleware
+from core.log import log_pipeline, AccessLogMiddleware
+from core.vote_queue import vote_queue
+from core.rate_limit import rate_limiter
 
 import logging
 
 logger = logging.getLogger(__name__)
 
 
-def configure_logger(
-    level: int = logging.INFO,
-) -> None:
-    logging.basicConfig(
-        level=level,
-        datefmt="%Y-%m-%d %H:%M:%S",
-        format="[%(asctime)s,%(msecs)03d] - %(module)s - %(levelname)s: %(message)s.",
-    )
-
-
 @asynccontextmanager
 async def lifespan(app_instance: FastAPI):  # type: ignore
-    logger.info("Creating database")
-    get_db.create_database()
+    # started in every worker, uvicorn configures its loggers before
+    log_pipeline.start(settings.log)
+    # the database the routes are served from
+    database = app_instance.dependency_overrides.get(get_database, get_database)()
+    if settings.db.migrate_on_startup:
+        database.create_database()
+    else:
+        # migrations run once, before the release, see core.migrations
+        logger.info("Database schema is at version %s", database.check_schema())
+    limiter = size_threadpool(database, settings.runtime.threadpool_size)
+    if settings.metrics.enabled:
+        metrics.watch_threadpool(limiter)
     yield
-    logger.info("Deleting database")
-    get_db.dispose_database()
+    await vote_queue.close()
+    database.dispose()
+    await database.async_dispose()
+    log_pipeline.stop()
 
 
 app = FastAPI(
@@ -42,15 +50,63 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # pagination headers of GET /admin/members
+    expose_headers=["X-Total-Count", "X-Next-Cursor"],
 )
 
+if settings.log.access_log:
+    app.add_middleware(AccessLogMiddleware)  # type: ignore
+
+if settings.metrics.enabled:
+    metrics.instrument(get_db.engine)
+    if get_db.async_engine is not None:
+        metrics.instrument(get_db.async_engine.sync_engine, name="async")
+    if get_db.read_replica is not None:
+        metrics.instrument(get_db.read_replica.engine, name="read")
+        if get_db.read_replica.async_engine is not None:
+            metrics.instrument(
+                get_db.read_replica.async_engine.sync_engine, name="read_async"
+            )
+    metrics.watch_rate_limiter(rate_limiter)
+    app.include_router(metrics_router)
+    # outermost, the latency includes the other middlewares
+    app.add_middleware(
+        MetricsMiddleware,  # type: ignore
+        metrics=metrics,
+        server_timing=settings.metrics.server_timing,
+    )
+
 if __name__ == "__main__":
-    configure_logger(level=logging.INFO)
+    log_pipeline.start(settings.log)
+    if settings.runtime.workers > 1 and settings.state.backend == "memory":
+        raise SystemExit(
+            "Several workers need a shared state store, "
+            "set CONFIG__STATE__BACKEND=sqlite",
+        )
+    if (
+        settings.runtime.workers > 1
+        and settings.rate_limit.enabled
+        and settings.rate_limit.backend == "local"
+    ):
+        logger.warning(
+            "Rate limits are kept per worker, a client gets up to %s times its rate, "
+            "set CONFIG__RATE_LIMIT__BACKEND=shared",
+            settings.runtime.workers,
+        )
     logger.info("Starting server")
     uvicorn.run(
         "main:app",
         host=settings.runtime.host,
         port=settings.runtime.port,
-        reload=settings.runtime.reload,
+        # uvicorn cannot reload a multi-process server
+        reload=settings.runtime.reload and settings.runtime.workers == 1,
+        workers=settings.runtime.workers,
+        # client addresses, rate limits and logs, come from X-Forwarded-For
+        # of these proxies only
+        proxy_headers=True,
+        forwarded_allow_ips=settings.runtime.forwarded_allow_ips,
+        # requests are logged by AccessLogMiddleware
+        access_log=not settings.log.access_log,
     )
     logger.info("Shutting down server")
+    log_pipeline.stop()
@@ -1,12 +1,16 @@
+from contextlib import contextmanager
+
 from sqlalchemy import StaticPool
 
 from core.get_db import DatabaseHelper, get_db
+from api.dependencies import get_database
 from main import app
 from fastapi.testclient import TestClient
 import pytest
 from typing import Generator
 
-from core.config import settings
+from core.config import settings, QueryDebugConfig
+from core.query_debug import capture_queries
 
 
 # in memory sqlite3 database
@@ -18,6 +22,8 @@ db_testing = DatabaseHelper(
     poolclass=StaticPool,
     echo_pool=True,
     echo=True,
+    # log N+1 patterns of the routes under test
+    query_debug=QueryDebugConfig(enabled=True),
 )
 
 
@@ -29,6 +35,8 @@ def setup_and_teardown() -> Generator[None, None, None]:
 
 
 app.dependency_overrides[get_db.session_getter] = db_testing.session_getter  # type: ignore
+app.dependency_overrides[get_db.read_session_getter] = db_testing.read_session_getter  # type: ignore
+app.dependency_overrides[get_database] = lambda: db_testing
 
 
 @pytest.fixture(scope="session")
@@ -41,3 +49,19 @@ def client() -> Generator[TestClient, None, None]:
         app=app, base_url=f"http://{settings.runtime.host}:{settings.runtime.port}"
     ) as client:
         yield client
+
+
+@pytest.fixture
+def assert_max_queries():
+    """
+    Fixture to fail a test if a block runs more statements than its budget
+    :return: context manager taking the budget, yields the QueryLog
+    """
+
+    @contextmanager
+    def _assert_max_queries(n: int):
+        with capture_queries(db_testing.engine) as log:
+            yield log
+        assert len(log) <= n, f"expected at most {n} statements, got {log.report()}"
+
+    return _assert_max_queries
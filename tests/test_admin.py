@@ -1,3 +1,4 @@
+import json
 import pytest
 from http import HTTPStatus
 from fastapi.testclient import TestClient
@@ -171,3 +172,171 @@ def test_create_user_with_min_name_length(client: TestClient, auth_headers):
     )
     assert resp.status_code == HTTPStatus.CREATED
     assert resp.json()["name"] == "A"
+
+
+def test_auth_cache_invalidated_by_update(client: TestClient, auth_headers):
+    create_resp = client.post(
+        "/v1/admin/member",
+        json={
+            "name": "Cached",
+            "username": "cached123",
+            "has_joined_team": False,
+            "token": "tok_cached",
+            "team_id": None,
+        },
+        headers=auth_headers,
+    )
+    member_id = create_resp.json()["id"]
+    cookies = {"users-token": "tok_cached"}
+
+    client.get("/v1/users/me", cookies=cookies)
+    hits = client.get("/v1/admin/auth-cache", headers=auth_headers).json()["hits"]
+    resp = client.get("/v1/users/me", cookies=cookies)
+    assert resp.json()["name"] == "Cached"
+    stats = client.get("/v1/admin/auth-cache", headers=auth_headers).json()
+    assert stats["hits"] == hits + 1
+
+    client.patch(
+        f"/v1/admin/member/{member_id}",
+        json={"name": "Renamed", "token": "tok_cached_new"},
+        headers=auth_headers,
+    )
+    resp = client.get("/v1/users/me", cookies=cookies)
+    assert resp.status_code == HTTPStatus.UNAUTHORIZED
+    resp = client.get("/v1/users/me", cookies={"users-token": "tok_cached_new"})
+    assert resp.json()["name"] == "Renamed"
+
+    client.delete(f"/v1/admin/member/{member_id}", headers=auth_headers)
+    resp = client.get("/v1/users/me", cookies={"users-token": "tok_cached_new"})
+    assert resp.status_code == HTTPStatus.UNAUTHORIZED
+
+
+def test_create_users_bulk(client: TestClient, auth_headers):
+    rows = [
+        {"name": f"Bulk{i}", "username": f"bulk{i}", "token": f"tok_bulk{i}"}
+        for i in range(3)
+    ]
+    rows += [
+        {"name": "Dup", "username": "bulk0", "token": "tok_bulk_dup"},
+        {"name": "Taken", "username": "john123", "token": "tok_bulk_taken"},
+        {
+            "name": "Team",
+            "username": "bulk_team",
+            "token": "t",
+            "has_joined_team": True,
+        },
+        {"name": "NoUsername", "token": "tok_bulk_nouser"},
+    ]
+    resp = client.post("/v1/admin/members/bulk", json=rows, headers=auth_headers)
+    assert resp.status_code == HTTPStatus.OK
+    body = resp.json()
+    assert (body["created"], body["rejected"]) == (3, 4)
+    statuses = [result["status"] for result in body["results"]]
+    assert statuses == ["created"] * 3 + ["rejected"] * 4
+    assert body["results"][3]["detail"] == "Duplicate username in request"
+    assert body["results"][4]["detail"] == "A member with that username already exists"
+
+    member_id = body["results"][0]["id"]
+    resp = client.get(f"/v1/admin/member/{member_id}", headers=auth_headers)
+    assert resp.json()["username"] == "bulk0"
+
+
+def test_create_users_bulk_ndjson(client: TestClient, auth_headers):
+    lines = [
+        '{"name": "Nd1", "username": "ndjson1", "token": "tok_nd1"}',
+        "not json",
+        '{"name": "Nd2", "username": "ndjson2", "token": "tok_nd2"}',
+    ]
+    resp = client.post(
+        "/v1/admin/members/bulk",
+        content="\n".join(lines) + "\n",
+        headers={**auth_headers, "content-type": "application/x-ndjson"},
+    )
+    assert resp.status_code == HTTPStatus.OK
+    results = resp.json()["results"]
+    assert [result["status"] for result in results] == [
+        "created",
+        "rejected",
+        "created",
+    ]
+    assert results[1]["detail"] == "Malformed row"
+
+
+def test_get_members_keyset_pages(client: TestClient, auth_headers, assert_max_queries):
+    rows = [
+        {"name": f"Page{i}", "username": f"page_{i}", "token": f"tok_page{i}"}
+        for i in range(5)
+    ]
+    client.post("/v1/admin/members/bulk", json=rows, headers=auth_headers)
+
+    usernames, cursor = [], None
+    while True:
+        params = {"limit": 2, "username": "page_"}
+        if cursor is not None:
+            params["after_id"] = cursor
+        with assert_max_queries(2):
+            resp = client.get("/v1/admin/members", params=params, headers=auth_headers)
+        assert resp.status_code == HTTPStatus.OK
+        assert resp.headers["x-total-count"] == "5"
+        usernames += [member["username"] for member in resp.json()]
+        cursor = resp.headers.get("x-next-cursor")
+        if cursor is None:
+            break
+    assert usernames == [f"page_{i}" for i in range(5)]
+
+
+def test_get_members_filters(client: TestClient, auth_headers):
+    resp = client.get(
+        "/v1/admin/members",
+        params={"username": "page_", "has_voted": True},
+        headers=auth_headers,
+    )
+    assert resp.status_code == HTTPStatus.NOT_FOUND
+
+    # the prefix is matched literally
+    resp = client.get(
+        "/v1/admin/members",
+        params={"username": "page%"},
+        headers=auth_headers,
+    )
+    assert resp.status_code == HTTPStatus.NOT_FOUND
+
+
+def test_export_members(client: TestClient, auth_headers, assert_max_queries):
+    client.post("/v1/teams", headers=auth_headers, json={"name": "Export"})
+    team_id = next(
+        team["id"]
+        for team in client.get("/v1/teams").json()
+        if team["name"] == "Export"
+    )
+    rows = [
+        {"name": "Exp", "username": "export_0", "token": "tok_export0"},
+        {
+            "name": "Exp",
+            "username": "export_1",
+            "token": "tok_export1",
+            "has_joined_team": True,
+            "team_id": team_id,
+        },
+    ]
+    client.post("/v1/admin/members/bulk", json=rows, headers=auth_headers)
+
+    with assert_max_queries(1):
+        resp = client.get("/v1/admin/members/export", headers=auth_headers)
+    assert resp.status_code == HTTPStatus.OK
+    assert resp.headers["content-type"] == "application/x-ndjson"
+    exported = {row["username"]: row for row in map(json.loads, resp.text.splitlines())}
+    assert exported["export_0"]["team"] is None
+    assert exported["export_1"]["team"] == "Export"
+    assert exported["export_1"]["vote"] is None
+
+    resp = client.get(
+        "/v1/admin/members/export",
+        params={"format": "csv"},
+        headers=auth_headers,
+    )
+    assert resp.status_code == HTTPStatus.OK
+    lines = resp.text.splitlines()
+    assert lines[0] == "id,name,username,has_joined_team,team,has_voted,vote"
+    assert any(line.endswith(",Exp,export_1,True,Export,False,") for line in lines)
+    assert len(lines) == len(exported) + 1
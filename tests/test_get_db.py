@@ -0,0 +1,127 @@
+import asyncio
+import logging
+import time
+
+import pytest
+from pydantic import TypeAdapter
+from sqlalchemy import text, select
+from starlette.requests import Request
+from sqlalchemy.exc import OperationalError
+
+from core.config import (
+    DatabaseConfig,
+    ReadReplicaConfig,
+    SQLiteProfile,
+    QueryDebugConfig,
+)
+from core.db_models import Team
+from core.get_db import DatabaseHelper, create_read_replica
+from core.response_cache import ResponseCache, TEAMS
+from core.state import InMemoryStore
+
+
+def test_sqlite_profile_pragmas(tmp_path):
+    database = DatabaseHelper(
+        url=f"sqlite:///{tmp_path / 'profile.sqlite3'}",
+        async_mode=True,
+        sqlite_pragmas=SQLiteProfile(busy_timeout=1234).pragmas(),
+    )
+    with database.engine.connect() as connection:
+        assert connection.scalar(text("PRAGMA journal_mode")) == "wal"
+        assert connection.scalar(text("PRAGMA busy_timeout")) == 1234
+        # NORMAL
+        assert connection.scalar(text("PRAGMA synchronous")) == 1
+
+    async def async_busy_timeout() -> int:
+        async with database.async_engine.connect() as connection:
+            value = await connection.scalar(text("PRAGMA busy_timeout"))
+        await database.async_dispose()
+        return value
+
+    assert asyncio.run(async_busy_timeout()) == 1234
+    database.dispose()
+
+
+def test_query_debug_flags_repeated_statements(tmp_path, caplog):
+    database = DatabaseHelper(
+        url=f"sqlite:///{tmp_path / 'debug.sqlite3'}",
+        query_debug=QueryDebugConfig(enabled=True, max_queries=10, max_repeats=2),
+    )
+    database.create_database()
+
+    with caplog.at_level(logging.WARNING, logger="core.query_debug"):
+        for session in database.session_getter():
+            session.scalars(select(Team)).all()
+        assert "Probable N+1" not in caplog.text
+
+        for session in database.session_getter():
+            for team_id in range(3):
+                session.get(Team, team_id)
+        assert "Probable N+1" in caplog.text
+        assert "3x SELECT teams.id" in caplog.text
+    database.dispose()
+
+
+def test_read_replica_is_read_only(tmp_path):
+    config = DatabaseConfig(
+        url=f"sqlite:///{tmp_path / 'replica.sqlite3'}",
+        read_replica=ReadReplicaConfig(enabled=True, pool_size=2, max_overflow=0),
+    )
+    database = DatabaseHelper(
+        url=config.url,
+        pool_size=3,
+        max_overflow=0,
+        sqlite_pragmas=config.sqlite.pragmas(),
+        read_replica=create_read_replica(config),
+    )
+    database.create_database()
+    assert database.pool_capacity == 5
+
+    for session in database.session_getter():
+        session.add(Team(name="Written"))
+        session.commit()
+    for session in database.read_session_getter():
+        assert session.scalars(select(Team.name)).all() == ["Written"]
+        with pytest.raises(OperationalError, match="readonly"):
+            session.execute(text("DELETE FROM teams"))
+    database.dispose()
+
+
+def test_lagging_replica_responses_expire(tmp_path):
+    primary = f"sqlite:///{tmp_path / 'primary.sqlite3'}"
+    config = DatabaseConfig(
+        url=primary,
+        read_replica=ReadReplicaConfig(
+            enabled=True,
+            url=f"sqlite:///{tmp_path / 'lagging.sqlite3'}",
+            cache_ttl=0.05,
+        ),
+    )
+    replica = create_read_replica(config)
+    for session in replica.session_getter():
+        ttl = session.info["cache_ttl"]
+    replica.dispose()
+    assert ttl == 0.05
+    # a second engine on the primary database does not lag
+    config.read_replica.url = None
+    same_database = create_read_replica(config)
+    assert same_database.session_factory().info["cache_ttl"] is None
+    same_database.dispose()
+
+    cache = ResponseCache(InMemoryStore())
+    request = Request(
+        {"type": "http", "method": "GET", "path": "/teams", "headers": []}
+    )
+    rendered = []
+
+    def render() -> list[int]:
+        rendered.append(len(rendered))
+        return rendered
+
+    adapter = TypeAdapter(list[int])
+    cache.respond(request, (TEAMS,), adapter, render, ttl=ttl)
+    cache.respond(request, (TEAMS,), adapter, render, ttl=ttl)
+    assert len(rendered) == 1
+    time.sleep(ttl * 2)
+    cache.respond(request, (TEAMS,), adapter, render, ttl=ttl)
+    assert len(rendered) == 2
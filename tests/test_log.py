@@ -0,0 +1,83 @@
+import io
+import json
+import logging
+import queue
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from core.config import LoggingConfig
+from core.log import (
+    AccessLogMiddleware,
+    LogPipeline,
+    NonBlockingQueueHandler,
+    bind_member,
+)
+
+
+def read_records(stream: io.StringIO) -> list[dict]:
+    return [json.loads(line) for line in stream.getvalue().splitlines()]
+
+
+def test_json_records_with_request_context():
+    app = FastAPI()
+    app.add_middleware(AccessLogMiddleware)
+
+    @app.post("/teams/{team_id}/join")
+    def join(team_id: int):
+        bind_member(7)
+        logging.getLogger("tests.audit").info(
+            "Member joined %s",
+            team_id,
+            extra={"event": "member.joined", "audit": True},
+        )
+
+    stream = io.StringIO()
+    pipeline = LogPipeline()
+    pipeline.start(LoggingConfig(sample={}), stream=stream)
+    try:
+        with TestClient(app) as client:
+            client.post("/teams/3/join")
+    finally:
+        pipeline.stop()
+
+    audit, access = [
+        record
+        for record in read_records(stream)
+        if record["logger"] in ("tests.audit", "access")
+    ]
+    assert audit["message"] == "Member joined 3"
+    assert audit["level"] == "INFO"
+    assert audit["audit"] is True
+    assert audit["route"] == "/teams/{team_id}/join"
+    assert audit["member_id"] == 7
+    assert access["event"] == "http.access"
+    assert access["status"] == 200
+    assert access["member_id"] == 7
+    assert access["latency_ms"] >= 0
+
+
+def test_sampling_keeps_warnings():
+    stream = io.StringIO()
+    pipeline = LogPipeline()
+    pipeline.start(LoggingConfig(sample={"vote.cast": 5}), stream=stream)
+    logger = logging.getLogger("tests.sampling")
+    try:
+        for _ in range(10):
+            logger.info("Vote cast", extra={"event": "vote.cast"})
+        logger.warning("Vote rejected", extra={"event": "vote.cast"})
+    finally:
+        pipeline.stop()
+
+    records = [r for r in read_records(stream) if r["logger"] == "tests.sampling"]
+    assert [record["level"] for record in records] == ["INFO", "INFO", "WARNING"]
+    assert records[0]["sample_rate"] == 5
+
+
+def test_full_queue_drops_records():
+    handler = NonBlockingQueueHandler(queue.Queue(maxsize=1))
+    record = logging.makeLogRecord({"msg": "burst %s", "args": (1,)})
+    handler.handle(record)
+    handler.handle(record)
+    assert handler.dropped == 1
+    assert handler.queue.get_nowait().msg == "burst 1"
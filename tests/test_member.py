@@ -2,7 +2,13 @@ import pytest
 from http import HTTPStatus
 from fastapi.testclient import TestClient
 from core.config import settings
-from api.v1.member import TOKENS
+from core.db_models import RegistrationToken
+from tests.conftest import db_testing
+
+
+def token_is_stored(token: str) -> bool:
+    with db_testing.session_factory() as session:
+        return session.get(RegistrationToken, token) is not None
 
 
 @pytest.fixture
@@ -29,7 +35,38 @@ def test_get_token_success(client: TestClient, auth_headers):
     token = response.json()
     assert isinstance(token, str)
     assert len(token) > 0
-    assert token in TOKENS
+    assert token_is_stored(token)
+
+
+def test_get_tokens_batch(client: TestClient, auth_headers):
+    response = client.post("/v1/tokens?count=5", headers=auth_headers)
+    assert response.status_code == HTTPStatus.CREATED
+    tokens = response.json()
+    assert len(set(tokens)) == 5
+    assert all(token_is_stored(token) for token in tokens)
+
+
+def test_get_tokens_batch_limits(client: TestClient, auth_headers):
+    response = client.post("/v1/tokens?count=0", headers=auth_headers)
+    assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+    response = client.post(
+        f"/v1/tokens?count={settings.tokens.max_batch + 1}",
+        headers=auth_headers,
+    )
+    assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+
+
+def test_register_member_token_single_use(client: TestClient, auth_headers):
+    token = client.post("/v1/tokens?count=1", headers=auth_headers).json()[0]
+    payload = {"name": "Once", "username": "single_use"}
+
+    response = client.post(f"/v1/register/{token}", json=payload)
+    assert response.status_code == HTTPStatus.CREATED
+    response = client.post(
+        f"/v1/register/{token}",
+        json={"name": "Twice", "username": "single_use_2"},
+    )
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
 
 
 def test_get_token_unauthorized(client: TestClient):
@@ -49,8 +86,8 @@ def test_register_member_success(client: TestClient, auth_headers, sample_member
     assert response.json()["name"] == sample_member_data["name"]
     assert response.json()["username"] == sample_member_data["username"]
 
-    # Verify token was removed from TOKENS
-    assert token not in TOKENS
+    # Verify token was consumed
+    assert not token_is_stored(token)
 
     # Verify cookie was set
     assert "users-token" in response.cookies
@@ -0,0 +1,108 @@
+import anyio
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import StaticPool, text
+from sqlalchemy.exc import TimeoutError
+
+from core.get_db import DatabaseHelper, size_threadpool
+from core.metrics import Metrics, MetricsMiddleware, metrics
+from tests.conftest import db_testing
+
+
+def test_metrics_endpoint(client: TestClient):
+    metrics.instrument(db_testing.engine)
+    client.get("/v1/voting/count")
+    client.get("/v1/no-such-route")
+    client.request("BOGUS", "/v1/no-such-route")
+
+    response = client.get("/metrics")
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    body = response.text
+    assert (
+        'http_requests_total{method="GET",route="/v1/voting/count",status="200"}'
+        in body
+    )
+    assert 'http_requests_total{method="GET",route="unmatched",status="404"}' in body
+    assert 'method="other",route="unmatched"' in body
+    assert "BOGUS" not in body
+    assert (
+        'http_request_duration_seconds_bucket{method="GET",route="/v1/voting/count",le="+Inf"}'
+        in body
+    )
+    assert "# TYPE http_request_db_queries histogram" in body
+    assert "db_pool_checkout_seconds_count" in body
+
+
+def test_request_stats_and_server_timing():
+    database = DatabaseHelper(
+        url="sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    local_metrics = Metrics()
+    local_metrics.instrument(database.engine)
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware, metrics=local_metrics, server_timing=True)
+
+    @app.get("/items/{item_id}")
+    def read_item(item_id: int):
+        with database.session_factory() as session:
+            session.execute(text("SELECT 1"))
+            session.execute(text("SELECT 2"))
+        return {"id": item_id}
+
+    with TestClient(app) as client:
+        response = client.get("/items/1")
+    assert 'desc="2 queries"' in response.headers["server-timing"]
+    assert response.headers["server-timing"].startswith("app;dur=")
+
+    key = ("GET", "/items/{item_id}")
+    assert local_metrics.request_queries[key].sum == 2
+    assert local_metrics.latency[key].count == 1
+    assert local_metrics.pool_checkout.count >= 1
+
+
+def test_pool_gauges_and_timeouts(tmp_path):
+    database = DatabaseHelper(
+        url=f"sqlite:///{tmp_path / 'pool.sqlite3'}",
+        pool_size=1,
+        max_overflow=1,
+        pool_timeout=0.05,
+    )
+    local_metrics = Metrics()
+    local_metrics.instrument(database.engine, name="test")
+    held = [database.engine.connect() for _ in range(2)]
+    with pytest.raises(TimeoutError):
+        database.engine.connect()
+
+    body = local_metrics.render()
+    assert 'db_pool_connections{engine="test",state="checked_out"} 2' in body
+    assert 'db_pool_overflow{engine="test"} 1' in body
+    assert "db_pool_timeouts_total 1" in body
+    assert database.pool_stats() == {
+        "size": 1,
+        "checked_out": 2,
+        "idle": 0,
+        "overflow": 1,
+        "capacity": 2,
+        "timeout": 0.05,
+    }
+    for connection in held:
+        connection.close()
+    database.dispose()
+
+
+def test_threadpool_follows_pool(tmp_path):
+    database = DatabaseHelper(
+        url=f"sqlite:///{tmp_path / 'threads.sqlite3'}",
+        pool_size=3,
+        max_overflow=2,
+    )
+
+    async def sizes() -> tuple[int, int]:
+        default = size_threadpool(database, None).total_tokens
+        return default, size_threadpool(database, 8).total_tokens
+
+    assert anyio.run(sizes) == (5, 8)
+    database.dispose()
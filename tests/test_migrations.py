@@ -0,0 +1,156 @@
+from datetime import datetime
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import insert, inspect, select, func, text
+
+from api.dependencies import get_database
+from core.db_models import Member, Team
+from core.db_models.base import Base
+from core.get_db import DatabaseHelper
+from core.migrations import (
+    LATEST_VERSION,
+    MIGRATIONS,
+    SchemaVersionError,
+    check_version,
+    current_version,
+    migrate,
+    schema_version,
+    version_metadata,
+)
+from core.tally import get_results
+from data import hash_token
+from main import app
+
+# tables as created by the baseline release, before versioning
+BASELINE_SCHEMA = (
+    """
+    CREATE TABLE teams (
+        id INTEGER NOT NULL PRIMARY KEY,
+        name VARCHAR(32) NOT NULL UNIQUE,
+        avatar VARCHAR
+    )
+    """,
+    """
+    CREATE TABLE members (
+        id INTEGER NOT NULL PRIMARY KEY,
+        name VARCHAR NOT NULL,
+        username VARCHAR NOT NULL,
+        has_joined_team BOOLEAN NOT NULL,
+        has_voted BOOLEAN NOT NULL,
+        token VARCHAR NOT NULL UNIQUE,
+        team_id INTEGER REFERENCES teams (id),
+        vote_id INTEGER REFERENCES teams (id)
+    )
+    """,
+    "CREATE UNIQUE INDEX ix_members_username ON members (username)",
+    "INSERT INTO teams (name) VALUES ('Baseline'), ('Unvoted')",
+    """
+    INSERT INTO members (name, username, has_joined_team, has_voted, token, vote_id)
+    VALUES ('Old', 'baseline_voter', 0, 1, 'tok_baseline', 1)
+    """,
+)
+
+
+def create_baseline(database: DatabaseHelper) -> None:
+    with database.engine.begin() as connection:
+        for statement in BASELINE_SCHEMA:
+            connection.execute(text(statement))
+
+
+def test_legacy_database_is_stamped(tmp_path):
+    database = DatabaseHelper(url=f"sqlite:///{tmp_path / 'legacy.sqlite3'}")
+    # created before versioning
+    Base.metadata.create_all(database.engine)
+    with database.engine.begin() as connection:
+        connection.execute(insert(Team).values(name="Legacy"))
+        assert current_version(connection) == 0
+
+    with pytest.raises(SchemaVersionError):
+        check_version(database.engine)
+    assert migrate(database.engine) == LATEST_VERSION
+    assert migrate(database.engine) == LATEST_VERSION
+    assert check_version(database.engine) == LATEST_VERSION
+    with database.engine.connect() as connection:
+        assert connection.scalar(select(func.count()).select_from(Team)) == 1
+    database.dispose()
+
+
+def test_hex_tokens_are_converted(tmp_path):
+    database = DatabaseHelper(url=f"sqlite:///{tmp_path / 'tokens.sqlite3'}")
+    # the members table as it was before the indexes and token digests
+    Base.metadata.create_all(database.engine)
+    with database.engine.begin() as connection:
+        connection.execute(text("DROP INDEX ix_members_team_id"))
+        connection.execute(text("DROP INDEX ix_members_vote_id"))
+        connection.execute(
+            text(
+                "INSERT INTO members (name, username, has_joined_team, has_voted, token) "
+                "VALUES ('Old', 'old_hex', 0, 0, 'tok_legacy_hex')",
+            ),
+        )
+
+    migrate(database.engine)
+    with database.session_factory() as session:
+        member = session.scalars(
+            select(Member).where(Member.token == hash_token("tok_legacy_hex")),
+        ).one()
+        assert member.username == "old_hex"
+    indexes = {
+        index["name"] for index in inspect(database.engine).get_indexes("members")
+    }
+    assert {"ix_members_team_id", "ix_members_vote_id"} <= indexes
+    database.dispose()
+
+
+def test_restart_keeps_data(tmp_path):
+    url = f"sqlite:///{tmp_path / 'restart.sqlite3'}"
+    overrides = dict(app.dependency_overrides)
+    try:
+        database = DatabaseHelper(url=url)
+        app.dependency_overrides[get_database] = lambda: database
+        with pytest.raises(SchemaVersionError):
+            with TestClient(app):
+                pass
+
+        database.create_database()
+        with database.session_factory() as session:
+            session.add(Team(name="Survivor"))
+            session.commit()
+        for _ in range(2):
+            database = DatabaseHelper(url=url)
+            app.dependency_overrides[get_database] = lambda: database
+            with TestClient(app):
+                pass
+            with database.session_factory() as session:
+                assert session.scalars(select(Team.name)).all() == ["Survivor"]
+    finally:
+        app.dependency_overrides.clear()
+        app.dependency_overrides.update(overrides)
+
+
+@pytest.mark.parametrize("stamped", [0, 1, 2])
+def test_baseline_database_gets_the_tally(tmp_path, stamped):
+    database = DatabaseHelper(url=f"sqlite:///{tmp_path / 'baseline.sqlite3'}")
+    create_baseline(database)
+    # migrated by the releases before migration 3
+    with database.engine.begin() as connection:
+        version_metadata.create_all(connection)
+        for migration in MIGRATIONS[:stamped]:
+            migration.upgrade(connection)
+            connection.execute(
+                insert(schema_version).values(
+                    version=migration.version,
+                    description=migration.description,
+                    applied_at=datetime.now(),
+                ),
+            )
+        columns = inspect(connection).get_columns("teams")
+        assert "votes_count" not in {column["name"] for column in columns}
+
+    assert migrate(database.engine) == LATEST_VERSION
+    with database.session_factory() as session:
+        results = get_results(session)
+    votes = {team["name"]: team["votes"] for team in results["teams"]}
+    assert votes == {"Baseline": 1, "Unvoted": 0}
+    database.dispose()
@@ -0,0 +1,111 @@
+import asyncio
+from http import HTTPStatus
+
+import httpx
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from uvicorn.middleware.proxy_headers import ProxyHeadersMiddleware
+
+from api.dependencies import rate_limit
+
+from core.config import RateLimitRule
+from core.rate_limit import rate_limiter
+from core.state import InMemoryStore, SQLiteStore
+
+
+@pytest.fixture
+def limited(monkeypatch):
+    monkeypatch.setattr(rate_limiter, "enabled", True)
+    monkeypatch.setattr(rate_limiter, "store", InMemoryStore())
+    monkeypatch.setitem(
+        rate_limiter.rules, "vote", RateLimitRule(rate=0.01, burst=2, key="cookie")
+    )
+    monkeypatch.setitem(rate_limiter.rules, "reset", RateLimitRule(rate=0.01, burst=1))
+    return rate_limiter
+
+
+def test_vote_is_shed_before_database_work(
+    client: TestClient, limited, assert_max_queries
+):
+    cookies = {"users-token": "tok_rate_limited"}
+    for _ in range(2):
+        response = client.post("/v1/voting/1", cookies=cookies)
+        assert response.status_code == HTTPStatus.UNAUTHORIZED
+
+    with assert_max_queries(0):
+        response = client.post("/v1/voting/1", cookies=cookies)
+    assert response.status_code == HTTPStatus.TOO_MANY_REQUESTS
+    assert int(response.headers["retry-after"]) > 0
+
+    # buckets are per cookie
+    response = client.post("/v1/voting/1", cookies={"users-token": "tok_other_client"})
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
+    assert limited.stats()["rules"]["vote"]["rejected"] == 1
+
+
+def test_reset_is_limited_by_address(client: TestClient, limited):
+    assert client.get("/v1/users/reset/first").status_code == HTTPStatus.OK
+    response = client.get("/v1/users/reset/second")
+    assert response.status_code == HTTPStatus.TOO_MANY_REQUESTS
+
+
+def test_rotating_cookies_hit_the_address_bucket(
+    client: TestClient, limited, assert_max_queries
+):
+    rule = RateLimitRule(rate=0.01, burst=2, key="cookie", ip_rate=0.01, ip_burst=3)
+    limited.rules["vote"] = rule
+    for n in range(3):
+        response = client.post(
+            "/v1/voting/1", cookies={"users-token": f"tok_bogus_{n}"}
+        )
+        assert response.status_code == HTTPStatus.UNAUTHORIZED
+
+    with assert_max_queries(0):
+        response = client.post("/v1/voting/1", cookies={"users-token": "tok_bogus_3"})
+    assert response.status_code == HTTPStatus.TOO_MANY_REQUESTS
+
+
+def test_shared_buckets(client: TestClient, limited, monkeypatch, tmp_path):
+    store = SQLiteStore(str(tmp_path / "state.sqlite3"))
+    monkeypatch.setattr(limited, "store", store)
+    assert client.get("/v1/users/reset/first").status_code == HTTPStatus.OK
+    response = client.get("/v1/users/reset/second")
+    assert response.status_code == HTTPStatus.TOO_MANY_REQUESTS
+
+
+def test_trusted_proxy_forwards_client_address(limited):
+    app = FastAPI()
+
+    @app.get("/reset", dependencies=[Depends(rate_limit("reset"))])
+    def reset():
+        return {}
+
+    async def statuses(trusted: str) -> list[int]:
+        transport = httpx.ASGITransport(
+            app=ProxyHeadersMiddleware(app, trusted_hosts=trusted),
+            client=("10.0.0.2", 4321),
+        )
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://test"
+        ) as client:
+            return [
+                (
+                    await client.get("/reset", headers={"x-forwarded-for": address})
+                ).status_code
+                for address in ("203.0.113.1", "203.0.113.2", "203.0.113.1")
+            ]
+
+    # behind a trusted proxy every client has a bucket of its own
+    assert asyncio.run(statuses("10.0.0.2")) == [
+        HTTPStatus.OK,
+        HTTPStatus.OK,
+        HTTPStatus.TOO_MANY_REQUESTS,
+    ]
+    # otherwise they all share the bucket of the proxy
+    limited.store = InMemoryStore()
+    assert asyncio.run(statuses("127.0.0.1")) == [
+        HTTPStatus.OK,
+        HTTPStatus.TOO_MANY_REQUESTS,
+        HTTPStatus.TOO_MANY_REQUESTS,
+    ]
@@ -0,0 +1,140 @@
+import time
+from http import HTTPStatus
+
+import pytest
+from fastapi import APIRouter, FastAPI
+from fastapi.testclient import TestClient
+
+from api.dependencies import get_database
+from api.v1.member import router as member_router
+from core.auth_cache import MemberCache
+from core.config import settings
+from core.get_db import DatabaseHelper, get_db
+from core.db_models import Member
+from core.state import InMemoryStore, SQLiteStore
+from data import hash_token
+
+TOKEN = hash_token("tok_worker")
+
+
+@pytest.fixture
+def store_path(tmp_path) -> str:
+    return str(tmp_path / "state.sqlite3")
+
+
+def make_member(**values) -> Member:
+    fields = {
+        "id": 1,
+        "name": "Worker",
+        "username": "worker",
+        "has_joined_team": False,
+        "has_voted": False,
+        "token": TOKEN,
+        "team_id": None,
+        "vote_id": None,
+    }
+    fields.update(values)
+    return Member(**fields)
+
+
+def test_sqlite_store_is_shared(store_path):
+    # two instances stand for two worker processes
+    first, second = SQLiteStore(store_path), SQLiteStore(store_path)
+
+    first.set("key", "value")
+    assert second.get("key") == "value"
+
+    assert first.incr("counter") == 1
+    assert second.incr("counter", 2) == 3
+    assert first.get_many(["counter", "missing"]) == ["3", None]
+
+    second.delete("key")
+    assert first.get("key") is None
+
+
+def test_sqlite_store_ttl(store_path):
+    store = SQLiteStore(store_path)
+
+    store.set("expired", "value", ttl=-1)
+    assert store.get("expired") is None
+
+    # an expired counter starts over
+    store.set("counter", "10", ttl=-1)
+    assert store.incr("counter") == 1
+
+
+def test_token_buckets(store_path):
+    for store in (InMemoryStore(), SQLiteStore(store_path)):
+        taken = [store.take("client", 20, 3)[0] for _ in range(4)]
+        assert taken == [True, True, True, False]
+        time.sleep(0.1)
+        assert store.take("client", 20, 3)[0]
+
+    # two instances stand for two worker processes
+    first, second = SQLiteStore(store_path), SQLiteStore(store_path)
+    assert first.take("shared", 0.01, 2)[0]
+    assert second.take("shared", 0.01, 2)[0]
+    assert first.take("shared", 0.01, 2) == (False, pytest.approx(0, abs=0.01))
+
+
+def test_member_cache_invalidation_crosses_workers(store_path):
+    worker_a = MemberCache(store=SQLiteStore(store_path))
+    worker_b = MemberCache(store=SQLiteStore(store_path))
+
+    cached, versions = worker_a.get(TOKEN)
+    assert cached is None
+    worker_a.put(make_member(), versions)
+    cached, _ = worker_a.get(TOKEN)
+    assert cached is not None and cached.username == "worker"
+
+    # worker B commits a change of the member
+    worker_b.invalidate(TOKEN)
+    cached, versions = worker_a.get(TOKEN)
+    assert cached is None
+
+    worker_a.put(make_member(has_voted=True), versions)
+    cached, _ = worker_a.get(TOKEN)
+    assert cached.has_voted
+
+    # worker B drops a team, which clears every cache
+    worker_b.clear()
+    cached, _ = worker_a.get(TOKEN)
+    assert cached is None
+
+
+def worker_app(database: DatabaseHelper) -> FastAPI:
+    router = APIRouter(prefix=settings.api.v1.prefix)
+    router.include_router(member_router)
+    app = FastAPI()
+    app.include_router(router)
+    app.dependency_overrides[get_db.session_getter] = database.session_getter
+    app.dependency_overrides[get_database] = lambda: database
+    return app
+
+
+def test_registration_token_crosses_workers(tmp_path):
+    # two engines on one database file stand for two worker processes
+    url = f"sqlite:///{tmp_path / 'workers.sqlite3'}"
+    first, second = DatabaseHelper(url=url), DatabaseHelper(url=url)
+    first.create_database()
+    headers = {"x-api-key": settings.admin.apikey}
+    member = {"name": "Worker", "username": "worker_registration"}
+
+    with (
+        TestClient(worker_app(first)) as minting,
+        TestClient(worker_app(second)) as other,
+    ):
+        response = minting.post("/v1/tokens?count=1", headers=headers)
+        assert response.status_code == HTTPStatus.CREATED
+        token = response.json()[0]
+
+        response = other.post(f"/v1/register/{token}", json=member)
+        assert response.status_code == HTTPStatus.CREATED
+        response = minting.post(
+            f"/v1/register/{token}",
+            json={"name": "Worker", "username": "worker_replay"},
+        )
+        assert response.status_code == HTTPStatus.UNAUTHORIZED
+
+    first.dispose()
+    second.dispose()
@@ -26,3 +26,70 @@ def test_delete_team(client: TestClient) -> None:
         headers={"x-api-key": settings.admin.apikey},
     )
     assert response.status_code == 204
+
+
+def test_team_membership_lifecycle(client: TestClient, assert_max_queries) -> None:
+    headers = {"x-api-key": settings.admin.apikey}
+    for name in ("Roster", "Rivals"):
+        client.post(
+            "/v1/teams",
+            headers=headers,
+            json={"name": name, "avatar": f"https://example.com/{name}.png"},
+        )
+    teams = {team["name"]: team["id"] for team in client.get("/v1/teams").json()}
+    cookies = {}
+    for username in ("roster_1", "roster_2", "rivals_1"):
+        token = f"tok_{username}"
+        client.post(
+            "/v1/admin/member",
+            headers=headers,
+            json={"name": username, "username": username, "token": token},
+        )
+        cookies[username] = {"users-token": token}
+
+    for username in ("roster_1", "roster_2"):
+        with assert_max_queries(3):
+            response = client.post(
+                f"/v1/users/join/{teams['Roster']}", cookies=cookies[username]
+            )
+        assert response.status_code == 200
+    response = client.post(
+        f"/v1/users/join/{teams['Rivals']}", cookies=cookies["roster_1"]
+    )
+    assert response.status_code == 403
+    with assert_max_queries(2):
+        response = client.get(f"/v1/teams/{teams['Roster']}/users")
+    assert [member["name"] for member in response.json()["members"]] == [
+        "roster_1",
+        "roster_2",
+    ]
+
+    client.post("/v1/users/leave/", cookies=cookies["roster_2"])
+    response = client.post("/v1/users/leave/", cookies=cookies["roster_2"])
+    assert response.status_code == 403
+    client.post(f"/v1/voting/{teams['Roster']}", cookies=cookies["rivals_1"])
+
+    with assert_max_queries(4):
+        response = client.delete(f"/v1/teams/{teams['Roster']}", headers=headers)
+    assert response.status_code == 204
+    member = client.get("/v1/users/me", cookies=cookies["roster_1"]).json()
+    assert member["team_id"] is None
+    voter = client.get("/v1/users/me", cookies=cookies["rivals_1"]).json()
+    assert voter["vote_id"] is None
+
+    response = client.delete(
+        f"/v1/admin/member/{member['id']}",
+        headers=headers,
+    )
+    assert response.status_code == 204
+
+
+def test_query_strings_share_cache_entry(client: TestClient) -> None:
+    headers = {"x-api-key": settings.admin.apikey}
+    client.get("/v1/teams")
+    size = client.get("/v1/admin/response-cache", headers=headers).json()["size"]
+    for n in range(5):
+        assert client.get(f"/v1/teams?x={n}").status_code == 200
+    assert (
+        client.get("/v1/admin/response-cache", headers=headers).json()["size"] == size
+    )
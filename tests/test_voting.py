@@ -0,0 +1,242 @@
+import pytest
+from http import HTTPStatus
+from fastapi.testclient import TestClient
+from core.config import settings
+from fastapi import HTTPException
+from sqlalchemy import select
+from api.v1.admin import delete_user
+from api.v1.voting import cast_vote, withdraw_vote
+from core.db_models import Member, Team
+from core.tally import reconcile_tally
+from tests.conftest import db_testing
+
+
+@pytest.fixture
+def auth_headers():
+    return {"x-api-key": settings.admin.apikey}
+
+
+@pytest.fixture
+def create_team(client: TestClient, auth_headers):
+    def _create_team(name: str) -> int:
+        client.post("/v1/teams", headers=auth_headers, json={"name": name})
+        teams = client.get("/v1/teams").json()
+        return next(team["id"] for team in teams if team["name"] == name)
+
+    return _create_team
+
+
+@pytest.fixture
+def create_voter(client: TestClient, auth_headers):
+    def _create_voter(username: str) -> dict[str, str]:
+        token = f"tok_{username}"
+        client.post(
+            "/v1/admin/member",
+            headers=auth_headers,
+            json={"name": username, "username": username, "token": token},
+        )
+        return {"users-token": token}
+
+    return _create_voter
+
+
+def get_votes(client: TestClient, team_name: str) -> int:
+    results = client.get("/v1/voting/count").json()
+    return next(
+        (item["stats"]["votes"] for item in results if item["name"] == team_name),
+        0,
+    )
+
+
+def test_vote_updates_tally(
+    client: TestClient, create_team, create_voter, assert_max_queries
+):
+    team_id = create_team("Tally Vote")
+    first = create_voter("tally_voter_1")
+    second = create_voter("tally_voter_2")
+
+    assert client.post(f"/v1/voting/{team_id}", cookies=first).status_code == 200
+    with assert_max_queries(3):
+        assert client.post(f"/v1/voting/{team_id}", cookies=second).status_code == 200
+    with assert_max_queries(1):
+        assert get_votes(client, "Tally Vote") == 2
+
+    response = client.post(f"/v1/voting/{team_id}", cookies=first)
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert get_votes(client, "Tally Vote") == 2
+
+
+def test_rollback_and_delete_update_tally(
+    client: TestClient, auth_headers, create_team, create_voter
+):
+    team_id = create_team("Tally Rollback")
+    first = create_voter("tally_voter_3")
+    second = create_voter("tally_voter_4")
+    client.post(f"/v1/voting/{team_id}", cookies=first)
+    client.post(f"/v1/voting/{team_id}", cookies=second)
+
+    response = client.post("/v1/voting/rollback/", cookies=first)
+    assert response.status_code == HTTPStatus.NO_CONTENT
+    assert get_votes(client, "Tally Rollback") == 1
+
+    member_id = client.get("/v1/users/me", cookies=second).json()["id"]
+    client.delete(f"/v1/admin/member/{member_id}", headers=auth_headers)
+    assert get_votes(client, "Tally Rollback") == 0
+
+
+def test_vote_errors(client: TestClient, auth_headers, create_team, create_voter):
+    team_id = create_team("Own Team")
+    voter = create_voter("own_team_voter")
+    client.post(f"/v1/users/join/{team_id}", cookies=voter)
+
+    response = client.post(f"/v1/voting/{team_id}", cookies=voter)
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert response.json()["detail"] == "You cannot vote for your own team."
+    response = client.post("/v1/voting/999999", cookies=voter)
+    assert response.status_code == HTTPStatus.NOT_FOUND
+    assert get_votes(client, "Own Team") == 0
+
+
+def test_stale_double_vote(client: TestClient, create_team, create_voter):
+    team_id = create_team("Double Click")
+    create_voter("double_click_voter")
+
+    with db_testing.session_factory() as session:
+        stmt = select(Member).where(Member.username == "double_click_voter")
+        member = session.scalars(stmt).one()
+        cast_vote(session, member, team_id)
+        # the second request still holds the member loaded before the vote
+        with pytest.raises(HTTPException) as excinfo:
+            cast_vote(session, member, team_id)
+        assert excinfo.value.status_code == HTTPStatus.BAD_REQUEST
+
+        member.has_voted, member.vote_id = True, team_id
+        withdraw_vote(session, member)
+        with pytest.raises(HTTPException):
+            withdraw_vote(session, member)
+    assert get_votes(client, "Double Click") == 0
+
+
+def test_delete_after_concurrent_rollback(
+    client: TestClient, create_team, create_voter
+):
+    team_id = create_team("Deleted Voter")
+    voter = create_voter("deleted_voter")
+    client.post(f"/v1/voting/{team_id}", cookies=voter)
+
+    with db_testing.session_factory() as session:
+        stmt = select(Member).where(Member.username == "deleted_voter")
+        member = session.scalars(stmt).one()
+        # the vote is rolled back after the delete loaded the member
+        with db_testing.session_factory() as other:
+            withdraw_vote(other, other.get(Member, member.id))
+        delete_user(session, member)
+
+        with pytest.raises(HTTPException) as excinfo:
+            delete_user(session, member)
+        assert excinfo.value.status_code == HTTPStatus.NOT_FOUND
+
+    with db_testing.session_factory() as session:
+        assert session.get(Team, team_id).votes_count == 0
+        assert session.get(Member, member.id) is None
+
+
+def test_reconcile_tally(client: TestClient, create_team, create_voter):
+    team_id = create_team("Tally Drift")
+    voter = create_voter("tally_voter_5")
+    client.post(f"/v1/voting/{team_id}", cookies=voter)
+
+    with db_testing.session_factory() as session:
+        session.get(Team, team_id).votes_count = 42
+        session.commit()
+    assert get_votes(client, "Tally Drift") == 42
+
+    with db_testing.session_factory() as session:
+        reconcile_tally(session)
+    assert get_votes(client, "Tally Drift") == 1
+
+
+def test_live_results_push(client: TestClient, create_team, create_voter):
+    team_id = create_team("Live Vote")
+    voter = create_voter("live_voter_1")
+
+    with client.websocket_connect("/v1/voting/live") as first:
+        with client.websocket_connect("/v1/voting/live") as second:
+            initial = first.receive_json()
+            assert second.receive_json() == initial
+            assert "Live Vote" not in [item["name"] for item in initial]
+
+            client.post(f"/v1/voting/{team_id}", cookies=voter)
+
+            update = first.receive_json()
+            assert second.receive_json() == update
+            assert {"name": "Live Vote", "stats": {"votes": 1}} in update
+
+
+def test_count_etag(client: TestClient, create_team, create_voter):
+    team_id = create_team("Etag Team")
+    voter = create_voter("etag_voter")
+
+    response = client.get("/v1/voting/count")
+    etag = response.headers["etag"]
+    assert response.headers["cache-control"] == "no-cache"
+    response = client.get("/v1/voting/count", headers={"if-none-match": etag})
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+    assert response.content == b""
+
+    client.post(f"/v1/voting/{team_id}", cookies=voter)
+    response = client.get("/v1/voting/count", headers={"if-none-match": etag})
+    assert response.status_code == HTTPStatus.OK
+    assert response.headers["etag"] != etag
+    assert {"name": "Etag Team", "stats": {"votes": 1}} in response.json()
+
+
+def test_results(client: TestClient, create_team, create_voter, assert_max_queries):
+    leader = create_team("Results Leader")
+    create_team("Results Empty")
+    first = create_voter("results_voter_1")
+    second = create_voter("results_voter_2")
+    create_voter("results_voter_3")
+    client.post(f"/v1/voting/{leader}", cookies=first)
+    client.post(f"/v1/voting/{leader}", cookies=second)
+
+    with assert_max_queries(1):
+        response = client.get("/v1/voting/results")
+    assert response.status_code == HTTPStatus.OK
+    results = response.json()
+    teams = {team["name"]: team for team in results["teams"]}
+
+    # every team is listed, zero votes included, once
+    assert len(teams) == len(client.get("/v1/teams").json())
+    assert teams["Results Empty"]["votes"] == 0
+    assert teams["Results Empty"]["share"] == 0.0
+    assert teams["Results Leader"]["votes"] == 2
+    assert results["votes"] == sum(team["votes"] for team in results["teams"])
+    assert teams["Results Leader"]["share"] == round(200 / results["votes"], 1)
+
+    votes = [team["votes"] for team in results["teams"]]
+    assert votes == sorted(votes, reverse=True)
+    for team in results["teams"]:
+        assert team["rank"] == 1 + sum(other > team["votes"] for other in votes)
+
+    assert 0 < results["voted"] < results["registered"]
+    assert results["turnout"] == round(
+        results["voted"] * 100 / results["registered"], 1
+    )
+
+    etag = response.headers["etag"]
+    create_voter("results_voter_4")
+    response = client.get("/v1/voting/results", headers={"if-none-match": etag})
+    assert response.status_code == HTTPStatus.OK
+    assert response.json()["registered"] == results["registered"] + 1
+
+
+def test_results_count_registrations(client: TestClient, auth_headers):
+    registered = client.get("/v1/voting/results").json()["registered"]
+    token = client.post("/v1/tokens?count=1", headers=auth_headers).json()[0]
+    response = client.post(
+        f"/v1/register/{token}",
+        json={"name": "Registered", "username": "results_registered"},
+    )
+    assert response.status_code == HTTPStatus.CREATED
+    assert client.get("/v1/voting/results").json()["registered"] == registered + 1
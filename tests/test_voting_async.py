@@ -0,0 +1,150 @@
+import asyncio
+import pytest
+from http import HTTPStatus
+from typing import Generator
+from fastapi import APIRouter, FastAPI
+from fastapi.testclient import TestClient
+
+from api.dependencies import get_database
+from api.v1.admin import router as admin_router
+from api.v1.team import router as team_router
+from api.v1.voting_async import router as voting_async_router
+from core.auth_cache import member_cache
+from core.config import settings
+from core.get_db import DatabaseHelper, get_db
+from core.live_results import results_broadcaster
+from core.response_cache import response_cache
+from core.state import SQLiteStore
+
+
+class LoopCheckingStore(SQLiteStore):
+    """SQLite store recording the calls made on a running event loop"""
+
+    def __init__(self, path: str) -> None:
+        super().__init__(path)
+        self.calls_on_loop: list[str] = []
+
+    def _check(self, name: str) -> None:
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self.calls_on_loop.append(name)
+
+    def get_many(self, keys):
+        self._check("get_many")
+        return super().get_many(keys)
+
+    def set(self, key, value, ttl=None):
+        self._check("set")
+        super().set(key, value, ttl=ttl)
+
+
+@pytest.fixture(scope="module")
+def async_client(tmp_path_factory) -> Generator[TestClient, None, None]:
+    """Client for an app serving the voting routes in async mode"""
+    path = tmp_path_factory.mktemp("async") / "voting.sqlite3"
+    database = DatabaseHelper(
+        url=f"sqlite:///{path}",
+        connect_args={"check_same_thread": False},
+        async_mode=True,
+    )
+    database.create_database()
+
+    router = APIRouter(prefix=settings.api.v1.prefix)
+    router.include_router(team_router)
+    router.include_router(admin_router)
+    router.include_router(voting_async_router)
+    app = FastAPI()
+    app.include_router(router)
+    app.dependency_overrides[get_db.session_getter] = database.session_getter
+    app.dependency_overrides[get_db.async_session_getter] = (
+        database.async_session_getter
+    )
+    app.dependency_overrides[get_db.read_session_getter] = database.read_session_getter
+    app.dependency_overrides[get_db.async_read_session_getter] = (
+        database.async_read_session_getter
+    )
+    app.dependency_overrides[get_database] = lambda: database
+
+    with TestClient(app) as client:
+        yield client
+        client.portal.call(database.async_dispose)
+    database.dispose()
+
+
+@pytest.fixture
+def auth_headers():
+    return {"x-api-key": settings.admin.apikey}
+
+
+def test_async_vote_and_rollback(async_client: TestClient, auth_headers):
+    async_client.post("/v1/teams", headers=auth_headers, json={"name": "Async"})
+    team_id = async_client.get("/v1/teams").json()[0]["id"]
+    async_client.post(
+        "/v1/admin/member",
+        headers=auth_headers,
+        json={"name": "Async", "username": "async_voter", "token": "tok_async"},
+    )
+    cookies = {"users-token": "tok_async"}
+
+    response = async_client.post(f"/v1/voting/{team_id}", cookies=cookies)
+    assert response.status_code == HTTPStatus.OK
+    assert async_client.get("/v1/voting/count").json() == [
+        {"name": "Async", "stats": {"votes": 1}},
+    ]
+
+    response = async_client.post(f"/v1/voting/{team_id}", cookies=cookies)
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert response.json()["detail"] == "You have already voted"
+
+    response = async_client.post("/v1/voting/rollback/", cookies=cookies)
+    assert response.status_code == HTTPStatus.NO_CONTENT
+    assert async_client.get("/v1/voting/count").json() == []
+
+
+def test_async_vote_errors(async_client: TestClient):
+    response = async_client.post(
+        "/v1/voting/1",
+        cookies={"users-token": "invalid_token"},
+    )
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
+
+    response = async_client.post(
+        "/v1/voting/9999",
+        cookies={"users-token": "tok_async"},
+    )
+    assert response.status_code == HTTPStatus.NOT_FOUND
+
+
+def test_async_shared_store_off_event_loop(
+    async_client: TestClient, auth_headers, monkeypatch, tmp_path
+):
+    store = LoopCheckingStore(str(tmp_path / "state.sqlite3"))
+    for cache in (member_cache, response_cache, results_broadcaster):
+        monkeypatch.setattr(cache, "store", store)
+
+    async_client.post("/v1/teams", headers=auth_headers, json={"name": "Shared"})
+    team_id = async_client.get("/v1/teams").json()[-1]["id"]
+    async_client.post(
+        "/v1/admin/member",
+        headers=auth_headers,
+        json={"name": "Shared", "username": "shared_voter", "token": "tok_shared"},
+    )
+    cookies = {"users-token": "tok_shared"}
+    store.calls_on_loop.clear()
+
+    response = async_client.post(f"/v1/voting/{team_id}", cookies=cookies)
+    assert response.status_code == HTTPStatus.OK
+    assert {"name": "Shared", "stats": {"votes": 1}} in async_client.get(
+        "/v1/voting/count"
+    ).json()
+    assert async_client.get("/v1/voting/results").status_code == HTTPStatus.OK
+
+    response = async_client.post("/v1/voting/rollback/", cookies=cookies)
+    assert response.status_code == HTTPStatus.NO_CONTENT
+    assert {"name": "Shared", "stats": {"votes": 1}} not in async_client.get(
+        "/v1/voting/count"
+    ).json()
+
+    assert store.calls_on_loop == []
@@ -0,0 +1,225 @@
+import asyncio
+
+import httpx
+import pytest
+from http import HTTPStatus
+from typing import Generator
+from fastapi import APIRouter, FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import insert
+
+from api.dependencies import get_database
+from api.v1.admin import router as admin_router
+from api.v1.member import router as member_router
+from api.v1.team import router as team_router
+from api.v1.voting_queue import router as voting_queue_router
+from core.config import settings
+from core.db_models import Member, Team
+from core.get_db import DatabaseHelper, get_db
+from core.tally import get_tally
+from core.vote_queue import PendingVote, VoteQueue, vote_queue
+from data import hash_token
+
+
+@pytest.fixture(scope="module")
+def queue_database(tmp_path_factory) -> Generator[DatabaseHelper, None, None]:
+    path = tmp_path_factory.mktemp("queue") / "voting.sqlite3"
+    database = DatabaseHelper(
+        url=f"sqlite:///{path}",
+        connect_args={"check_same_thread": False},
+    )
+    database.create_database()
+    yield database
+    database.dispose()
+
+
+def queue_app(database: DatabaseHelper) -> FastAPI:
+    """App serving the voting routes through the vote queue"""
+    router = APIRouter(prefix=settings.api.v1.prefix)
+    router.include_router(team_router)
+    router.include_router(member_router)
+    router.include_router(admin_router)
+    router.include_router(voting_queue_router)
+    app = FastAPI()
+    app.include_router(router)
+    app.dependency_overrides[get_db.session_getter] = database.session_getter
+    app.dependency_overrides[get_db.read_session_getter] = database.read_session_getter
+    app.dependency_overrides[get_database] = lambda: database
+    return app
+
+
+@pytest.fixture(scope="module")
+def queue_client(queue_database) -> Generator[TestClient, None, None]:
+    """Client for an app serving the voting routes through the vote queue"""
+    with TestClient(queue_app(queue_database)) as client:
+        yield client
+        client.portal.call(vote_queue.close)
+
+
+def test_queued_vote(queue_client: TestClient):
+    headers = {"x-api-key": settings.admin.apikey}
+    queue_client.post("/v1/teams", headers=headers, json={"name": "Queued"})
+    team_id = queue_client.get("/v1/teams").json()[0]["id"]
+    queue_client.post(
+        "/v1/admin/member",
+        headers=headers,
+        json={"name": "Queued", "username": "queued_voter", "token": "tok_queued"},
+    )
+    cookies = {"users-token": "tok_queued"}
+
+    response = queue_client.post("/v1/voting/999999", cookies=cookies)
+    assert response.status_code == HTTPStatus.NOT_FOUND
+    response = queue_client.post(f"/v1/voting/{team_id}", cookies=cookies)
+    assert response.status_code == HTTPStatus.OK
+    # acknowledged votes are committed
+    assert queue_client.get("/v1/voting/count").json() == [
+        {"name": "Queued", "stats": {"votes": 1}},
+    ]
+    assert queue_client.get("/v1/users/me", cookies=cookies).json()["has_voted"]
+
+    response = queue_client.post(f"/v1/voting/{team_id}", cookies=cookies)
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    response = queue_client.post("/v1/voting/rollback/", cookies=cookies)
+    assert response.status_code == HTTPStatus.NO_CONTENT
+
+
+def test_votes_are_batched(queue_database: DatabaseHelper):
+    with queue_database.session_factory() as session:
+        team_id = session.scalars(
+            insert(Team).values(name="Batched").returning(Team.id),
+        ).one()
+        member_ids = session.scalars(
+            insert(Member).returning(Member.id, sort_by_parameter_order=True),
+            [
+                {
+                    "name": "Batched",
+                    "username": f"batched_{i}",
+                    "token": hash_token(f"tok_batched_{i}"),
+                    "has_voted": False,
+                    "has_joined_team": False,
+                }
+                for i in range(20)
+            ],
+        ).all()
+        session.commit()
+
+    queue = VoteQueue(flush_interval=0.05, max_batch=500)
+    batches = []
+
+    def flush(database, batch):
+        batches.append(len(batch))
+        return VoteQueue.flush(database, batch)
+
+    queue.flush = flush
+
+    async def vote_all() -> list[str]:
+        votes = [
+            queue.submit(
+                queue_database, member_id, hash_token(f"tok_batched_{i}"), team_id
+            )
+            for i, member_id in enumerate(member_ids)
+        ]
+        # a double click while the first vote is in flight
+        votes.append(
+            queue.submit(
+                queue_database, member_ids[0], hash_token("tok_batched_0"), team_id
+            ),
+        )
+        outcomes = await asyncio.gather(*votes)
+        await queue.close()
+        return outcomes
+
+    outcomes = asyncio.run(vote_all())
+    assert outcomes == ["accepted"] * 20 + ["rejected"]
+    assert batches == [20]
+    with queue_database.session_factory() as session:
+        tally = {item["name"]: item["stats"]["votes"] for item in get_tally(session)}
+    assert tally["Batched"] == 20
+
+
+def test_flush_each_outcomes(queue_database: DatabaseHelper):
+    # the path taken without a reliable executemany rowcount
+    with queue_database.session_factory() as session:
+        team_id = session.scalars(
+            insert(Team).values(name="One By One").returning(Team.id),
+        ).one()
+        member_id = session.scalars(
+            insert(Member)
+            .values(
+                name="One",
+                username="one_by_one",
+                token=hash_token("tok_one_by_one"),
+                has_voted=False,
+                has_joined_team=False,
+            )
+            .returning(Member.id),
+        ).one()
+        batch = [
+            PendingVote(member_id, hash_token("tok_one_by_one"), 999999, None),
+            PendingVote(member_id, hash_token("tok_one_by_one"), team_id, None),
+            PendingVote(member_id, hash_token("tok_one_by_one"), team_id, None),
+        ]
+        outcomes = VoteQueue.flush_each(session, batch)
+        session.commit()
+        tally = {item["name"]: item["stats"]["votes"] for item in get_tally(session)}
+    assert outcomes == ["team_not_found", "accepted", "rejected"]
+    assert tally["One By One"] == 1
+
+
+def test_concurrent_votes_outnumber_the_pool(tmp_path):
+    # every request authenticates on a cache miss, the flusher must still
+    # get a connection while they wait for their votes
+    database = DatabaseHelper(
+        url=f"sqlite:///{tmp_path / 'pool.sqlite3'}",
+        connect_args={"check_same_thread": False},
+        pool_size=2,
+        max_overflow=0,
+        pool_timeout=2,
+    )
+    database.create_database()
+    voters = 10
+    with database.session_factory() as session:
+        team_id = session.scalars(
+            insert(Team).values(name="Small Pool").returning(Team.id),
+        ).one()
+        session.execute(
+            insert(Member),
+            [
+                {
+                    "name": "Pool",
+                    "username": f"pool_{i}",
+                    "token": hash_token(f"tok_pool_{i}"),
+                    "has_voted": False,
+                    "has_joined_team": False,
+                }
+                for i in range(voters)
+            ],
+        )
+        session.commit()
+
+    async def vote_all() -> list[int]:
+        transport = httpx.ASGITransport(app=queue_app(database))
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://test"
+        ) as client:
+            responses = await asyncio.gather(
+                *(
+                    client.post(
+                        f"/v1/voting/{team_id}",
+                        cookies={"users-token": f"tok_pool_{i}"},
+                    )
+                    for i in range(voters)
+                ),
+            )
+        await vote_queue.close()
+        return [response.status_code for response in responses]
+
+    try:
+        assert asyncio.run(vote_all()) == [HTTPStatus.OK] * voters
+        with database.session_factory() as session:
+            tally = {
+                item["name"]: item["stats"]["votes"] for item in get_tally(session)
+            }
+        assert tally["Small Pool"] == voters
+    finally:
+        database.dispose()